@@ -0,0 +1,283 @@
+"""Benchmarks for the hot paths of the game: the economy tick, purchases,
+organelle costs, adding to, churning, stepping and querying the Dish and
+its nutrients, snapshotting the game for a worker, and rendering it.
+
+Run through hatch, optionally saving results and comparing them against a
+stored baseline:
+
+    hatch run bench:run --output bench.json
+    hatch run bench:run --compare bench.json
+
+Results are emitted as JSON. Every case runs headlessly, without an App or a
+terminal; the render cases drive DishRenderer directly, through stand-ins
+for nurses_2 (see nurses_2_stubs) where it isn't installed.
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from game.dish import Dish, Organism, Point
+from game.nutrients import NutrientField
+from game.organelle import ConditionalRate, Organelle
+from game.resource import Resource
+from game.state import State
+
+
+def synthetic_state(n_organelles: int, n_resources: int = 24, count: int = 10, seed: int = 0) -> State:
+    """A State with n_organelles organelle types, each owning count units and
+    a passive rate plus a conditional one over random resources."""
+    rng = np.random.default_rng(seed)
+    tickers = [f"R{i}" for i in range(n_resources)]
+    resources = {t: Resource(ticker=t, name=t, description="", amount=1e6) for t in tickers}
+    organelles = {}
+    for i in range(n_organelles):
+        consumed, produced = rng.choice(tickers, 2, replace=False).tolist()
+        organelles[i] = Organelle(
+            idx=i,
+            name=f"Organelle {i}",
+            description="",
+            base_cost={consumed: 10},
+            cost_exponent={consumed: 1.01},
+            count=count,
+            rates=[
+                ConditionalRate(production={produced: 0.1}),
+                ConditionalRate(consumption={consumed: 0.5}, production={produced: 1}),
+            ],
+        )
+    return State(organelles=organelles, resources=resources)
+
+
+def synthetic_dish(n_entities: int, bounds: tuple[int, int] = (1000, 6000), seed: int = 0) -> Dish:
+    """A Dish holding n_entities, half food and half organisms, spread
+    uniformly over bounds."""
+    rng = np.random.default_rng(seed)
+    n_food, n_organisms = n_entities // 2, n_entities - n_entities // 2
+    dish = Dish(bounds=bounds)
+    dish.restore_food(rng.integers(0, bounds, size=(n_food, 2)), np.full(n_food, 0.1))
+    dish.restore_organisms(rng.integers(0, bounds, size=(n_organisms, 2)), np.ones((n_organisms, 2), dtype=np.int64))
+    return dish
+
+
+def measure(func, repeat: int = 5) -> dict:
+    """Time func, returning seconds per call."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {"seconds": statistics.median(times), "min": min(times), "number": number}
+
+
+# Every benchmark yields (name, setup) pairs, where setup builds whatever the
+# case needs and returns the function to time. Setup only runs for selected cases.
+
+
+def bench_tick():
+    for n in (10, 100, 1000):
+        yield f"tick/organelles={n}", lambda n=n: synthetic_state(n).step
+
+
+def bench_buy_sell():
+    def setup():
+        st = synthetic_state(100, count=0)
+
+        def buy_sell():
+            st.buy(0)
+            st.sell(0)
+
+        return buy_sell
+
+    yield "buy_sell", setup
+
+
+def bench_costs():
+    for count in (10, 100, 1000):
+
+        def setup(count=count):
+            organelle = Organelle(
+                idx=0, name="", description="", base_cost={"ATP": 10}, cost_exponent={"ATP": 1.11}, count=count
+            )
+            return lambda: organelle.costs
+
+        yield f"costs/count={count}", setup
+
+
+def bench_dish_add():
+    for n in (10**3, 10**4, 10**5):
+
+        def add_organisms(n=n):
+            dish = Dish()
+            for i in range(n):
+                dish.add_organism(Organism(pos=Point(i % 100, i % 600), bounds=Point(1, 1)))
+
+        def add_food(n=n):
+            dish = Dish()
+            for i in range(n):
+                dish.add_food(i % 100, i % 600, 0.1)
+
+        yield f"dish/add_organism/n={n}", lambda f=add_organisms: f
+        yield f"dish/add_food/n={n}", lambda f=add_food: f
+
+
+def bench_dish_churn():
+    """Remove and re-add a food and an organism at random, in a dish that
+    stays the same size."""
+    for n in (10**3, 10**5):
+
+        def setup(n=n):
+            dish = synthetic_dish(2 * n)
+            rng = np.random.default_rng(0)
+
+            def churn():
+                organism = int(dish.organism_ids[rng.integers(n)])
+                pos = dish.organism(organism).pos
+                dish.remove_organism(organism)
+                dish.add_organism(Organism(pos=pos, bounds=Point(1, 1)))
+                y, x, calories = dish.remove_food(int(dish.food_ids[rng.integers(n)]))
+                dish.add_food(y, x, calories)
+
+            return churn
+
+        yield f"dish/churn/n={n}", setup
+
+
+def bench_dish_step():
+    for n in (10**3, 10**4, 10**5):
+        yield f"dish/step/organisms={n}", lambda n=n: synthetic_dish(2 * n).step
+
+
+def bench_dish_query():
+    """Proximity queries through the spatial hashes, with entries spread over the whole dish."""
+    for n in (10**3, 10**4, 10**5):
+
+        def nearest(n=n):
+            dish = synthetic_dish(n)
+            return lambda: dish.food_index.nearest(500, 3000)
+
+        def rect(n=n):
+            dish = synthetic_dish(n)
+            return lambda: dish.organism_rows_in(400, 3000, 450, 3200)
+
+        yield f"dish/nearest/n={n}", nearest
+        yield f"dish/rows_in/n={n}", rect
+
+
+def bench_nutrients():
+    for bounds in ((100, 600), (1000, 6000)):
+        yield f"nutrients/step/bounds={bounds[0]}x{bounds[1]}", lambda bounds=bounds: NutrientField(bounds).step
+
+
+def bench_snapshot():
+    """What a SimulationWorker pays to publish each tick."""
+    from game.controls import DishControls
+    from game.worker import StateSnapshot
+
+    for n in (10**3, 10**5):
+
+        def setup(n=n):
+            st = State(dish=synthetic_dish(2 * n))
+            controls = DishControls(st.dish)
+            return lambda: StateSnapshot(st, controls)
+
+        yield f"snapshot/organisms={n}", setup
+
+
+def bench_render():
+    import nurses_2_stubs
+
+    nurses_2_stubs.install()
+    from game.widgets import DishRenderer
+
+    for n, zoom in itertools.chain(((n, 1) for n in (10**3, 10**4, 10**5, 10**6)), ((10**5, 4), (10**5, 16))):
+
+        def setup(n=n, zoom=zoom):
+            dish = synthetic_dish(n)
+            renderer = DishRenderer(dish)
+
+            def render():
+                # Force a full frame each call, as if something moved
+                dish._version += 1
+                renderer.render(400, 3000, 50, 200, zoom)
+
+            return render
+
+        yield f"render/entities={n}" + (f"/zoom={zoom}" if zoom > 1 else ""), setup
+
+
+BENCHMARKS = [
+    bench_tick,
+    bench_buy_sell,
+    bench_costs,
+    bench_dish_add,
+    bench_dish_churn,
+    bench_dish_step,
+    bench_dish_query,
+    bench_nutrients,
+    bench_snapshot,
+    bench_render,
+]
+
+
+def run(pattern: str = "") -> dict:
+    results = {}
+    for bench in BENCHMARKS:
+        for name, setup in bench():
+            if pattern not in name:
+                continue
+            try:
+                results[name] = measure(setup())
+            except Exception as e:
+                results[name] = {"error": repr(e)}
+            print(name, results[name], file=sys.stderr)
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "time": time.time(),
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> bool:
+    """Print the ratio of every result to its baseline. False if anything got
+    slower than threshold times its baseline."""
+    ok = True
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name, {})
+        if "seconds" not in result or "seconds" not in base:
+            continue
+        ratio = result["seconds"] / base["seconds"]
+        slower = ratio > threshold
+        ok = ok and not slower
+        print(f"{'SLOWER' if slower else 'ok':>6} {ratio:7.2f}x {name}", file=sys.stderr)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", "--pattern", default="", help="Only run benchmarks whose name contains this.")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    parser.add_argument("--compare", help="A stored JSON report to compare against.")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio that fails --compare.")
+    args = parser.parse_args()
+
+    report = run(args.pattern)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Checks that importing the game's modules stays within a time budget, and
+that the headless ones never pull in nurses_2.
+
+Every module is imported in a fresh interpreter under `python -X importtime`,
+a few times, and the fastest cumulative time is compared to its budget:
+
+    hatch run bench:imports
+    hatch run bench:imports --scale 2  # on a slow machine
+
+Exits non-zero if any module is over budget or imports nurses_2 when it
+shouldn't.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+
+# Keyed on module, with a value equal to its import budget in milliseconds
+BUDGETS = {
+    "game.scripts.main": 50,
+    "game.dish": 250,
+    "game.organelle": 500,
+    "game.state": 600,
+    "game.scripts.simulate": 600,
+}
+# Modules that must stay importable without a terminal UI
+HEADLESS = ["game.scripts.main", "game.dish", "game.organelle", "game.state", "game.scripts.simulate"]
+
+
+def import_time(module: str) -> tuple[float, bool]:
+    """Seconds taken to import module in a fresh interpreter, and whether it
+    imported nurses_2."""
+    code = f"import sys, {module}; print('nurses_2' in sys.modules)"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+    # Lines look like "import time: self [us] | cumulative | name"; ours is the last one for module
+    cumulative = 0
+    for line in proc.stderr.splitlines():
+        match = re.match(r"import time:\s*\d+ \|\s*(\d+) \|\s*(\S+)", line)
+        if match and match.group(2) == module:
+            cumulative = int(match.group(1))
+    return cumulative / 1e6, proc.stdout.strip() == "True"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget by this.")
+    parser.add_argument("--repeat", type=int, default=3, help="Imports per module; the fastest counts.")
+    args = parser.parse_args()
+
+    ok = True
+    for module, budget in BUDGETS.items():
+        times, ui = zip(*(import_time(module) for _ in range(args.repeat)))
+        ms = min(times) * 1e3
+        over = ms > budget * args.scale
+        leaks_ui = module in HEADLESS and any(ui)
+        ok = ok and not over and not leaks_ui
+        status = "SLOWER" if over else "UI" if leaks_ui else "ok"
+        print(f"{status:>6} {ms:7.1f} / {budget * args.scale:.0f} ms {module}", file=sys.stderr)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
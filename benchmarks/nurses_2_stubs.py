@@ -0,0 +1,85 @@
+"""Stand-ins for the parts of nurses_2 that game.widgets imports, so that
+DishRenderer can be benchmarked headlessly where nurses_2 isn't installed.
+
+DishRenderer only needs Char, Color and ColorPair to behave, and those
+mirror nurses_2's own definitions; everything else is an empty placeholder,
+enough for game.widgets to import but not to build any widget.
+"""
+
+import sys
+import types
+from typing import NamedTuple
+
+import numpy as np
+
+
+class Color(NamedTuple):
+    red: int
+    green: int
+    blue: int
+
+
+class ColorPair(NamedTuple):
+    fg_red: int
+    fg_green: int
+    fg_blue: int
+    bg_red: int
+    bg_green: int
+    bg_blue: int
+
+    @classmethod
+    def from_colors(cls, fg: Color, bg: Color) -> "ColorPair":
+        return cls(*fg, *bg)
+
+
+Char = np.dtype(
+    [("char", "U1"), ("bold", "?"), ("italic", "?"), ("underline", "?"), ("strikethrough", "?"), ("overline", "?")]
+)
+
+
+def _placeholder(name: str) -> type:
+    return type(name, (), {})
+
+
+MODULES = {
+    "nurses_2": {},
+    "nurses_2.colors": {
+        "BLACK": Color(0, 0, 0),
+        "RED": Color(255, 0, 0),
+        "WHITE": Color(255, 255, 255),
+        "ColorPair": ColorPair,
+    },
+    "nurses_2.colors.color_data_structures": {"Color": Color},
+    "nurses_2.io": {},
+    "nurses_2.io.input": {},
+    "nurses_2.io.input.events": {"MouseEventType": _placeholder("MouseEventType")},
+    "nurses_2.widgets": {},
+    "nurses_2.widgets.button": {"Button": _placeholder("Button")},
+    "nurses_2.widgets.grid_layout": {
+        "GridLayout": _placeholder("GridLayout"),
+        "Orientation": _placeholder("Orientation"),
+    },
+    "nurses_2.widgets.text_field": {"TextParticleField": _placeholder("TextParticleField")},
+    "nurses_2.widgets.text_widget": {"Border": _placeholder("Border"), "TextWidget": _placeholder("TextWidget")},
+    "nurses_2.widgets.widget": {"Widget": _placeholder("Widget")},
+    "nurses_2.widgets.widget_data_structures": {
+        "Anchor": _placeholder("Anchor"),
+        "Char": Char,
+        "style_char": _placeholder("style_char"),
+    },
+}
+
+
+def install():
+    """Register the stand-ins, unless nurses_2 itself can be imported."""
+    try:
+        import nurses_2  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        return
+    for name, attributes in MODULES.items():
+        module = types.ModuleType(name)
+        module.__path__ = []
+        module.__dict__.update(attributes)
+        sys.modules[name] = module
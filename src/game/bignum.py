@@ -0,0 +1,203 @@
+import math
+import re
+
+import numpy as np
+
+LN10 = np.log(10)
+LOG2_10 = np.log2(10)
+# Exponent given to zero, so that it never dominates an alignment
+ZERO_EXPONENT = -1e300
+# Exponent differences beyond this shift a float64 mantissa to 0 or inf
+_MAX_SHIFT = 2100
+
+
+class BigArray:
+    """An array of numbers stored as mantissa * 2 ** exponent, with both
+    parts held as float64 arrays and mantissas normalized by np.frexp. The
+    exponent being a float means values up to about 2 ** (10 ** 308) are
+    representable, far beyond float64, while every operation stays a handful
+    of vectorized NumPy calls.
+
+    Supports +, -, *, / and comparisons against other BigArrays, NumPy arrays
+    and plain numbers, with broadcasting. Indexing returns a BigArray, and
+    formatting a scalar BigArray prints it like a float while it fits in one.
+    """
+
+    __slots__ = ("mantissa", "exponent")
+    # Make NumPy defer to our reflected operators, e.g. for ndarray <= BigArray
+    __array_ufunc__ = None
+
+    def __init__(self, values=0.0, exponent=0.0):
+        mantissa, shift = np.frexp(np.asarray(values, dtype=float))
+        self.mantissa = mantissa
+        self.exponent = np.where(mantissa == 0, ZERO_EXPONENT, exponent + shift)
+
+    @classmethod
+    def _raw(cls, mantissa: np.ndarray, exponent: np.ndarray) -> "BigArray":
+        """Wrap parts that are already normalized."""
+        out = cls.__new__(cls)
+        out.mantissa, out.exponent = mantissa, exponent
+        return out
+
+    @classmethod
+    def from_log10(cls, logs) -> "BigArray":
+        """Build from base 10 logarithms, which may be far beyond what 10 **
+        logs could hold as a float. -inf gives 0 and inf gives inf."""
+        logs = np.asarray(logs, dtype=float) * LOG2_10
+        finite = np.isfinite(logs)
+        whole = np.floor(np.where(finite, logs, 0.0))
+        mantissa = np.where(finite, np.exp2(np.where(finite, logs, 0.0) - whole), np.where(logs > 0, np.inf, 0.0))
+        return cls(mantissa, whole)
+
+    @staticmethod
+    def coerce(value) -> "BigArray":
+        return value if isinstance(value, BigArray) else BigArray(value)
+
+    # Array protocol
+    @property
+    def shape(self) -> tuple:
+        return self.mantissa.shape
+
+    @property
+    def ndim(self) -> int:
+        return self.mantissa.ndim
+
+    def __len__(self) -> int:
+        return len(self.mantissa)
+
+    def __getitem__(self, idx) -> "BigArray":
+        return BigArray._raw(self.mantissa[idx], self.exponent[idx])
+
+    def __setitem__(self, idx, value):
+        value = BigArray.coerce(value)
+        self.mantissa[idx] = value.mantissa
+        self.exponent[idx] = value.exponent
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def copy(self) -> "BigArray":
+        return BigArray._raw(self.mantissa.copy(), self.exponent.copy())
+
+    def to_float(self) -> np.ndarray:
+        """As float64, with values too large to hold saturating to +-inf."""
+        # Mantissas are under 1, so only exponents over 1024 overflow
+        finite = np.ldexp(self.mantissa, np.clip(self.exponent, -_MAX_SHIFT, 1024).astype(int))
+        return np.where(self.exponent > 1024, np.copysign(np.inf, self.mantissa), finite)
+
+    def __float__(self) -> float:
+        return float(self.to_float())
+
+    def log10(self) -> np.ndarray:
+        """Base 10 logarithm of the magnitude; -inf for zero."""
+        if self.ndim == 0:
+            # A lone amount is common, and much faster through math
+            mantissa = abs(float(self.mantissa))
+            return (math.log2(mantissa) + float(self.exponent)) / LOG2_10 if mantissa else -math.inf
+        with np.errstate(divide="ignore"):
+            return np.where(self.mantissa == 0, -np.inf, (np.log2(np.abs(self.mantissa)) + self.exponent) / LOG2_10)
+
+    def sum(self, axis=None) -> "BigArray":
+        top = np.max(self.exponent, axis=axis, keepdims=True, initial=ZERO_EXPONENT)
+        mantissa = np.sum(_shift(self.mantissa, self.exponent - top), axis=axis)
+        return BigArray(mantissa, top.reshape(mantissa.shape))
+
+    # Arithmetic
+    def __add__(self, other) -> "BigArray":
+        other = BigArray.coerce(other)
+        top = np.maximum(self.exponent, other.exponent)
+        mantissa = _shift(self.mantissa, self.exponent - top) + _shift(other.mantissa, other.exponent - top)
+        return BigArray(mantissa, top)
+
+    __radd__ = __add__
+
+    def __neg__(self) -> "BigArray":
+        return BigArray._raw(-self.mantissa, self.exponent)
+
+    def __abs__(self) -> "BigArray":
+        return BigArray._raw(np.abs(self.mantissa), self.exponent)
+
+    def __sub__(self, other) -> "BigArray":
+        return self + -BigArray.coerce(other)
+
+    def __rsub__(self, other) -> "BigArray":
+        return BigArray.coerce(other) + -self
+
+    def __mul__(self, other) -> "BigArray":
+        other = BigArray.coerce(other)
+        return BigArray(self.mantissa * other.mantissa, self.exponent + other.exponent)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other) -> "BigArray":
+        other = BigArray.coerce(other)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return BigArray(self.mantissa / other.mantissa, self.exponent - other.exponent)
+
+    def __rtruediv__(self, other) -> "BigArray":
+        return BigArray.coerce(other) / self
+
+    # Comparisons, elementwise
+    def __lt__(self, other) -> np.ndarray:
+        return (self - other).mantissa < 0
+
+    def __le__(self, other) -> np.ndarray:
+        return (self - other).mantissa <= 0
+
+    def __gt__(self, other) -> np.ndarray:
+        return (self - other).mantissa > 0
+
+    def __ge__(self, other) -> np.ndarray:
+        return (self - other).mantissa >= 0
+
+    def __eq__(self, other) -> np.ndarray:
+        other = BigArray.coerce(other)
+        return (self.mantissa == other.mantissa) & (self.exponent == other.exponent)
+
+    def __ne__(self, other) -> np.ndarray:
+        return ~(self == other)
+
+    __hash__ = None
+
+    # Display
+    def __format__(self, spec: str) -> str:
+        """Like a float while the value fits comfortably in one, otherwise
+        as a decimal mantissa and exponent, e.g. 1.23e4567."""
+        if self.ndim != 0:
+            return repr(self)
+        if abs(self.exponent) < 1000 or self.mantissa == 0 or not np.isfinite(self.mantissa):
+            return format(float(self), spec)
+        exponent = float(self.log10())
+        whole = np.floor(exponent)
+        mantissa = np.copysign(10 ** (exponent - whole), self.mantissa)
+        precision = re.search(r"\.(\d+)", spec)
+        digits = int(precision.group(1)) if precision else 2
+        if abs(whole) < 1e15:
+            return f"{mantissa:.{digits}f}e{whole:.0f}"
+        return f"{mantissa:.{digits}f}e{whole:.{digits}e}"
+
+    def __str__(self) -> str:
+        return format(self, ".2f")
+
+    def __repr__(self) -> str:
+        if self.ndim == 0:
+            return f"BigArray({self:.6g})"
+        return f"BigArray([{', '.join(format(v, '.6g') for v in self)}])"
+
+
+def _shift(mantissa: np.ndarray, shift: np.ndarray) -> np.ndarray:
+    """mantissa * 2 ** shift for non-positive shifts, flushing to 0 the ones
+    too large to matter."""
+    return np.ldexp(mantissa, np.maximum(shift, -_MAX_SHIFT).astype(int))
+
+
+def log10_range_sum(cumulative: np.ndarray, start: int, stop) -> np.ndarray:
+    """Given a table of base 10 logarithms of running totals, the logarithm
+    of cumulative[stop] - cumulative[start] in linear space. stop may be an
+    array of indices."""
+    high, low = cumulative[stop], cumulative[start]
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        out = high + np.log10(-np.expm1((low - high) * LN10))
+    # inf - inf: the running total had already overflowed the logarithm
+    return np.where(np.isnan(out) & (high == np.inf), np.inf, out)
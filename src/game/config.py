@@ -1,3 +1,37 @@
+import os
+
 RERENDER_PERIOD = 0.5
 DISH_RERENDER_PERIOD = 0.5
 UPDATE_PERIOD = 0.2
+SAVE_FILE = "save.npz"
+# Compiled content packs, keyed on a hash of the pack files. Kept in the user's cache directory,
+# so that runs started from different directories share one cache instead of each leaving their own.
+CONTENT_CACHE_DIR = os.path.join(
+    os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "cell-incremental",
+    "content",
+)
+# Dish coordinates covered by each screen cell at every zoom level of the dish view, closest first
+DISH_ZOOM_LEVELS = (1, 2, 4, 8, 16)
+AUTOSAVE_PERIOD = 30
+# Frame ring export, see game.export: ticks between frames, frames kept in the ring, and the most
+# organisms and food each frame holds
+EXPORT_PERIOD_TICKS = 5
+EXPORT_FRAMES = 64
+EXPORT_MAX_ENTITIES = 4096
+PERF_SAMPLES = 256
+PERF_LOG_PERIOD = 60
+# Nutrient field: dish coordinates per grid cell side, fraction of the
+# difference to neighbours diffused per second, fraction decayed per second,
+# and amount regrown per second by a fully fertile cell
+NUTRIENT_CELL_SIZE = 2
+NUTRIENT_DIFFUSION = 0.5
+NUTRIENT_DECAY = 0.02
+NUTRIENT_REGROWTH = 0.05
+# Food spawn chances per grid cell per second at full concentration, the
+# nutrients each spawned food takes from its cell, and the most food a dish holds
+FOOD_SPAWN_RATE = 1e-4
+FOOD_SPAWN_CALORIES = 0.5
+MAX_FOOD = 1000
+# Most timesteps the scheduler will replay at once before handing the rest to State.catch_up
+MAX_CATCH_UP_STEPS = 25
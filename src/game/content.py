@@ -0,0 +1,153 @@
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+from typing import Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from game.config import CONTENT_CACHE_DIR
+from game.economy import Economy
+from game.organelle import ConditionalRate, Organelle
+from game.resource import Resource
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+# Bump whenever the cache layout or the models change, to invalidate old caches
+CONTENT_CACHE_VERSION = 1
+BASE_PACK = os.path.join(os.path.dirname(__file__), "packs", "base.toml")
+# Packs making up the default content, in load order
+PACKS = [BASE_PACK]
+
+
+class ContentPack(BaseModel):
+    """The organelles and resources defined by one pack file, keyed on id
+    and ticker. Entries may leave out their idx or ticker, which are then
+    taken from the key."""
+
+    resources: dict[str, Resource] = {}
+    organelles: dict[int, Organelle] = {}
+
+
+class Content:
+    """Validated organelle and resource definitions, merged from one or more
+    packs, along with the array layout the Economy compiles them into.
+
+    :ivar layout: The Economy's rate_owner, consumption and production arrays.
+    """
+
+    def __init__(self, organelles: dict[int, Organelle], resources: dict[str, Resource], layout: dict[str, np.ndarray]):
+        self.organelles = organelles
+        self.resources = resources
+        self.layout = layout
+
+
+def read_pack(path: str) -> ContentPack:
+    """Parse and validate one TOML or JSON pack file."""
+    with open(path, "rb") as f:
+        data = json.load(f) if path.endswith(".json") else tomllib.load(f)
+    for ticker, entry in data.get("resources", {}).items():
+        entry.setdefault("ticker", ticker)
+    for idx, entry in data.get("organelles", {}).items():
+        entry.setdefault("idx", int(idx))
+    return ContentPack.model_validate(data)
+
+
+def compile_content(paths: list[str]) -> Content:
+    """Validate and merge packs, later ones replacing entries of earlier ones."""
+    organelles: dict[int, Organelle] = {}
+    resources: dict[str, Resource] = {}
+    for path in paths:
+        pack = read_pack(path)
+        organelles.update(pack.organelles)
+        resources.update(pack.resources)
+    return Content(organelles, resources, Economy(organelles, resources).layout)
+
+
+def _digest(paths: list[str]) -> str:
+    """A hash of the contents of every pack, in order."""
+    digest = hashlib.sha256(f"{CONTENT_CACHE_VERSION}".encode())
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def _write_cache(content: Content, path: str):
+    header = {
+        "format_version": CONTENT_CACHE_VERSION,
+        "organelles": {idx: o.model_dump() for idx, o in content.organelles.items()},
+        "resources": {ticker: r.model_dump() for ticker, r in content.resources.items()},
+    }
+    cache_dir = os.path.dirname(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    # A temporary file of its own, as parallel sweep workers may all be
+    # writing the same cache at once
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, header=np.frombuffer(json.dumps(header).encode(), dtype=np.uint8), **content.layout)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _read_cache(path: str) -> Content:
+    """Rebuild Content from a cache written by _write_cache. Everything in it
+    was validated when it was written, so models are built without
+    validation."""
+    with np.load(path) as data:
+        header = json.loads(data["header"].tobytes())
+        layout = {name: data[name] for name in data.files if name != "header"}
+    organelles = {}
+    for idx, o in header["organelles"].items():
+        rates = [ConditionalRate.model_construct(**rate) for rate in o.pop("rates")]
+        organelles[int(idx)] = Organelle.model_construct(rates=rates, **o)
+    resources = {ticker: Resource.model_construct(**r) for ticker, r in header["resources"].items()}
+    return Content(organelles, resources, layout)
+
+
+def load_content(paths: list[str], cache_dir: Optional[str] = None) -> Content:
+    """Load packs through a cache keyed on their contents, so that only the
+    first startup after a pack changes pays for parsing and validation.
+    :param cache_dir: Where the cache is kept, CONTENT_CACHE_DIR if not given.
+    """
+    if cache_dir is None:
+        cache_dir = CONTENT_CACHE_DIR
+    cache_path = os.path.join(cache_dir, f"{_digest(paths)}.npz")
+    if os.path.exists(cache_path):
+        try:
+            return _read_cache(cache_path)
+        except Exception as e:
+            logging.warning("Rebuilding unreadable content cache %s: %r", cache_path, e)
+    content = compile_content(paths)
+    try:
+        _write_cache(content, cache_path)
+    except OSError as e:
+        logging.warning("Could not write content cache %s: %r", cache_path, e)
+    return content
+
+
+_default: Optional[Content] = None
+
+
+def default_content() -> Content:
+    """The Content of PACKS, loaded once per process."""
+    global _default
+    if _default is None:
+        _default = load_content(PACKS)
+    return _default
+
+
+def add_pack(path: str):
+    """Load a mod pack after the ones already in PACKS."""
+    global _default
+    PACKS.append(path)
+    _default = None
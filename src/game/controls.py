@@ -0,0 +1,77 @@
+from typing import TYPE_CHECKING, Optional
+
+from game.config import DISH_ZOOM_LEVELS
+from game.dish import Dish, Organism, Point
+
+if TYPE_CHECKING:
+    from game.recording import Recorder
+
+# Numpad direction for every movement key, see Organism.move
+MOVE_KEYS = {"h": 4, "j": 2, "k": 8, "l": 6}
+# Camera offset change for every movement key, when held with alt
+CAMERA_KEYS = {"h": Point(0, -1), "j": Point(-1, 0), "k": Point(1, 0), "l": Point(0, 1)}
+
+
+class DishControls:
+    """What the keys of the playable Dish do, kept apart from any widget so
+    that recorded key presses can be replayed headlessly. Randomness comes
+    from the Dish's rng.
+
+    :ivar follow_organism: The organism the camera follows and keys move.
+    :ivar camera_offset: Where the followed organism sits in the view.
+    :ivar show_nutrients: Whether the nutrient field is drawn.
+    :ivar zoom: Dish positions per screen cell, one of DISH_ZOOM_LEVELS.
+    """
+
+    def __init__(self, dish: Dish, recorder: Optional["Recorder"] = None):
+        self.dish = dish
+        self.recorder = recorder
+        self.follow_organism: Optional[Organism] = None
+        self.camera_offset = Point(4, 9)
+        self.show_nutrients = False
+        self.zoom = DISH_ZOOM_LEVELS[0]
+
+    def camera_origin(self) -> Point:
+        """The dish position at the top left of the view. The followed
+        organism stays camera_offset screen cells from it at any zoom."""
+        if self.follow_organism is None:
+            return Point(0, 0)
+        pos = self.follow_organism.pos
+        return Point(pos.y - self.camera_offset.y * self.zoom, pos.x - self.camera_offset.x * self.zoom)
+
+    def follow(self, idx: Optional[int]):
+        """Follow the organism with the given id, or nothing if None. Recorded,
+        as it decides which organism the movement keys move."""
+        if self.recorder is not None:
+            self.recorder.follow(idx)
+        self.follow_organism = None if idx is None else self.dish.organism(idx)
+
+    def press(self, key: str, alt: bool = False) -> bool:
+        """Act on an unshifted, uncontrolled key press. True if it did anything."""
+        if self.recorder is not None:
+            self.recorder.key(key, alt)
+        if alt:
+            if key in CAMERA_KEYS:
+                self.camera_offset += CAMERA_KEYS[key]
+                return True
+            return False
+        if key in MOVE_KEYS:
+            return self.follow_organism is not None and self.follow_organism.move(MOVE_KEYS[key])
+        elif key == "p":
+            self.follow_organism = self.dish.add_organism(Organism(pos=Point(0, -5), bounds=Point(2, 2)))
+        elif key == "f":
+            rng = self.dish.rng
+            self.dish.add_food(int(rng.integers(50)), int(rng.integers(150)), float(rng.random()))
+        elif key == "n":
+            self.camera_offset.y += 1
+        elif key == "v":
+            self.show_nutrients = not self.show_nutrients
+        elif key in ("-", "="):
+            # - zooms out and = (unshifted +) in, stopping at either end
+            level = DISH_ZOOM_LEVELS.index(self.zoom) + (1 if key == "-" else -1)
+            if not 0 <= level < len(DISH_ZOOM_LEVELS):
+                return False
+            self.zoom = DISH_ZOOM_LEVELS[level]
+        else:
+            return False
+        return True
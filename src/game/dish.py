@@ -1,43 +1,84 @@
 from collections import namedtuple
 from enum import Enum, auto
-from random import choice, randint, random, randrange
-from sys import maxsize
 from typing import NamedTuple, Optional
 
-from nurses_2.colors import BLACK, RED, WHITE, ColorPair
-from pydantic import BaseModel
+import numpy as np
 
-from game.config import DISH_RERENDER_PERIOD
+from game.config import FOOD_SPAWN_CALORIES, MAX_FOOD, UPDATE_PERIOD
+from game.nutrients import NutrientField
+from game.slots import SlotAllocator
+from game.spatial import SpatialHash
 
 Food = namedtuple("Food", ["y", "x", "calories"])
 
+# (dy, dx) for every numpad direction, indexed by the direction itself. See
+# Organism.move; 0 and the diagonals don't move.
+DIRECTION_OFFSETS = np.array(
+    [[0, 0], [0, 0], [1, 0], [0, 0], [0, -1], [0, 0], [0, 1], [0, 0], [-1, 0], [0, 0]], dtype=np.int64
+)
+WANDER_DIRECTIONS = np.array([2, 4, 6, 8], dtype=np.int8)
+# Chance out of 100 that a freely wandering organism moves on a given tick
+WANDER_PROBABILITY = 10
 
-def p(probability_out_of_100):
-    return random() * 100 < probability_out_of_100
 
+def p(probability_out_of_100, rng: np.random.Generator):
+    return rng.random() * 100 < probability_out_of_100
 
-class Point(BaseModel):
-    y: int
-    x: int
 
-    def __init__(self, y=None, x=None, **kwargs):
-        if y is not None:
-            kwargs["y"] = y
-        if x is not None:
-            kwargs["x"] = x
-        super().__init__(**kwargs)
+class Point:
+    """A (y, x) pair. Points are made on every camera update and organism
+    lookup, so this is a plain slotted class rather than a pydantic model."""
+
+    __slots__ = ("y", "x")
+
+    def __init__(self, y: int = 0, x: int = 0):
+        self.y = y
+        self.x = x
 
     def __add__(self, other):
         return Point(other.y + self.y, other.x + self.x)
+
     def __sub__(self, other):
         return Point(self.y - other.y, self.x - other.x)
 
+    def __eq__(self, other):
+        return isinstance(other, Point) and self.y == other.y and self.x == other.x
+
+    def __repr__(self):
+        return f"Point(y={self.y}, x={self.x})"
+
+
+class Organism:
+    """A thin view onto one row of a Dish's organism arrays. Until it is added
+    to a Dish, an Organism holds its own position and bounds."""
+
+    __slots__ = ("idx", "dish", "_pos", "_bounds")
+
+    def __init__(self, pos: Point, bounds: Point, idx: Optional[int] = None, dish: Optional["Dish"] = None):
+        self.idx = idx
+        self.dish = dish
+        self._pos = pos
+        self._bounds = bounds
+
+    @property
+    def slot(self) -> int:
+        """Our row in the Dish's organism arrays. KeyError once we've been
+        removed from it."""
+        return self.dish.organism_slots.row(self.idx)
+
+    @property
+    def pos(self) -> Point:
+        if self.dish is None:
+            return self._pos
+        y, x = self.dish.organism_positions[self.slot].tolist()
+        return Point(y, x)
 
-class Organism(BaseModel):
-    idx: Optional[int] = None
-    dish: Optional["Dish"] = None
-    pos: Point
-    bounds: Point
+    @property
+    def bounds(self) -> Point:
+        if self.dish is None:
+            return self._bounds
+        y, x = self.dish.organism_bounds[self.slot].tolist()
+        return Point(y, x)
 
     def move(self, direction: int):
         r"""Try to move in a direction. True if successful.
@@ -54,40 +95,261 @@ class Organism(BaseModel):
             return False
         if direction == 5:
             return True
-        if direction == 2:
-            self.pos.y += 1
-        elif direction == 4:
-            self.pos.x -= 1
-        elif direction == 6:
-            self.pos.x += 1
-        elif direction == 8:
-            self.pos.y -= 1
+        if self.dish is None:
+            dy, dx = DIRECTION_OFFSETS[direction].tolist()
+            self._pos.y += dy
+            self._pos.x += dx
+        else:
+            self.dish.move_organisms(np.array([direction]), np.array([self.slot]))
+        return True
 
     def free_wander_think(self):
-        """Called once every tick if free wandering is enabled."""
-        if p(10):
-            d = choice([2, 4, 6, 8])
-            self.move(d)
+        """Called once every tick if free wandering is enabled. Dish.step does
+        this for every organism at once. Draws from the Dish's rng, so only
+        works once we've been added to one."""
+        rng = self.dish.rng
+        if p(WANDER_PROBABILITY, rng):
+            self.move(int(rng.choice(WANDER_DIRECTIONS)))
 
 
-class Dish(BaseModel):
+class Dish:
     """The Dish manages the simulation of Organisms and provides the basic
-    functionality required for the in-game Petri Dish."""
+    functionality required for the in-game Petri Dish.
+
+    Organisms and food are each stored as a struct of arrays: row i of every
+    organism column belongs to the same organism, and likewise for food.
+    Each kind has a SlotAllocator handing out the ids they are known by,
+    which stay valid while rows are swapped around by removals, so adding
+    and removing either is O(1). Food and organisms are also kept in
+    spatial hashes, keyed on id, for proximity queries.
+
+    A Dish may hold a NutrientField over its bounds, which food then spawns
+    from every tick, up to MAX_FOOD.
+
+    All of the Dish's randomness, and its NutrientField's, is drawn from rng,
+    so a Dish given a seeded Generator plays out the same every time.
+    """
+
+    def __init__(
+        self,
+        food: Optional[list[Food]] = None,
+        bounds: tuple[int, int] = (100, 600),
+        nutrients: Optional[NutrientField] = None,
+        rng: Optional[np.random.Generator] = None,
+    ):
+        self.bounds: tuple[int, int] = tuple(bounds)
+        self.nutrients = nutrients
+        self._rng = np.random.default_rng() if rng is None else rng
+        self._organism_slots = SlotAllocator()
+        self._organism_pos = np.zeros((0, 2), dtype=np.int64)
+        self._organism_bounds = np.zeros((0, 2), dtype=np.int64)
+        self._food_slots = SlotAllocator()
+        self._food_pos = np.zeros((0, 2), dtype=np.int64)
+        self._food_calories = np.zeros(0, dtype=float)
+        self._food_index = SpatialHash(lambda ids: self._food_pos[self._food_slots.rows(ids)])
+        self._organism_index = SpatialHash(lambda ids: self._organism_pos[self._organism_slots.rows(ids)])
+        self._version = 0
+        if food:
+            food = np.array(food, dtype=float).reshape(-1, 3)
+            self.restore_food(food[:, :2].astype(np.int64), food[:, 2])
+
+    @property
+    def version(self) -> int:
+        """Bumped whenever food or organisms are added, moved or removed."""
+        return self._version
+
+    @property
+    def rng(self) -> np.random.Generator:
+        """Where the Dish and its NutrientField draw random numbers from."""
+        return self._rng
+
+    @rng.setter
+    def rng(self, rng: np.random.Generator):
+        self._rng = rng
+        if self.nutrients is not None:
+            self.nutrients.rng = rng
+
+    @property
+    def food_index(self) -> SpatialHash:
+        """Spatial index of food, keyed on food id."""
+        return self._food_index
+
+    @property
+    def organism_index(self) -> SpatialHash:
+        """Spatial index of organisms, keyed on organism id."""
+        return self._organism_index
+
+    @property
+    def organism_slots(self) -> SlotAllocator:
+        """Maps organism ids to rows of the organism arrays."""
+        return self._organism_slots
 
-    organisms: dict[int, Organism] = {}
-    food: list[Food] = []
-    bounds: tuple[int, int] = (100, 600)
+    @property
+    def food_slots(self) -> SlotAllocator:
+        """Maps food ids to rows of the food arrays."""
+        return self._food_slots
+
+    @property
+    def organism_positions(self) -> np.ndarray:
+        """(n, 2) array of organism (y, x) positions. Writes go to the dish."""
+        return self._organism_pos[: len(self._organism_slots)]
+
+    @property
+    def organism_bounds(self) -> np.ndarray:
+        """(n, 2) array of organism (y, x) bounds."""
+        return self._organism_bounds[: len(self._organism_slots)]
+
+    @property
+    def organism_ids(self) -> np.ndarray:
+        """(n,) array of organism ids, in row order."""
+        return self._organism_slots.handles
+
+    @property
+    def food_positions(self) -> np.ndarray:
+        """(n, 2) array of food (y, x) positions."""
+        return self._food_pos[: len(self._food_slots)]
+
+    @property
+    def food_calories(self) -> np.ndarray:
+        """(n,) array of the calories held by each food."""
+        return self._food_calories[: len(self._food_slots)]
+
+    @property
+    def food_ids(self) -> np.ndarray:
+        """(n,) array of food ids, in row order."""
+        return self._food_slots.handles
+
+    @property
+    def food(self) -> list[Food]:
+        """Every food, in row order. Builds a tuple per food, so prefer the
+        array properties in anything per-frame."""
+        return [Food(y, x, c) for (y, x), c in zip(self.food_positions.tolist(), self.food_calories.tolist())]
+
+    @property
+    def organisms(self) -> dict[int, Organism]:
+        """Views of every organism, keyed on id. Builds a view per organism,
+        so prefer the array properties in anything per-frame."""
+        return {idx: Organism(None, None, idx, self) for idx in self.organism_ids.tolist()}
+
+    def organism(self, idx: int) -> Organism:
+        """Get a view of the organism with the given id."""
+        if idx not in self._organism_slots:
+            raise KeyError(idx)
+        return Organism(None, None, idx, self)
+
+    def food_rows_in(self, y0: int, x0: int, y1: int, x1: int) -> np.ndarray:
+        """Rows of the food inside the rectangle from (y0, x0) to (y1, x1), inclusive."""
+        return self._food_slots.rows(self._food_index.query_rect(y0, x0, y1, x1))
+
+    def organism_rows_in(self, y0: int, x0: int, y1: int, x1: int) -> np.ndarray:
+        """Rows of the organisms positioned inside the rectangle from (y0, x0) to (y1, x1), inclusive."""
+        return self._organism_slots.rows(self._organism_index.query_rect(y0, x0, y1, x1))
+
+    def _reserve(self, names: tuple[str, ...], n: int):
+        """Make sure the named arrays have room for n rows."""
+        capacity = len(getattr(self, names[0]))
+        if n <= capacity:
+            return
+        capacity = max(n, 2 * capacity, 16)
+        for name in names:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
 
     def add_organism(self, organism: Organism) -> Organism:
         """Finish initializing an organism and add it to our dish."""
-        new_idx = randint(0, maxsize)
-        while new_idx in self.organisms:
-            new_idx = randint(0, maxsize)
+        new_idx, row = self._organism_slots.allocate()
+        self._reserve(("_organism_pos", "_organism_bounds"), row + 1)
+        self._organism_pos[row] = (organism._pos.y, organism._pos.x)
+        self._organism_bounds[row] = (organism._bounds.y, organism._bounds.x)
+        self._organism_index.insert(new_idx, organism._pos.y, organism._pos.x)
+        self._version += 1
         organism.idx = new_idx
         organism.dish = self
-        self.organisms[new_idx] = organism
         return organism
 
-    def add_food(self, *args):
-        """Add food to our dish."""
-        self.food.append(Food(*args))
+    def restore_organisms(self, positions: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+        """Add many organisms at once, e.g. when loading a save. Returns
+        their new ids."""
+        start = len(self._organism_slots)
+        ids = self._organism_slots.allocate_many(len(positions))
+        self._reserve(("_organism_pos", "_organism_bounds"), start + len(ids))
+        self._organism_pos[start : start + len(ids)] = positions
+        self._organism_bounds[start : start + len(ids)] = bounds
+        self._organism_index.insert_many(ids, self._organism_pos[start : start + len(ids)])
+        self._version += 1
+        return ids
+
+    def remove_organism(self, idx: int):
+        """Take an organism out of the dish. Views of it go stale, and the
+        organism that was in the last row takes over its row."""
+        row, last = self._organism_slots.free(idx)
+        self._organism_index.remove(idx, *self._organism_pos[row].tolist())
+        self._organism_pos[row] = self._organism_pos[last]
+        self._organism_bounds[row] = self._organism_bounds[last]
+        self._version += 1
+
+    def move_organisms(self, directions: np.ndarray, rows: Optional[np.ndarray] = None):
+        """Move many organisms at once, keeping them inside the dish.
+        :param directions: Numpad directions, as in Organism.move.
+        :param rows: Organism rows to move. Every organism if not given, in
+            which case directions must hold one entry per organism.
+        """
+        positions = self.organism_positions
+        if rows is None:
+            old = positions.copy()
+            positions += np.take(DIRECTION_OFFSETS, directions, axis=0)
+            np.clip(positions, 0, np.subtract(self.bounds, self.organism_bounds), out=positions)
+            self._organism_index.move_many(self.organism_ids, old, positions)
+        else:
+            old = positions[rows]
+            moved = old + np.take(DIRECTION_OFFSETS, directions, axis=0)
+            positions[rows] = np.clip(moved, 0, np.subtract(self.bounds, self.organism_bounds[rows]))
+            self._organism_index.move_many(self.organism_ids[rows], old, positions[rows])
+        self._version += 1
+
+    def step(self, dt: float = UPDATE_PERIOD):
+        """Run one tick of the whole dish: every organism freely wanders,
+        moves and is clamped to the dish bounds in a few array operations,
+        then the nutrient field advances and spawns food."""
+        n = len(self._organism_slots)
+        if n > 0:
+            wander = self._rng.random(n) * 100 < WANDER_PROBABILITY
+            directions = np.where(wander, WANDER_DIRECTIONS[self._rng.integers(0, len(WANDER_DIRECTIONS), n)], 5)
+            self.move_organisms(directions)
+        if self.nutrients is not None:
+            spawned = self.nutrients.step(dt, max_spawn=max(MAX_FOOD - len(self._food_slots), 0))
+            if len(spawned):
+                self.restore_food(spawned, np.full(len(spawned), FOOD_SPAWN_CALORIES))
+
+    def add_food(self, y: int, x: int, calories: float) -> int:
+        """Add food to our dish. Returns its id."""
+        idx, row = self._food_slots.allocate()
+        self._reserve(("_food_pos", "_food_calories"), row + 1)
+        self._food_pos[row] = (y, x)
+        self._food_calories[row] = calories
+        self._food_index.insert(idx, int(y), int(x))
+        self._version += 1
+        return idx
+
+    def restore_food(self, positions: np.ndarray, calories: np.ndarray) -> np.ndarray:
+        """Add many food at once. Returns their ids."""
+        start = len(self._food_slots)
+        ids = self._food_slots.allocate_many(len(positions))
+        self._reserve(("_food_pos", "_food_calories"), start + len(ids))
+        self._food_pos[start : start + len(ids)] = positions
+        self._food_calories[start : start + len(ids)] = calories
+        self._food_index.insert_many(ids, self._food_pos[start : start + len(ids)])
+        self._version += 1
+        return ids
+
+    def remove_food(self, idx: int) -> Food:
+        """Take food out of the dish, e.g. once it's eaten. Returns it."""
+        row, last = self._food_slots.free(idx)
+        (y, x), calories = self._food_pos[row].tolist(), float(self._food_calories[row])
+        self._food_pos[row] = self._food_pos[last]
+        self._food_calories[row] = self._food_calories[last]
+        self._food_index.remove(idx, y, x)
+        self._version += 1
+        return Food(y, x, calories)
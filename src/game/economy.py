@@ -0,0 +1,222 @@
+from typing import Optional
+
+import numpy as np
+
+from game.bignum import BigArray
+from game.organelle import Organelle
+from game.resource import Resource
+
+
+class Economy:
+    """A compiled form of the organelle and resource definitions. Every
+    ConditionalRate becomes one row of a dense consumption matrix and one row
+    of a dense production matrix, so that a whole tick is a few array
+    operations instead of a Python loop over organelles, rates and tickers.
+
+    :ivar tickers: Resource tickers, in column order.
+    :ivar organelle_ids: Organelle ids, in count vector order.
+    :ivar rate_owner: For every rate row, the index of the organelle it belongs to.
+    :ivar consumption: (rates, resources) matrix of consumption per second per organelle.
+    :ivar production: (rates, resources) matrix of production per second per organelle.
+    :ivar net: production - consumption.
+
+    Rates share what they consume: when the rates consuming a resource
+    together need more than is held, every one of them is throttled by the
+    same fraction, and a rate runs at the fraction allowed by its scarcest
+    input. All withdrawals and deposits of a tick are then applied as one
+    batch, so neither the order of organelles nor of rates matters, and
+    amounts never go negative.
+
+    Amounts are BigArrays, since they must hold organelle costs that leave
+    float range. Rates and everything per tick stay plain floats; checks of
+    what a rate needs go against amounts saturated to float, which is exact
+    for anything a rate could need.
+    """
+
+    def __init__(
+        self,
+        organelles: dict[int, Organelle],
+        resources: dict[str, Resource],
+        layout: Optional[dict[str, np.ndarray]] = None,
+    ):
+        """
+        :param layout: The arrays of a previous Economy over the same
+            organelles and resources, as given by its layout, to use instead
+            of compiling them again.
+        """
+        self.tickers = list(resources)
+        self.resource_index = {ticker: col for col, ticker in enumerate(self.tickers)}
+        self.organelle_ids = list(organelles)
+        self.organelle_index = {organelle_id: row for row, organelle_id in enumerate(self.organelle_ids)}
+        if layout is None:
+            self._compile(organelles)
+        else:
+            self.rate_owner = layout["rate_owner"]
+            self.consumption = layout["consumption"]
+            self.production = layout["production"]
+        self.net = self.production - self.consumption
+        self._consumes = self.consumption > 0
+
+    def _compile(self, organelles: dict[int, Organelle]):
+        rates = [(row, cond_rate) for row, o in enumerate(organelles.values()) for cond_rate in o.rates]
+        self.rate_owner = np.array([row for row, _ in rates], dtype=np.intp)
+        self.consumption = np.zeros((len(rates), len(self.tickers)))
+        self.production = np.zeros((len(rates), len(self.tickers)))
+        for rate_row, (_, cond_rate) in enumerate(rates):
+            for ticker_name, rate in cond_rate.consumption.items():
+                self.consumption[rate_row, self.resource_index[ticker_name.upper()]] = rate
+            for ticker_name, rate in cond_rate.production.items():
+                self.production[rate_row, self.resource_index[ticker_name.upper()]] = rate
+
+    @property
+    def layout(self) -> dict[str, np.ndarray]:
+        """The compiled arrays, enough to rebuild this Economy without compiling."""
+        return {"rate_owner": self.rate_owner, "consumption": self.consumption, "production": self.production}
+
+    def counts(self, organelles: dict[int, Organelle]) -> np.ndarray:
+        """Gather the organelle counts into a vector, in organelle_ids order."""
+        counts = (organelles[i].count for i in self.organelle_ids)
+        return np.fromiter(counts, dtype=float, count=len(self.organelle_ids))
+
+    def amounts(self, resources: dict[str, Resource]) -> BigArray:
+        """Gather the resource amounts into a vector, in tickers order."""
+        return BigArray(np.fromiter((resources[t].amount for t in self.tickers), dtype=float, count=len(self.tickers)))
+
+    def fractions(self, levels: np.ndarray, demand: np.ndarray) -> np.ndarray:
+        """The fraction of every rate that can run, given the amounts held
+        and the total demand on every resource. Resources in short supply are
+        split between their consumers in proportion to what they need."""
+        held = np.maximum(levels, 0.0)
+        short = demand > held
+        supply = np.ones_like(demand)
+        supply[short] = held[short] / demand[short]
+        return np.where(self._consumes, supply, 1.0).min(axis=1, initial=1.0)
+
+    def tick(self, amounts: BigArray, counts: np.ndarray, dt: float) -> tuple[BigArray, np.ndarray]:
+        """Advance the economy by dt seconds, throttling rates whose inputs
+        are short. Fractions are computed against the amounts at the start
+        of the tick. Returns the new amounts and the net rate of change per
+        second of every resource."""
+        scale = counts[self.rate_owner] * dt
+        fraction = self.fractions(amounts.to_float(), scale @ self.consumption)
+        delta = (scale * fraction) @ self.net
+        return amounts + delta, delta / dt
+
+    def regime(self, levels: np.ndarray, demand: np.ndarray, prefer: Optional[np.ndarray] = None) -> np.ndarray:
+        """For every rate, the short resource limiting its fraction, or -1 if
+        it runs in full. Within a tick, a rate limited by resource i runs at
+        the fraction levels[i] / demand[i], so while the regime stays the
+        same, ticks are affine in the levels of the limiting resources.
+        :param prefer: A previous regime, kept for rates where its resource
+            ties for the most limiting, e.g. when several inputs are empty.
+        """
+        held = np.maximum(levels, 0.0)
+        short = demand > held
+        supply = np.ones_like(demand)
+        supply[short] = held[short] / demand[short]
+        per_rate = np.where(self._consumes, supply, 1.0)
+        if not per_rate.shape[1]:
+            return np.full(len(per_rate), -1, dtype=np.intp)
+        rows = np.arange(len(per_rate))
+        limiting = per_rate.argmin(axis=1)
+        lowest = per_rate[rows, limiting]
+        if prefer is not None:
+            limiting = np.where((prefer >= 0) & (per_rate[rows, prefer] == lowest), prefer, limiting)
+        return np.where(lowest < 1.0, limiting, -1)
+
+    def _tick_matrix(
+        self, scale: np.ndarray, demand: np.ndarray, regime: np.ndarray, limiting: np.ndarray
+    ) -> np.ndarray:
+        """One tick under a regime, as a matrix acting on the vector (levels
+        of the limiting resources, change of every resource so far, 1)."""
+        m, n = len(limiting), len(self.tickers)
+        full = scale * (regime < 0)
+        tick = np.eye(m + n + 1)
+        # How the change of every resource depends on each limiting resource's level
+        per_level = np.zeros((n, m))
+        for col, resource in enumerate(limiting.tolist()):
+            rows = regime == resource
+            per_level[:, col] = (scale[rows] / demand[resource]) @ self.net[rows]
+        constant = full @ self.net
+        tick[:m, :m] += per_level[limiting]
+        tick[:m, -1] = constant[limiting]
+        tick[m : m + n, :m] = per_level
+        tick[m : m + n, -1] = constant
+        return tick
+
+    def advance(
+        self, amounts: BigArray, counts: np.ndarray, elapsed: float, dt: float, max_period: int = 8
+    ) -> tuple[BigArray, np.ndarray]:
+        """Advance the economy by an arbitrary elapsed time, giving the same
+        result as calling tick every dt seconds without replaying every tick.
+
+        Ticks are taken one at a time until the regime (see regime) repeats
+        with a period of at most max_period ticks: steady, or oscillating
+        between throttled states. A period of ticks is then affine in the
+        levels of its limiting resources, so runs of whole periods are
+        applied at once as powers of its matrix, as long as the regime
+        still matches at their end. Runs are found by doubling then halving,
+        and the last tick is always taken singly. Economies that never repeat
+        are stepped tick by tick. Returns the new amounts and the net rate of
+        change of the last tick."""
+        ticks, remainder = divmod(elapsed, dt)
+        ticks = int(ticks)
+        rates = np.zeros(len(amounts))
+        scale = counts[self.rate_owner] * dt
+        demand = scale @ self.consumption
+        recent: list[bytes] = []
+        regimes: list[np.ndarray] = []
+        regime = None
+        while ticks > 0:
+            regime = self.regime(amounts.to_float(), demand, regime)
+            recent.append(regime.tobytes())
+            regimes.append(regime)
+            del recent[: -2 * max_period], regimes[: -2 * max_period]
+            amounts, rates = self.tick(amounts, counts, dt)
+            ticks -= 1
+            period = next((p for p in range(1, len(recent) // 2 + 1) if recent[-p:] == recent[-2 * p : -p]), None)
+            if period is not None and ticks > period:
+                amounts, jumped = self._jump(amounts, demand, scale, regimes[-period:], (ticks - 1) // period)
+                ticks -= jumped * period
+        if remainder > 0:
+            amounts, rates = self.tick(amounts, counts, remainder)
+        return amounts, rates
+
+    def _jump(
+        self, amounts: BigArray, demand: np.ndarray, scale: np.ndarray, period: list[np.ndarray], limit: int
+    ) -> tuple[BigArray, int]:
+        """Apply as many whole periods of the given regimes as keep the regime
+        at their end the same as at their start, up to limit. Returns the new
+        amounts and the number of periods applied."""
+        limiting = np.unique(np.concatenate(period))
+        limiting = limiting[limiting >= 0]
+        m = len(limiting)
+        block = np.eye(m + len(self.tickers) + 1)
+        for regime in period:
+            block = self._tick_matrix(scale, demand, regime, limiting) @ block
+        levels = amounts.to_float()
+        start = np.concatenate((levels[limiting], np.zeros(len(self.tickers)), [1.0]))
+
+        def holds(power: np.ndarray) -> bool:
+            """Whether, after a power of block, no resource has run out from
+            under its consumers and the regime is still period[0]."""
+            moved = levels + (power @ start)[m:-1]
+            if np.any(moved < -1e-9 * demand):
+                return False
+            return np.array_equal(self.regime(moved, demand, period[0]), period[0])
+
+        # Powers of block by doubling, as long as the regime holds at their end
+        powers, done = [block], 0
+        while 2 ** (len(powers) - 1) <= limit and holds(powers[-1]):
+            done, current = 2 ** (len(powers) - 1), powers[-1]
+            powers.append(powers[-1] @ powers[-1])
+        if not done:
+            return amounts, 0
+        # Then add the smaller powers that still hold, largest first
+        for exponent in range(len(powers) - 2, -1, -1):
+            if done + 2**exponent <= limit and holds(powers[exponent] @ current):
+                done, current = done + 2**exponent, powers[exponent] @ current
+        # Rounding may leave amounts just below 0
+        amounts = amounts + (current @ start)[m:-1]
+        amounts[amounts < 0] = 0.0
+        return amounts, done
@@ -0,0 +1,207 @@
+import json
+import time
+from typing import TYPE_CHECKING, Optional, Union
+
+import numpy as np
+
+from game.config import EXPORT_FRAMES, EXPORT_MAX_ENTITIES, EXPORT_PERIOD_TICKS, UPDATE_PERIOD
+
+if TYPE_CHECKING:
+    from game.state import State
+    from game.worker import StateSnapshot
+
+RING_MAGIC = b"CELLRING"
+RING_FORMAT_VERSION = 1
+# Frames start at a multiple of this, so each one is page aligned
+RING_ALIGNMENT = 4096
+# The fixed start of the file. latest is the index of the newest complete
+# frame, -1 before the first, and is written last.
+RING_HEADER = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u4"),
+        ("metadata_size", "<u4"),
+        ("header_size", "<u8"),
+        ("frame_count", "<u8"),
+        ("latest", "<i8"),
+    ]
+)
+
+
+def frame_dtype(n_resources: int, n_organelles: int, max_entities: int) -> np.dtype:
+    """The layout of one frame. index is the frame's number, or -1 while it
+    is being written. Counts hold the true number of organisms and food,
+    though only the first max_entities rows of each are kept."""
+    return np.dtype(
+        [
+            ("index", "<i8"),
+            ("tick", "<i8"),
+            ("wall_time", "<f8"),
+            ("elapsed", "<f8"),
+            ("organism_count", "<i8"),
+            ("food_count", "<i8"),
+            ("amount_mantissa", "<f8", (n_resources,)),
+            ("amount_exponent", "<f8", (n_resources,)),
+            ("rates", "<f8", (n_resources,)),
+            ("organelle_counts", "<i8", (n_organelles,)),
+            ("organism_positions", "<i4", (max_entities, 2)),
+            ("organism_ids", "<i8", (max_entities,)),
+            ("food_positions", "<i4", (max_entities, 2)),
+            ("food_calories", "<f4", (max_entities,)),
+        ],
+        align=True,
+    )
+
+
+class FrameExporter:
+    """Streams the game into a ring of fixed-size frames in a memory-mapped
+    file, one frame every period ticks, for analysis notebooks and viewer
+    processes to tail without pickling anything or touching the game loop.
+
+    A frame holds the resource amounts and rates, organelle counts, and the
+    Dish's organism and food arrays: the same arrays DishWidget draws from,
+    whether of a Dish or a DishSnapshot. The file starts with a RING_HEADER
+    and JSON metadata (tickers, organelle ids, the frame dtype), then the
+    frames. Writing one is a copy of a few arrays into the map; see
+    FrameReader for how readers tell complete frames from ones being
+    overwritten.
+
+    :param view: A State or StateSnapshot, to size the frames from.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        view: Union["State", "StateSnapshot"],
+        period: int = EXPORT_PERIOD_TICKS,
+        frame_count: int = EXPORT_FRAMES,
+        max_entities: int = EXPORT_MAX_ENTITIES,
+        dt: float = UPDATE_PERIOD,
+    ):
+        self.path = path
+        self.period = period
+        self.max_entities = max_entities
+        self._ticks = 0
+        self._next_index = 0
+        self._start = time.perf_counter()
+        self.dtype = frame_dtype(len(view.resources), len(view.organelles), max_entities)
+        metadata = json.dumps(
+            {
+                "tickers": list(view.resources),
+                "organelle_ids": list(view.organelles),
+                "organelle_names": [o.name for o in view.organelles.values()],
+                "dish_bounds": list(view.dish.bounds),
+                "dt": dt,
+                "period": period,
+                "max_entities": max_entities,
+                "created_at": time.time(),
+                "frame_dtype": np.lib.format.dtype_to_descr(self.dtype),
+            }
+        ).encode()
+        header_size = -(-(RING_HEADER.itemsize + len(metadata)) // RING_ALIGNMENT) * RING_ALIGNMENT
+        with open(path, "wb") as f:
+            f.truncate(header_size + frame_count * self.dtype.itemsize)
+        self._header = np.memmap(path, dtype=RING_HEADER, mode="r+", shape=(1,))
+        self._header[0] = (RING_MAGIC, RING_FORMAT_VERSION, len(metadata), header_size, frame_count, -1)
+        raw = np.memmap(path, dtype=np.uint8, mode="r+", offset=RING_HEADER.itemsize, shape=(len(metadata),))
+        raw[:] = np.frombuffer(metadata, dtype=np.uint8)
+        del raw
+        self._frames = np.memmap(path, dtype=self.dtype, mode="r+", offset=header_size, shape=(frame_count,))
+        self._frames["index"] = -1
+
+    def tick(self, view: Union["State", "StateSnapshot"]):
+        """Count a tick, writing a frame of view if one is due."""
+        self._ticks += 1
+        if self._ticks % self.period == 0:
+            self.write(view)
+
+    def write(self, view: Union["State", "StateSnapshot"]):
+        """Write a frame of view now, over the oldest one."""
+        index = self._next_index
+        self._next_index += 1
+        frames, slot, limit = self._frames, index % len(self._frames), self.max_entities
+        dish = view.dish
+        organisms, food = dish.organism_positions, dish.food_positions
+        frames["index"][slot] = -1
+        frames["tick"][slot] = self._ticks
+        frames["wall_time"][slot] = time.time()
+        frames["elapsed"][slot] = time.perf_counter() - self._start
+        frames["organism_count"][slot] = len(organisms)
+        frames["food_count"][slot] = len(food)
+        frames["amount_mantissa"][slot] = view.amounts.mantissa
+        frames["amount_exponent"][slot] = view.amounts.exponent
+        frames["rates"][slot] = view.rates
+        frames["organelle_counts"][slot] = [o.count for o in view.organelles.values()]
+        frames["organism_positions"][slot, : min(len(organisms), limit)] = organisms[:limit]
+        frames["organism_ids"][slot, : min(len(organisms), limit)] = dish.organism_ids[:limit]
+        frames["food_positions"][slot, : min(len(food), limit)] = food[:limit]
+        frames["food_calories"][slot, : min(len(food), limit)] = dish.food_calories[:limit]
+        frames["index"][slot] = index
+        self._header["latest"][0] = index
+
+    def close(self):
+        """Flush the map to disk. Readers keep working after this."""
+        self._frames.flush()
+        self._header.flush()
+
+
+class FrameReader:
+    """Tails a ring written by a FrameExporter, possibly in another process.
+
+    Frames are read straight out of the map. A frame is only returned if
+    its index reads the same before and after it is copied, so one that the
+    exporter overwrote mid-copy is never returned half old, half new.
+
+    :ivar metadata: The tickers, organelle ids and names, dish bounds, and
+        export settings the ring was written with.
+    :ivar frames: The ring itself, as a read-only structured memmap.
+    """
+
+    def __init__(self, path: str):
+        self._header = np.memmap(path, dtype=RING_HEADER, mode="r", shape=(1,))
+        if self._header["magic"][0] != RING_MAGIC or self._header["version"][0] != RING_FORMAT_VERSION:
+            msg = f"{path} is not a frame ring this version can read"
+            raise ValueError(msg)
+        size = int(self._header["metadata_size"][0])
+        with open(path, "rb") as f:
+            f.seek(RING_HEADER.itemsize)
+            self.metadata = json.loads(f.read(size))
+        dtype = np.lib.format.descr_to_dtype(self.metadata["frame_dtype"])
+        self.frames = np.memmap(
+            path,
+            dtype=dtype,
+            mode="r",
+            offset=int(self._header["header_size"][0]),
+            shape=(int(self._header["frame_count"][0]),),
+        )
+
+    @property
+    def latest_index(self) -> int:
+        """The index of the newest complete frame, -1 if there is none yet."""
+        return int(self._header["latest"][0])
+
+    def read(self, index: int, retries: int = 3) -> Optional[np.void]:
+        """A copy of the frame with the given index, or None if it's no longer
+        (or not yet) in the ring."""
+        slot = index % len(self.frames)
+        for _ in range(retries):
+            if self.frames["index"][slot] != index:
+                return None
+            frame = self.frames[slot].copy()
+            if frame["index"] == index and self.frames["index"][slot] == index:
+                return frame
+        return None
+
+    def latest(self) -> Optional[np.void]:
+        """A copy of the newest complete frame, or None if there is none yet."""
+        index = self.latest_index
+        while index >= 0:
+            frame = self.read(index)
+            if frame is not None:
+                return frame
+            # Overwritten while being read: try again with the newest frame, if there is one
+            newest = self.latest_index
+            if newest == index:
+                return None
+            index = newest
+        return None
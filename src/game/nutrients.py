@@ -0,0 +1,119 @@
+from typing import Optional
+
+import numpy as np
+
+from game.config import (
+    FOOD_SPAWN_CALORIES,
+    FOOD_SPAWN_RATE,
+    NUTRIENT_CELL_SIZE,
+    NUTRIENT_DECAY,
+    NUTRIENT_DIFFUSION,
+    NUTRIENT_REGROWTH,
+    UPDATE_PERIOD,
+)
+
+# Largest fraction of a cell's difference from its neighbours that may flow in
+# one step; more than this and the explicit stencil goes unstable
+MAX_DIFFUSION_STEP = 0.25
+
+
+class NutrientField:
+    """A grid of nutrient concentrations covering a Dish, one cell per
+    cell_size x cell_size block of dish coordinates. Every tick nutrients
+    diffuse to neighbouring cells, decay, and regrow in proportion to each
+    cell's fertility, all as whole-grid array operations. Food then spawns
+    in randomly sampled cells with a chance following their concentration,
+    taking its calories out of the cell. The cost of a tick follows the
+    grid size, not how much food there is.
+
+    :ivar fertility: Per cell regrowth multiplier in [0, 1]; patchy by default.
+    :ivar concentration: Nutrients held by every cell.
+    :ivar rng: Draws the initial fertility and where food spawns.
+    """
+
+    def __init__(
+        self,
+        bounds: tuple[int, int],
+        cell_size: int = NUTRIENT_CELL_SIZE,
+        fertility: Optional[np.ndarray] = None,
+        concentration: Optional[np.ndarray] = None,
+        rng: Optional[np.random.Generator] = None,
+    ):
+        self.bounds = tuple(bounds)
+        self.cell_size = cell_size
+        self.shape = (-(-self.bounds[0] // cell_size), -(-self.bounds[1] // cell_size))
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.fertility = self._patches() if fertility is None else np.asarray(fertility, dtype=float)
+        if concentration is None:
+            concentration = self.fertility * self.capacity
+        self.concentration = np.array(concentration, dtype=float)
+        self._laplacian = np.empty(self.shape)
+        self._version = 0
+
+    @property
+    def capacity(self) -> float:
+        """The concentration a fully fertile cell settles at."""
+        return NUTRIENT_REGROWTH / NUTRIENT_DECAY
+
+    @property
+    def version(self) -> int:
+        """Bumped every step."""
+        return self._version
+
+    def _patches(self, smoothing: int = 32) -> np.ndarray:
+        """Random fertility, smoothed into patches by diffusing it."""
+        self.concentration = self.rng.random(self.shape)
+        self._laplacian = np.empty(self.shape)
+        for _ in range(smoothing):
+            self.diffuse(MAX_DIFFUSION_STEP)
+        low, high = self.concentration.min(), self.concentration.max()
+        return (self.concentration - low) / max(high - low, 1e-12)
+
+    def diffuse(self, rate: float):
+        """One step of the 5-point stencil. Nothing flows through the walls:
+        edge cells only exchange with the neighbours they have."""
+        c, lap = self.concentration, self._laplacian
+        np.multiply(c, -4, out=lap)
+        lap[1:] += c[:-1]
+        lap[:-1] += c[1:]
+        lap[:, 1:] += c[:, :-1]
+        lap[:, :-1] += c[:, 1:]
+        lap[0] += c[0]
+        lap[-1] += c[-1]
+        lap[:, 0] += c[:, 0]
+        lap[:, -1] += c[:, -1]
+        c += rate * lap
+
+    def step(self, dt: float = UPDATE_PERIOD, max_spawn: Optional[int] = None) -> np.ndarray:
+        """Advance by dt seconds. Returns the (n, 2) dish positions of food
+        spawned, each worth FOOD_SPAWN_CALORIES.
+        :param max_spawn: The most food that may spawn, any number if None. If
+            0, nutrients only diffuse, decay and regrow.
+        """
+        self.diffuse(min(NUTRIENT_DIFFUSION * dt, MAX_DIFFUSION_STEP))
+        c = self.concentration
+        c += dt * (NUTRIENT_REGROWTH * self.fertility - NUTRIENT_DECAY * c)
+        self._version += 1
+        n = self.rng.poisson(FOOD_SPAWN_RATE * dt * c.size) if max_spawn != 0 else 0
+        if n == 0:
+            return np.zeros((0, 2), dtype=np.int64)
+        flat = c.reshape(-1)
+        cells = self.rng.integers(0, c.size, n)
+        held = flat[cells]
+        cells = np.unique(cells[(held >= FOOD_SPAWN_CALORIES) & (self.rng.random(n) * self.capacity < held)])
+        if max_spawn is not None and len(cells) > max_spawn:
+            # Before taking the calories out, so that those of food that can't spawn stay in the field
+            cells = np.sort(self.rng.choice(cells, max_spawn, replace=False))
+        flat[cells] -= FOOD_SPAWN_CALORIES
+        # Anywhere inside the cell, as long as that is inside the dish
+        cell_pos = np.stack(np.divmod(cells, self.shape[1]), axis=1) * self.cell_size
+        pos = cell_pos + self.rng.integers(0, self.cell_size, (len(cells), 2))
+        return np.minimum(pos, np.subtract(self.bounds, 1))
+
+    def concentration_at(self, y: int, x: int) -> float:
+        """The concentration of the cell holding a dish position."""
+        return float(self.concentration[y // self.cell_size, x // self.cell_size])
+
+    def deposit(self, y: int, x: int, amount: float):
+        """Return nutrients to the cell holding a dish position."""
+        self.concentration[y // self.cell_size, x // self.cell_size] += amount
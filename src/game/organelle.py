@@ -1,7 +1,18 @@
+from math import inf, isclose, log10
 from typing import Callable
 
+import numpy as np
 from pydantic import BaseModel
 
+from game.bignum import LN10, BigArray, log10_range_sum
+
+# Bulk purchases never consider more units than this at once
+MAX_BULK = 10**6
+
+# Keyed on (base cost, cost exponent), with a value equal to the cumulative
+# log cost table for that pair; see Organelle.cumulative_log_costs
+_COST_TABLES: dict[tuple[float, float], np.ndarray] = {}
+
 
 class ConditionalRate(BaseModel):
     """Describes how an Organelle can use or produce resources.
@@ -27,43 +38,75 @@ class Organelle(BaseModel):
     count: int = 0
     rates: list[ConditionalRate] = []
 
-    @property
-    def costs(self) -> dict[str, float]:
+    def cumulative_log_costs(self, ticker_name: str, n: int) -> np.ndarray:
+        """A table where entry k is the base 10 logarithm of the total cost
+        in ticker_name of the first k organelles, holding at least n + 1
+        entries. Costs grow as base ** (exponent ** k), which leaves float
+        range within a few dozen purchases, but their logarithms do not.
+        Tables are memoized and grown by doubling, so lookups at any count
+        are O(1) after the first."""
+        key = (self.base_cost[ticker_name], self.cost_exponent[ticker_name])
+        table = _COST_TABLES.get(key)
+        if table is None or len(table) <= n:
+            size = max(n, 2 * (0 if table is None else len(table)), 64)
+            with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+                log_costs = np.log10(key[0]) * key[1] ** np.arange(size, dtype=float)
+                totals = np.logaddexp.accumulate(log_costs * LN10) / LN10
+            table = _COST_TABLES[key] = np.concatenate(([-np.inf], totals))
+        return table
+
+    def cost_of(self, start: int, n: int) -> dict[str, BigArray]:
+        """The total cost of the organelles numbered start to start + n - 1."""
         out = {}
-        for ticker_name, base_cost in self.base_cost.items():
-            out[ticker_name] = base_cost ** (self.cost_exponent[ticker_name] ** self.count)
+        for ticker_name in self.base_cost:
+            table = self.cumulative_log_costs(ticker_name, start + n)
+            out[ticker_name] = BigArray.from_log10(log10_range_sum(table, start, start + n))
         return out
 
+    def log_cost(self, ticker_name: str, k: int) -> float:
+        """The base 10 logarithm of the cost in ticker_name of organelle
+        number k, as a plain float."""
+        try:
+            return log10(self.base_cost[ticker_name]) * self.cost_exponent[ticker_name] ** k
+        except OverflowError:
+            return inf
+
+    @property
+    def costs(self) -> dict[str, BigArray]:
+        """The cost of the next organelle."""
+        return self.cost_of(self.count, 1)
+
+    def can_afford(self, amounts: dict[str, BigArray], n: int) -> bool:
+        """Whether amounts hold more of every ticker than the next n
+        organelles cost, compared the same way State.buy does."""
+        costs = self.cost_of(self.count, n)
+        return all(bool(BigArray.coerce(amounts[ticker_name]) > cost) for ticker_name, cost in costs.items())
 
-ORGANELLES = {
-    0: Organelle(
-        idx=0,
-        name="Chloroplast",
-        description="Generates 0.1 ATP/s passively.",
-        base_cost={"ATP": 10},
-        cost_exponent={"ATP": 1.11},
-        rates=[ConditionalRate(production={"ATP": 0.1})],
-    ),
-    1: Organelle(
-        idx=1,
-        name="Mitochondria",
-        description="Generates 0.1 ATP/s passively. If glucose is present, consume 0.5 glucose/s to produce an additional 1 ATP/s.",
-        base_cost={"ATP": 30},
-        cost_exponent={"ATP": 1.12},
-        rates=[
-            ConditionalRate(production={"ATP": 0.1}),
-            ConditionalRate(consumption={"GLUC": 0.5}, production={"ATP": 1}),
-        ],
-    ),
-    2: Organelle(
-        idx=2,
-        name="Nanoconsumer",
-        description="Eats away at the very matter of your organism to produce energy. Consumes 0.1 cytosol/s to produce 2 ATP/s.",
-        base_cost={"ATP": 100},
-        cost_exponent={"ATP": 1.01},
-        rates=[
-            ConditionalRate(production={"ATP": 0.5}),
-            ConditionalRate(consumption={"CYTO": 0.1}, production={"ATP": 2}),
-        ],
-    ),
-}
+    def max_affordable(self, amounts: dict[str, BigArray], limit: int = MAX_BULK) -> int:
+        """How many more organelles can be bought, in one go, while holding
+        more of every ticker than the purchase costs. Found by binary search
+        over the cumulative cost tables, doubling the window searched until
+        it holds something unaffordable. The tables hold rounded logarithms,
+        so a budget within rounding of a total is settled with can_afford."""
+        # Most calls can't afford even one, so check that first, in plain floats
+        for ticker_name in self.base_cost:
+            held, cost = BigArray.coerce(amounts[ticker_name]).log10(), self.log_cost(ticker_name, self.count)
+            if held <= cost and not (isclose(held, cost, rel_tol=1e-9, abs_tol=1e-9) and self.can_afford(amounts, 1)):
+                return 0
+        window = min(64, limit)
+        while True:
+            n = window
+            for ticker_name in self.base_cost:
+                table = self.cumulative_log_costs(ticker_name, self.count + window)
+                spent = log10_range_sum(table, self.count, np.arange(self.count, self.count + window + 1))
+                # spent is non-decreasing; count the purchases strictly under the amount held
+                held = BigArray.coerce(amounts[ticker_name]).log10()
+                n = min(n, int(np.searchsorted(spent, held, side="left")) - 1)
+            if n < window or window >= limit:
+                n = max(n, 0)
+                while n < limit and self.can_afford(amounts, n + 1):
+                    n += 1
+                while n > 0 and not self.can_afford(amounts, n):
+                    n -= 1
+                return n
+            window = min(2 * window, limit)
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from game.config import PERF_LOG_PERIOD, PERF_SAMPLES
+
+logger = logging.getLogger("game.perf")
+logger.setLevel(logging.INFO)
+
+
+class RingBuffer:
+    """The last size samples of a measurement, in a fixed-size array."""
+
+    def __init__(self, size: int = PERF_SAMPLES):
+        self._data = np.zeros(size)
+        self._next = 0
+        self.total = 0
+
+    def append(self, value: float):
+        self._data[self._next] = value
+        self._next = (self._next + 1) % len(self._data)
+        self.total += 1
+
+    @property
+    def values(self) -> np.ndarray:
+        """The samples currently held, oldest first."""
+        if self.total < len(self._data):
+            return self._data[: self.total]
+        return np.roll(self._data, -self._next)
+
+    def summary(self) -> dict[str, float]:
+        values = self.values
+        if len(values) == 0:
+            return {"count": 0}
+        return {
+            "count": self.total,
+            "mean": float(values.mean()),
+            "p95": float(np.percentile(values, 95)),
+            "max": float(values.max()),
+            "last": float(self._data[self._next - 1]),
+        }
+
+
+class PerfMonitor:
+    """Records how long each phase of the game loops takes, and how late each
+    periodic wakeup happens, in ring buffers keyed on phase name."""
+
+    def __init__(self, size: int = PERF_SAMPLES):
+        self.size = size
+        self.durations: dict[str, RingBuffer] = {}
+        self.lateness: dict[str, RingBuffer] = {}
+        self.missed: dict[str, int] = {}
+
+    def _buffer(self, buffers: dict[str, RingBuffer], name: str) -> RingBuffer:
+        if name not in buffers:
+            buffers[name] = RingBuffer(self.size)
+        return buffers[name]
+
+    def record(self, name: str, seconds: float):
+        """Record one duration of a phase."""
+        self._buffer(self.durations, name).append(seconds)
+
+    def record_lateness(self, name: str, seconds: float):
+        """Record how far past its target a periodic wakeup happened."""
+        self._buffer(self.lateness, name).append(seconds)
+
+    def record_missed(self, name: str, count: int = 1):
+        """Count periods that were skipped entirely, under the same name as
+        the lateness of the wakeups that skip them."""
+        self.missed[name] = self.missed.get(name, 0) + count
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the body of a with block as one duration of a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def summary(self) -> dict:
+        return {
+            "durations": {name: buf.summary() for name, buf in self.durations.items()},
+            "lateness": {name: buf.summary() for name, buf in self.lateness.items()},
+            "missed": dict(self.missed),
+        }
+
+    def report(self) -> str:
+        """A short human readable summary, one line per phase, in ms."""
+        lines = []
+        for name, buf in self.durations.items():
+            s = buf.summary()
+            if s["count"]:
+                lines.append(f"{name}: {s['mean'] * 1e3:.2f} avg / {s['max'] * 1e3:.2f} max ms")
+        for name, buf in self.lateness.items():
+            s = buf.summary()
+            if s["count"]:
+                missed = self.missed.get(name, 0)
+                lines.append(f"{name} late: {s['mean'] * 1e3:.2f} avg / {s['max'] * 1e3:.2f} max ms, {missed} missed")
+        # Periods can be missed before the first wakeup is timed
+        for name, missed in self.missed.items():
+            if name not in self.lateness:
+                lines.append(f"{name}: {missed} missed")
+        return "\n".join(lines)
+
+    async def log_loop(self, period: float = PERF_LOG_PERIOD):
+        """Periodically dump the summary as JSON to the log."""
+        while True:
+            await asyncio.sleep(period)
+            logger.info(json.dumps(self.summary()))
+
+
+# The monitor every game loop reports to
+PERF = PerfMonitor()
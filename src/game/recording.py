@@ -0,0 +1,169 @@
+import io
+import json
+import struct
+import time
+from typing import BinaryIO, Iterator, Optional
+
+import numpy as np
+
+from game.config import UPDATE_PERIOD
+from game.controls import DishControls
+from game.save import load_state, snapshot
+from game.state import State
+
+RECORDING_MAGIC = b"CELLREC\x00"
+RECORDING_FORMAT_VERSION = 1
+
+# Every record is one of these type bytes followed by its fields, packed
+# little-endian. Ticks of the recording's own dt, by far the most common
+# record, take a single byte.
+TICK = b"t"  # No fields
+TICK_DT = b"T"  # dt: f64
+CATCH_UP = b"c"  # elapsed: f64
+KEY = b"k"  # alt: u8, then the key: u8 length and utf-8 bytes
+BUY = b"b"  # organelle id: i32, n: i64
+SELL = b"s"  # organelle id: i32, n: i64
+FOLLOW = b"o"  # organism id: i64, -1 for none
+_F64 = struct.Struct("<d")
+_KEY = struct.Struct("<?B")
+_TRADE = struct.Struct("<iq")
+_FOLLOW = struct.Struct("<q")
+_LENGTH = struct.Struct("<I")
+
+
+class Recorder:
+    """Logs everything that drives a State to an append-only file, from
+    which replay can play the session out again exactly.
+
+    The file starts with a header holding the rng seed, followed by a
+    snapshot of the State as a save, then one record per tick, catch up, key
+    press, trade and change of followed organism, in the order they happened. Records are only a few
+    bytes each and the file is flushed at every tick, so a crash loses at
+    most the inputs of the tick in progress.
+
+    Creating a Recorder reseeds the State and attaches itself to it.
+    """
+
+    def __init__(self, path: str, st: State, dt: float = UPDATE_PERIOD, seed: Optional[int] = None):
+        self.path = path
+        self.dt = dt
+        save = io.BytesIO()
+        np.savez(save, **snapshot(st))
+        # Only once the snapshot is taken, as taking it may build the Dish, which draws from rng
+        seed = int(np.random.SeedSequence().generate_state(1)[0]) if seed is None else seed
+        st.reseed(seed)
+        header = {"format_version": RECORDING_FORMAT_VERSION, "seed": seed, "dt": dt, "started_at": time.time()}
+        self._file: BinaryIO = open(path, "wb")
+        self._file.write(RECORDING_MAGIC)
+        for blob in (json.dumps(header).encode(), save.getvalue()):
+            self._file.write(_LENGTH.pack(len(blob)) + blob)
+        self._file.flush()
+        self.st = st
+        st.recorder = self
+
+    def tick(self, dt: float):
+        self._file.write(TICK if dt == self.dt else TICK_DT + _F64.pack(dt))
+        self._file.flush()
+
+    def catch_up(self, elapsed: float):
+        self._file.write(CATCH_UP + _F64.pack(elapsed))
+
+    def key(self, key: str, alt: bool = False):
+        encoded = key.encode()
+        self._file.write(KEY + _KEY.pack(alt, len(encoded)) + encoded)
+
+    def buy(self, organelle_id: int, n: int):
+        self._file.write(BUY + _TRADE.pack(organelle_id, n))
+
+    def sell(self, organelle_id: int, n: int):
+        self._file.write(SELL + _TRADE.pack(organelle_id, n))
+
+    def follow(self, idx: Optional[int]):
+        self._file.write(FOLLOW + _FOLLOW.pack(-1 if idx is None else idx))
+
+    def close(self):
+        """Stop recording and detach from the State."""
+        if self.st.recorder is self:
+            self.st.recorder = None
+        self._file.close()
+
+
+class Recording:
+    """A recording read back from disk.
+
+    :ivar header: The seed, dt and start time it was recorded with.
+    :ivar state: The State when recording started, already reseeded.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(RECORDING_MAGIC):
+            msg = f"{path} is not a recording"
+            raise ValueError(msg)
+        pos = len(RECORDING_MAGIC)
+        blobs = []
+        for _ in range(2):
+            (length,) = _LENGTH.unpack_from(data, pos)
+            blobs.append(data[pos + _LENGTH.size : pos + _LENGTH.size + length])
+            pos += _LENGTH.size + length
+        self.header = json.loads(blobs[0])
+        if self.header["format_version"] != RECORDING_FORMAT_VERSION:
+            msg = f"{path} has unsupported recording format {self.header['format_version']}"
+            raise ValueError(msg)
+        self.state = load_state(io.BytesIO(blobs[1]))
+        self.state.reseed(self.header["seed"])
+        self._records = data[pos:]
+
+    def records(self) -> Iterator[tuple]:
+        """Every record, as (type, *fields). A record cut short, e.g. by a
+        crash while it was written, ends the recording."""
+        data, pos, dt = self._records, 0, self.header["dt"]
+        try:
+            while pos < len(data):
+                kind = data[pos : pos + 1]
+                pos += 1
+                if kind == TICK:
+                    yield TICK, dt
+                elif kind in (TICK_DT, CATCH_UP):
+                    yield (kind, *_F64.unpack_from(data, pos))
+                    pos += _F64.size
+                elif kind == KEY:
+                    alt, length = _KEY.unpack_from(data, pos)
+                    pos += _KEY.size + length
+                    if pos > len(data):
+                        return
+                    yield KEY, data[pos - length : pos].decode(), alt
+                elif kind in (BUY, SELL):
+                    yield (kind, *_TRADE.unpack_from(data, pos))
+                    pos += _TRADE.size
+                elif kind == FOLLOW:
+                    (idx,) = _FOLLOW.unpack_from(data, pos)
+                    yield FOLLOW, None if idx < 0 else idx
+                    pos += _FOLLOW.size
+                else:
+                    msg = f"Unknown record type {kind!r} at byte {pos - 1} of the records"
+                    raise ValueError(msg)
+        except struct.error:
+            return
+
+
+def replay(recording: Recording) -> State:
+    """Play a recording out on its State, as fast as possible, and return
+    the State. Nothing is drawn and nothing sleeps."""
+    st = recording.state
+    controls = DishControls(st.dish)
+    for kind, *fields in recording.records():
+        if kind in (TICK, TICK_DT):
+            st.step(*fields)
+        elif kind == CATCH_UP:
+            st.catch_up(*fields)
+        elif kind == KEY:
+            controls.press(*fields)
+        elif kind == BUY:
+            st.buy(*fields)
+        elif kind == SELL:
+            st.sell(*fields)
+        elif kind == FOLLOW:
+            controls.follow(*fields)
+    return st
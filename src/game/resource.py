@@ -1,8 +1,11 @@
 from enum import Enum, auto
 from typing import Callable
 
+import numpy as np
 from pydantic import BaseModel
 
+from game.bignum import BigArray
+
 
 class Resource(BaseModel):
     """Represents a resource the player can collect, along with a
@@ -15,22 +18,44 @@ class Resource(BaseModel):
     rate: float = 0
 
 
-RESOURCES = {
-    "ATP": Resource(
-        ticker="ATP",
-        name="Adenosine Triphosphate",
-        description="The basic unit of energy to be created and used inside a cellular organism.",
-        amount=15,
-    ),
-    "CYTO": Resource(
-        ticker="CYTO",
-        name="Cytosol",
-        description="The liquid stored within a cell. Consumed by some actions and upgrades.",
-    ),
-    "GLUC": Resource(
-        ticker="GLUC",
-        name="Glucose",
-        description="Consumed by some organelles to make ATP. Produced by finding food in your organism's environment.",
-        amount=10,
-    ),
-}
+class ResourceView:
+    """The live amount and rate of one resource in a State. Reads and writes
+    go straight to the State's amount and rate arrays, so the tick never
+    touches per-resource objects. Everything else comes from the Resource
+    definition."""
+
+    __slots__ = ("definition", "_amounts", "_rates", "_col")
+
+    def __init__(self, definition: Resource, amounts: BigArray, rates: np.ndarray, col: int):
+        self.definition = definition
+        self._amounts = amounts
+        self._rates = rates
+        self._col = col
+
+    @property
+    def ticker(self) -> str:
+        return self.definition.ticker
+
+    @property
+    def name(self) -> str:
+        return self.definition.name
+
+    @property
+    def description(self) -> str:
+        return self.definition.description
+
+    @property
+    def amount(self) -> BigArray:
+        return self._amounts[self._col]
+
+    @amount.setter
+    def amount(self, value: BigArray):
+        self._amounts[self._col] = value
+
+    @property
+    def rate(self) -> float:
+        return self._rates[self._col]
+
+    @rate.setter
+    def rate(self, value: float):
+        self._rates[self._col] = value
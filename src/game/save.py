@@ -0,0 +1,163 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+from game.bignum import BigArray
+from game.config import AUTOSAVE_PERIOD, SAVE_FILE
+from game.dish import Dish
+from game.nutrients import NutrientField
+from game.state import State
+
+SAVE_FORMAT_VERSION = 2
+# What loading a truncated, corrupt or incompatible save raises
+SAVE_LOAD_ERRORS = (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile)
+
+
+class SaveHeader(BaseModel):
+    """The scalar part of a save. Entity arrays are stored next to it."""
+
+    format_version: int = SAVE_FORMAT_VERSION
+    saved_at: float
+    cytosol: float = 0
+    dish_bounds: tuple[int, int]
+    # Keyed on organelle id, with a value equal to the number owned
+    organelles: dict[int, int]
+    # Keyed on ticker name, with a value equal to the amount held as
+    # (mantissa, exponent), or a plain float in format version 1 saves
+    resources: dict[str, Union[tuple[float, float], float]]
+
+
+def snapshot(st: State) -> dict[str, np.ndarray]:
+    """Copy everything a save needs out of a State. This is cheap and meant to
+    run on the event loop, so that write_snapshot can run anywhere else."""
+    header = {
+        "format_version": SAVE_FORMAT_VERSION,
+        "saved_at": time.time(),
+        "cytosol": st.cytosol,
+        "dish_bounds": list(st.dish.bounds),
+        "organelles": {organelle_id: o.count for organelle_id, o in st.organelles.items()},
+        "resources": {
+            ticker: [float(res.amount.mantissa), float(res.amount.exponent)] for ticker, res in st.resources.items()
+        },
+    }
+    snap = {
+        "header": np.frombuffer(json.dumps(header).encode(), dtype=np.uint8),
+        "organism_positions": st.dish.organism_positions.copy(),
+        "organism_bounds": st.dish.organism_bounds.copy(),
+        "food": np.column_stack((st.dish.food_positions, st.dish.food_calories)).astype(float),
+    }
+    if st.dish.nutrients is not None:
+        snap["nutrient_fertility"] = st.dish.nutrients.fertility.copy()
+        snap["nutrient_concentration"] = st.dish.nutrients.concentration.copy()
+    return snap
+
+
+def write_snapshot(snap: dict[str, np.ndarray], path: str = SAVE_FILE):
+    """Write a snapshot to disk. The file is replaced atomically, so a crash
+    mid-write never leaves a broken save behind. Every write goes through a
+    temporary file of its own, so saves running at once can't interleave."""
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **snap)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def save_state(st: State, path: str = SAVE_FILE):
+    """Save a State to disk."""
+    write_snapshot(snapshot(st), path)
+
+
+def load_state(path: Union[str, IO[bytes]] = SAVE_FILE, catch_up: bool = False) -> State:
+    """Load a State from disk, or from a save already read into a file object.
+    :param catch_up: If set, also advance the State by the time that has
+        passed since it was saved.
+    """
+    with np.load(path) as data:
+        header = SaveHeader(**json.loads(data["header"].tobytes()))
+        if header.format_version > SAVE_FORMAT_VERSION:
+            msg = f"Save format {header.format_version} is newer than this game's {SAVE_FORMAT_VERSION}"
+            raise ValueError(msg)
+        # Ids aren't saved; entities get new ones as they are restored
+        food = data["food"].reshape(-1, 3)
+        dish = Dish(bounds=header.dish_bounds)
+        dish.restore_food(food[:, :2].astype(np.int64), food[:, 2])
+        dish.restore_organisms(data["organism_positions"], data["organism_bounds"])
+        # Saves from before nutrients, or with another grid size, start a fresh field
+        dish.nutrients = NutrientField(dish.bounds)
+        if "nutrient_concentration" in data.files and data["nutrient_concentration"].shape == dish.nutrients.shape:
+            dish.nutrients.fertility = data["nutrient_fertility"]
+            dish.nutrients.concentration = data["nutrient_concentration"]
+    st = State(cytosol=header.cytosol, dish=dish)
+    for organelle_id, count in header.organelles.items():
+        if organelle_id in st.organelles:
+            st.organelles[organelle_id].count = count
+    for ticker, amount in header.resources.items():
+        if ticker in st.resources:
+            st.resources[ticker].amount = BigArray(*amount) if isinstance(amount, tuple) else amount
+    st.sync_counts()
+    if catch_up:
+        st.catch_up(max(0.0, time.time() - header.saved_at))
+    return st
+
+
+def load_or_new_state(path: str = SAVE_FILE, catch_up: bool = False) -> State:
+    """Load the State saved at path, or start a new one if there's no save.
+    A save that can't be loaded is moved aside to <path>.bad, so that it
+    neither stops the game from starting nor gets overwritten."""
+    if not os.path.exists(path):
+        return State()
+    try:
+        return load_state(path, catch_up)
+    except SAVE_LOAD_ERRORS:
+        bad_path = f"{path}.bad"
+        logging.warning("Could not load %s, moved it to %s and started a new game", path, bad_path, exc_info=True)
+        os.replace(path, bad_path)
+        return State()
+
+
+class Autosaver:
+    """Periodically saves a State without blocking the event loop: the
+    snapshot is copied on the loop and written from a worker thread."""
+
+    def __init__(self, st: State, path: str = SAVE_FILE, period: float = AUTOSAVE_PERIOD):
+        self.st = st
+        self.path = path
+        self.period = period
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autosave")
+        self._closed = False
+
+    async def save(self):
+        """Save once, now."""
+        snap = snapshot(self.st)
+        await asyncio.get_running_loop().run_in_executor(self._executor, write_snapshot, snap, self.path)
+
+    def close(self):
+        """Wait for a save still being written, and stop the worker thread.
+        Call before saving from elsewhere, so that the two can't race."""
+        self._closed = True
+        self._executor.shutdown(wait=True)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.period)
+            if self._closed:
+                return
+            try:
+                await self.save()
+            except Exception as e:
+                logging.critical(e, exc_info=True)
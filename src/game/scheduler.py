@@ -0,0 +1,112 @@
+import asyncio
+import time
+from typing import Callable, Optional
+
+from game.config import MAX_CATCH_UP_STEPS, UPDATE_PERIOD
+from game.perf import PERF, PerfMonitor
+
+
+class Subscription:
+    """A callback the Scheduler runs at most once every period seconds."""
+
+    __slots__ = ("name", "callback", "period", "next_due")
+
+    def __init__(self, name: str, callback: Callable[[], None], period: float, next_due: float):
+        self.name = name
+        self.callback = callback
+        self.period = period
+        self.next_due = next_due
+
+
+class Scheduler:
+    """Drives the whole game from a single asyncio task. The simulation is
+    stepped at a fixed timestep with an accumulator, so game time keeps pace
+    with wall time however long frames take; UI refreshes are subscribed
+    callbacks, and a subscriber that fell behind runs once rather than once
+    per period it missed.
+
+    :param step: Advances the simulation by the given number of seconds. If
+        None, something else steps the simulation and only subscriptions run.
+    :param catch_up: Optionally advances the simulation by a large number of
+        seconds at once. Used when we fall more than MAX_CATCH_UP_STEPS
+        behind, e.g. after the process was suspended. Otherwise that time is
+        dropped and counted as missed ticks.
+    :param perf: Where timings are recorded, PERF if not given. Only the
+        thread the Scheduler runs on may write to it.
+    """
+
+    def __init__(
+        self,
+        step: Optional[Callable[[float], None]],
+        dt: float = UPDATE_PERIOD,
+        catch_up: Optional[Callable[[float], None]] = None,
+        max_catch_up_steps: int = MAX_CATCH_UP_STEPS,
+        perf: Optional[PerfMonitor] = None,
+    ):
+        self.step = step
+        self.dt = dt
+        self.catch_up = catch_up
+        self.max_catch_up_steps = max_catch_up_steps
+        self.perf = PERF if perf is None else perf
+        self.subscriptions: list[Subscription] = []
+        self._accumulator = 0.0
+
+    def subscribe(self, name: str, callback: Callable[[], None], period: float) -> Subscription:
+        """Run callback every period seconds, starting on the next frame."""
+        subscription = Subscription(name, callback, period, time.perf_counter())
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+
+    def advance(self, elapsed: float):
+        """Account for elapsed wall time, stepping the simulation as many
+        whole timesteps as it covers."""
+        if self.step is None:
+            return
+        self._accumulator += elapsed
+        steps = int(self._accumulator // self.dt)
+        if steps > self.max_catch_up_steps:
+            behind = (steps - self.max_catch_up_steps) * self.dt
+            if self.catch_up is not None:
+                with self.perf.phase("catch_up"):
+                    self.catch_up(behind)
+            else:
+                self.perf.record_missed("scheduler", steps - self.max_catch_up_steps)
+            self._accumulator -= behind
+            steps = self.max_catch_up_steps
+        for _ in range(steps):
+            with self.perf.phase("tick"):
+                self.step(self.dt)
+        self._accumulator -= steps * self.dt
+
+    def run_due(self, now: float):
+        """Run every subscription that is due."""
+        for subscription in list(self.subscriptions):
+            if now >= subscription.next_due:
+                with self.perf.phase(subscription.name):
+                    subscription.callback()
+                # Skip every period already missed, keeping to the subscription's phase
+                missed = (now - subscription.next_due) // subscription.period
+                subscription.next_due += (missed + 1) * subscription.period
+
+    def next_wakeup(self, now: float, last_advance: float) -> float:
+        """Seconds until the next timestep or subscription is due."""
+        due = self.dt if self.step is None else self.dt - self._accumulator - (now - last_advance)
+        for subscription in self.subscriptions:
+            due = min(due, subscription.next_due - now)
+        return max(0.0, due)
+
+    async def run(self):
+        last = time.perf_counter()
+        while True:
+            now = time.perf_counter()
+            self.advance(now - last)
+            last = now
+            self.run_due(time.perf_counter())
+            delay = self.next_wakeup(time.perf_counter(), last)
+            start = time.perf_counter()
+            await asyncio.sleep(delay)
+            self.perf.record_lateness("scheduler", time.perf_counter() - start - delay)
@@ -1,6 +1,7 @@
+import argparse
 import signal
 
-from game.world import World
+from game.config import UPDATE_PERIOD
 
 
 def handle_pdb(sig, frame):
@@ -11,10 +12,87 @@ def handle_pdb(sig, frame):
     dbg.set_trace(frame)
 
 
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="game")
+    parser.add_argument(
+        "--pack", action="append", default=[], help="A TOML or JSON content pack to load after the base game."
+    )
+    parser.add_argument("--record", help="Record the session to this file, for `game replay`.")
+    parser.add_argument(
+        "--worker",
+        choices=["thread", "process"],
+        help="Step the game in a worker thread or process, away from input handling and drawing.",
+    )
+    parser.add_argument(
+        "--export", help="Stream frames of the game to this file, for viewers and notebooks to tail. See game.export."
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    simulate = subparsers.add_parser("simulate", help="Advance the game headlessly, as fast as possible.")
+    simulate.add_argument("--ticks", type=int, default=1000, help="Number of ticks to simulate.")
+    simulate.add_argument("--dt", type=float, default=UPDATE_PERIOD, help="Game seconds per tick.")
+    simulate.add_argument("--auto-buy", action="store_true", help="Greedily buy every affordable organelle.")
+    sweep = subparsers.add_parser("sweep", help="Run many headless games in parallel to tune organelle balance.")
+    sweep.add_argument("--ticks", type=int, default=18000, help="Number of ticks to simulate per run.")
+    sweep.add_argument("--dt", type=float, default=UPDATE_PERIOD, help="Game seconds per tick.")
+    sweep.add_argument(
+        "--strategy",
+        nargs="+",
+        default=["greedy"],
+        choices=["greedy", "cheapest", "balanced"],
+        help="Purchase strategies to play with.",
+    )
+    sweep.add_argument(
+        "--base-cost-scale", nargs="+", type=float, default=[1.0], help="Multipliers of every base_cost."
+    )
+    sweep.add_argument(
+        "--cost-exponent-scale", nargs="+", type=float, default=[1.0], help="Multipliers of every cost_exponent."
+    )
+    sweep.add_argument(
+        "--production-scale", nargs="+", type=float, default=[1.0], help="Multipliers of every production rate."
+    )
+    sweep.add_argument(
+        "--target-atp", nargs="+", type=float, default=[1e3, 1e4, 1e5], help="Record when ATP first reaches these."
+    )
+    sweep.add_argument("--workers", type=int, help="Worker processes. Defaults to one per CPU.")
+    sweep.add_argument("--batch", type=int, default=64, help="Runs per row group written to the output.")
+    sweep.add_argument("--output", default="sweep.parquet", help="Parquet file to write results to.")
+    replay = subparsers.add_parser("replay", help="Play a recorded session out again headlessly, as fast as possible.")
+    replay.add_argument("recording", help="A file written by `game --record`.")
+    replay.add_argument("--profile", help="Profile the replay with cProfile, writing the stats to this file.")
+    return parser
+
+
 def entrypoint():
+    args = make_parser().parse_args()
+    if args.pack:
+        from game.content import add_pack
+
+        for pack in args.pack:
+            add_pack(pack)
+    if args.command == "simulate":
+        from game.scripts.simulate import run
+
+        run(args)
+        return
+    if args.command == "sweep":
+        from game.scripts.sweep import run
+
+        run(args)
+        return
+    if args.command == "replay":
+        from game.scripts.replay import run
+
+        run(args)
+        return
+
+    # Only the interactive game needs nurses_2
+    from game.world import World
+
     print("I love you.")
     signal.signal(signal.SIGUSR1, handle_pdb)
-    World().run()
+    world = World(record=args.record, worker=args.worker, export=args.export)
+    world.run()
+    world.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,22 @@
+import time
+
+from game.recording import TICK, TICK_DT, Recording, replay
+from game.scripts.simulate import print_summary
+
+
+def run(args):
+    """Entry point for `game replay`."""
+    recording = Recording(args.recording)
+    ticks = sum(kind in (TICK, TICK_DT) for kind, *_ in recording.records())
+    start = time.perf_counter()
+    if args.profile:
+        import cProfile
+
+        with cProfile.Profile() as profile:
+            st = replay(recording)
+        profile.dump_stats(args.profile)
+    else:
+        st = replay(recording)
+    print_summary(st, ticks, recording.header["dt"], time.perf_counter() - start)
+    if args.profile:
+        print(f"Wrote profile to {args.profile}; view it with `python -m pstats {args.profile}`.")
@@ -0,0 +1,36 @@
+import time
+from typing import Optional
+
+from game.config import UPDATE_PERIOD
+from game.state import State
+
+
+def simulate(ticks: int, dt: float = UPDATE_PERIOD, state: Optional[State] = None, auto_buy: bool = False) -> State:
+    """Advance a State by the given number of ticks as fast as possible,
+    without a terminal or any sleeping. Returns the advanced State.
+
+    :param auto_buy: If set, greedily buy every affordable organelle after each tick.
+    """
+    st = State() if state is None else state
+    for _ in range(ticks):
+        st.step(dt)
+        if auto_buy:
+            for organelle_id in st.organelles:
+                st.buy(organelle_id, st.max_affordable(organelle_id))
+    return st
+
+
+def print_summary(st: State, ticks: int, dt: float, elapsed: float):
+    """Print the end state of a headless run."""
+    print(f"Simulated {ticks} ticks ({ticks * dt:.1f}s of game time) in {elapsed:.3f}s.")
+    for ticker, res in st.resources.items():
+        print(f"{res.name} ({ticker}): {res.amount:.2f} @ {res.rate:.2f}/s")
+    for organelle in st.organelles.values():
+        print(f"{organelle.name}: {organelle.count}")
+
+
+def run(args):
+    """Entry point for `game simulate`."""
+    start = time.perf_counter()
+    st = simulate(args.ticks, args.dt, auto_buy=args.auto_buy)
+    print_summary(st, args.ticks, args.dt, time.perf_counter() - start)
@@ -0,0 +1,220 @@
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Callable, Iterator
+
+from pydantic import BaseModel
+
+from game.config import UPDATE_PERIOD
+from game.content import PACKS, load_content
+from game.organelle import ConditionalRate, Organelle
+from game.state import State
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+
+class SweepRun(BaseModel):
+    """One headless run of a balance sweep: a set of parameter scales
+    applied to every organelle, and the purchase strategy to play with."""
+
+    run_id: int
+    strategy: str
+    base_cost_scale: float = 1
+    cost_exponent_scale: float = 1
+    production_scale: float = 1
+    ticks: int
+    dt: float = UPDATE_PERIOD
+    # ATP amounts to record the first time of reaching
+    targets: list[float] = []
+    # Content packs to play with, in load order
+    packs: list[str] = []
+
+
+def scaled_organelles(run: SweepRun) -> dict[int, Organelle]:
+    """Copies of the organelles of the run's packs with its scales applied."""
+    organelles = {}
+    for organelle_id, o in load_content(run.packs).organelles.items():
+        organelles[organelle_id] = o.model_copy(
+            update={
+                "base_cost": {t: cost * run.base_cost_scale for t, cost in o.base_cost.items()},
+                "cost_exponent": {t: exp * run.cost_exponent_scale for t, exp in o.cost_exponent.items()},
+                "rates": [
+                    ConditionalRate(
+                        consumption=rate.consumption,
+                        production={t: r * run.production_scale for t, r in rate.production.items()},
+                    )
+                    for rate in o.rates
+                ],
+            }
+        )
+    return organelles
+
+
+# Purchase strategies. Each buys whatever it wants to right now, returning
+# (organelle id, number bought) for every purchase made.
+
+
+def buy_greedy(st: State) -> list[tuple[int, int]]:
+    """As many as possible of every organelle, in id order."""
+    bought = []
+    for organelle_id in st.organelles:
+        n = st.max_affordable(organelle_id)
+        if n and st.buy(organelle_id, n):
+            bought.append((organelle_id, n))
+    return bought
+
+
+def buy_cheapest(st: State) -> list[tuple[int, int]]:
+    """One at a time, always the organelle whose next unit costs least."""
+    bought = []
+    while True:
+        affordable = [i for i in st.organelles if st.max_affordable(i)]
+        if not affordable:
+            return bought
+        cheapest = min(affordable, key=lambda i: sum(float(c) for c in st.organelles[i].costs.values()))
+        st.buy(cheapest)
+        bought.append((cheapest, 1))
+
+
+def buy_balanced(st: State) -> list[tuple[int, int]]:
+    """One at a time, always the affordable organelle we own fewest of."""
+    bought = []
+    while True:
+        affordable = [i for i in st.organelles if st.max_affordable(i)]
+        if not affordable:
+            return bought
+        fewest = min(affordable, key=lambda i: st.organelles[i].count)
+        st.buy(fewest)
+        bought.append((fewest, 1))
+
+
+STRATEGIES: dict[str, Callable[[State], list[tuple[int, int]]]] = {
+    "greedy": buy_greedy,
+    "cheapest": buy_cheapest,
+    "balanced": buy_balanced,
+}
+
+
+def run_one(run: SweepRun) -> dict:
+    """Play one run to the end, returning its summary as a flat row."""
+    start = time.perf_counter()
+    st = State(organelles=scaled_organelles(run))
+    buy = STRATEGIES[run.strategy]
+    atp = st.ticker("ATP")
+    pending = sorted(run.targets)
+    reached = {}
+    times, organelle_ids, counts = [], [], []
+    for tick in range(1, run.ticks + 1):
+        st.step(run.dt)
+        now = tick * run.dt
+        while pending and atp.amount >= pending[0]:
+            reached[pending.pop(0)] = now
+        for organelle_id, n in buy(st):
+            times.append(now)
+            organelle_ids.append(organelle_id)
+            counts.append(n)
+    row = run.model_dump(exclude={"targets", "packs"})
+    for target in run.targets:
+        row[f"time_to_{target:g}_atp"] = reached.get(target, float("nan"))
+    for ticker, res in st.resources.items():
+        row[f"final_{ticker}"] = float(res.amount)
+    for organelle in st.organelles.values():
+        row[f"count_{organelle.name}"] = organelle.count
+    row["purchase_times"] = times
+    row["purchase_organelles"] = organelle_ids
+    row["purchase_counts"] = counts
+    row["wall_seconds"] = time.perf_counter() - start
+    return row
+
+
+def row_schema(targets: list[float], packs: list[str]) -> "pa.Schema":
+    """The schema of the rows run_one returns, declared up front so that
+    every batch is written alike, whatever its runs happened to buy."""
+    import pyarrow as pa
+
+    content = load_content(packs)
+    return pa.schema(
+        [
+            ("run_id", pa.int64()),
+            ("strategy", pa.string()),
+            ("base_cost_scale", pa.float64()),
+            ("cost_exponent_scale", pa.float64()),
+            ("production_scale", pa.float64()),
+            ("ticks", pa.int64()),
+            ("dt", pa.float64()),
+        ]
+        + [(f"time_to_{target:g}_atp", pa.float64()) for target in targets]
+        + [(f"final_{ticker}", pa.float64()) for ticker in content.resources]
+        + [(f"count_{organelle.name}", pa.int64()) for organelle in content.organelles.values()]
+        + [
+            ("purchase_times", pa.list_(pa.float64())),
+            ("purchase_organelles", pa.list_(pa.int64())),
+            ("purchase_counts", pa.list_(pa.int64())),
+            ("wall_seconds", pa.float64()),
+        ]
+    )
+
+
+def grid(args) -> Iterator[SweepRun]:
+    """Every combination of the scales and strategies given on the command line."""
+    combos = itertools.product(args.strategy, args.base_cost_scale, args.cost_exponent_scale, args.production_scale)
+    for run_id, (strategy, base_cost_scale, cost_exponent_scale, production_scale) in enumerate(combos):
+        yield SweepRun(
+            run_id=run_id,
+            strategy=strategy,
+            base_cost_scale=base_cost_scale,
+            cost_exponent_scale=cost_exponent_scale,
+            production_scale=production_scale,
+            ticks=args.ticks,
+            dt=args.dt,
+            targets=args.target_atp,
+            packs=PACKS,
+        )
+
+
+def describe(row: dict, targets: list[float]) -> str:
+    """One line summarizing a finished run."""
+    reached = ", ".join(f"{t:g} ATP at {row[f'time_to_{t:g}_atp']:.0f}s" for t in targets)
+    return (
+        f"run {row['run_id']} {row['strategy']} base_cost x{row['base_cost_scale']:g}"
+        f" cost_exponent x{row['cost_exponent_scale']:g} production x{row['production_scale']:g}:"
+        f" {reached}; {len(row['purchase_times'])} purchases in {row['wall_seconds']:.2f}s"
+    )
+
+
+def run(args):
+    """Entry point for `game sweep`."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        sys.exit("game sweep writes Parquet and needs pyarrow: pip install 'cell-incremental[sweep]'")
+
+    runs = list(grid(args))
+    print(f"Sweeping {len(runs)} runs over {args.workers or os.cpu_count()} processes.", file=sys.stderr)
+    start = time.perf_counter()
+    schema = row_schema(args.target_atp, PACKS)
+    writer = pq.ParquetWriter(args.output, schema)
+    batch = []
+
+    def flush():
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            batch.clear()
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(run_one, r) for r in runs]
+            for future in as_completed(futures):
+                row = future.result()
+                print(describe(row, args.target_atp))
+                batch.append(row)
+                if len(batch) >= args.batch:
+                    flush()
+        flush()
+    finally:
+        writer.close()
+    print(f"Wrote {len(runs)} runs to {args.output} in {time.perf_counter() - start:.1f}s.", file=sys.stderr)
@@ -0,0 +1,119 @@
+import numpy as np
+
+# A handle packs a slot into its low bits and that slot's generation above them
+SLOT_BITS = 32
+SLOT_MASK = (1 << SLOT_BITS) - 1
+
+
+class SlotAllocator:
+    """Hands out stable integer handles for entities kept in dense arrays.
+
+    Every live entity owns a row in [0, len), which is where its data lives in
+    the caller's arrays, and a slot, which never moves while it lives. A
+    handle is the slot and its generation; freeing a slot bumps its
+    generation, so handles to dead entities are recognized as stale even
+    after the slot is reused. Freed slots are reused last in, first out, and
+    freeing swaps the last row into the freed one, so rows stay dense and
+    both allocating and freeing are O(1).
+    """
+
+    def __init__(self):
+        self._count = 0
+        self._handles = np.zeros(0, dtype=np.int64)  # By row
+        self._rows = np.zeros(0, dtype=np.int64)  # By slot
+        self._generations = np.zeros(0, dtype=np.int64)  # By slot
+        self._free: list[int] = []
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, handle) -> bool:
+        slot = int(handle) & SLOT_MASK
+        return slot < len(self._generations) and self._handle(slot) == handle and self._rows[slot] >= 0
+
+    @property
+    def handles(self) -> np.ndarray:
+        """Handles of the live entities, in row order."""
+        return self._handles[: self._count]
+
+    def _handle(self, slot: int) -> int:
+        return int(self._generations[slot]) << SLOT_BITS | slot
+
+    def _reserve(self, rows: int, slots: int):
+        if rows > len(self._handles):
+            grown = np.zeros(max(rows, 2 * len(self._handles), 16), dtype=np.int64)
+            grown[: self._count] = self.handles
+            self._handles = grown
+        if slots > len(self._rows):
+            size = max(slots, 2 * len(self._rows), 16)
+            self._rows = np.concatenate((self._rows, np.full(size - len(self._rows), -1, dtype=np.int64)))
+            self._generations = np.concatenate(
+                (self._generations, np.zeros(size - len(self._generations), dtype=np.int64))
+            )
+
+    def allocate(self) -> tuple[int, int]:
+        """Claim a slot. Returns its handle and row, which is always len - 1."""
+        row = self._count
+        if self._free:
+            slot = self._free.pop()
+            self._reserve(row + 1, 0)
+        else:
+            slot = self._slots_used()
+            self._reserve(row + 1, slot + 1)
+        handle = self._handle(slot)
+        self._rows[slot] = row
+        self._handles[row] = handle
+        self._count += 1
+        return handle, row
+
+    def allocate_many(self, n: int) -> np.ndarray:
+        """Claim n slots, taking rows len to len + n - 1. Returns their handles."""
+        start = self._count
+        first_new = self._slots_used()
+        reused = [self._free.pop() for _ in range(min(n, len(self._free)))]
+        slots = np.concatenate((np.array(reused, dtype=np.int64), np.arange(first_new, first_new + n - len(reused))))
+        self._reserve(start + n, first_new + n - len(reused))
+        handles = self._generations[slots] << SLOT_BITS | slots
+        self._rows[slots] = np.arange(start, start + n)
+        self._handles[start : start + n] = handles
+        self._count += n
+        return handles
+
+    def _slots_used(self) -> int:
+        """Slots ever handed out; the next new slot is this one."""
+        return self._count + len(self._free)
+
+    def row(self, handle: int) -> int:
+        """The row of a live handle. KeyError if it is stale or unknown."""
+        if handle not in self:
+            raise KeyError(handle)
+        return int(self._rows[int(handle) & SLOT_MASK])
+
+    def rows(self, handles) -> np.ndarray:
+        """The rows of many live handles at once."""
+        handles = np.asarray(handles, dtype=np.int64)
+        slots = handles & SLOT_MASK
+        if len(handles) and (
+            slots.max() >= len(self._rows)
+            or np.any(self._generations[slots] != handles >> SLOT_BITS)
+            or np.any(self._rows[slots] < 0)
+        ):
+            msg = "stale or unknown handle"
+            raise KeyError(msg)
+        return self._rows[slots]
+
+    def free(self, handle: int) -> tuple[int, int]:
+        """Release a live handle. The last row is moved into the freed one,
+        and the caller must do the same with its own arrays. Returns
+        (freed row, last row); they are equal if the last row was freed."""
+        row = self.row(handle)
+        slot = int(handle) & SLOT_MASK
+        last = self._count - 1
+        moved = int(self._handles[last])
+        self._handles[row] = moved
+        self._rows[moved & SLOT_MASK] = row
+        self._rows[slot] = -1
+        self._generations[slot] += 1
+        self._free.append(slot)
+        self._count -= 1
+        return row, last
@@ -0,0 +1,195 @@
+from typing import Callable, Optional
+
+import numpy as np
+
+
+class SpatialHash:
+    """A uniform grid over the Dish. Every entry lives in the bucket of the
+    cell_size x cell_size cell containing it, so proximity queries only look
+    at the few buckets around the query instead of every entry.
+
+    Entries are integer keys (food or organism ids), and only their buckets
+    are kept here: positions stay in the owner's arrays, read through
+    positions. Moves work out every entry's cell with arrays, and only touch
+    the buckets of entries whose cell changed.
+
+    :param positions: Maps an array of keys to the (n, 2) array of their
+        current (y, x) positions.
+    """
+
+    def __init__(self, positions: Callable[[np.ndarray], np.ndarray], cell_size: int = 16):
+        self.cell_size = cell_size
+        self._positions = positions
+        self._buckets: dict[tuple[int, int], set[int]] = {}
+        self._count = 0
+        # (cy0, cx0, cy1, cx1), a box of cells holding every occupied one. Grows
+        # as entries are added and moved, and is only reset once empty.
+        self._extent: Optional[tuple[int, int, int, int]] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _cell(self, y: int, x: int) -> tuple[int, int]:
+        return y // self.cell_size, x // self.cell_size
+
+    def _extend(self, cy0: int, cx0: int, cy1: int, cx1: int):
+        if self._extent is None:
+            self._extent = (cy0, cx0, cy1, cx1)
+        else:
+            ey0, ex0, ey1, ex1 = self._extent
+            self._extent = (min(ey0, cy0), min(ex0, cx0), max(ey1, cy1), max(ex1, cx1))
+
+    def insert(self, key: int, y: int, x: int):
+        """Add an entry at (y, x)."""
+        cell = self._cell(y, x)
+        self._buckets.setdefault(cell, set()).add(key)
+        self._count += 1
+        self._extend(*cell, *cell)
+
+    def insert_many(self, keys: np.ndarray, positions: np.ndarray):
+        """Add many entries at once."""
+        if not len(keys):
+            return
+        cells = np.asarray(positions) // self.cell_size
+        buckets = self._buckets
+        for key, cy, cx in zip(keys.tolist(), cells[:, 0].tolist(), cells[:, 1].tolist()):
+            buckets.setdefault((cy, cx), set()).add(key)
+        self._count += len(keys)
+        self._extend(*cells.min(axis=0).tolist(), *cells.max(axis=0).tolist())
+
+    def remove(self, key: int, y: int, x: int):
+        """Remove an entry, given the position it was last stored at."""
+        cell = self._cell(y, x)
+        bucket = self._buckets[cell]
+        bucket.remove(key)
+        if not bucket:
+            del self._buckets[cell]
+        self._count -= 1
+        if not self._count:
+            self._extent = None
+
+    def move_many(self, keys: np.ndarray, old_positions: np.ndarray, new_positions: np.ndarray):
+        """Update many entries at once, from their old positions to their new
+        ones. Only entries that crossed into a new cell are touched."""
+        moved = np.flatnonzero(
+            (old_positions[:, 0] != new_positions[:, 0]) | (old_positions[:, 1] != new_positions[:, 1])
+        )
+        old_cells = old_positions[moved] // self.cell_size
+        new_cells = new_positions[moved] // self.cell_size
+        crossed = np.flatnonzero((old_cells[:, 0] != new_cells[:, 0]) | (old_cells[:, 1] != new_cells[:, 1]))
+        if not len(crossed):
+            return
+        old_cells, new_cells, crossed = old_cells[crossed], new_cells[crossed], moved[crossed]
+        buckets = self._buckets
+        for key, oy, ox, ny, nx in zip(
+            keys[crossed].tolist(),
+            old_cells[:, 0].tolist(),
+            old_cells[:, 1].tolist(),
+            new_cells[:, 0].tolist(),
+            new_cells[:, 1].tolist(),
+        ):
+            bucket = buckets[oy, ox]
+            if len(bucket) == 1:
+                del buckets[oy, ox]
+            else:
+                bucket.remove(key)
+            bucket = buckets.get((ny, nx))
+            if bucket is None:
+                buckets[ny, nx] = {key}
+            else:
+                bucket.add(key)
+        self._extend(*new_cells.min(axis=0).tolist(), *new_cells.max(axis=0).tolist())
+
+    def _keys_in_cells(self, cy0: int, cx0: int, cy1: int, cx1: int) -> list[int]:
+        """Every key in the cells from (cy0, cx0) to (cy1, cx1), inclusive."""
+        if self._extent is None:
+            return []
+        ey0, ex0, ey1, ex1 = self._extent
+        cy0, cx0, cy1, cx1 = max(cy0, ey0), max(cx0, ex0), min(cy1, ey1), min(cx1, ex1)
+        keys: list[int] = []
+        if cy0 > cy1 or cx0 > cx1:
+            return keys
+        if (cy1 - cy0 + 1) * (cx1 - cx0 + 1) > len(self._buckets):
+            # Sparse grid: cheaper to walk the occupied buckets
+            for (cy, cx), bucket in self._buckets.items():
+                if cy0 <= cy <= cy1 and cx0 <= cx <= cx1:
+                    keys.extend(bucket)
+            return keys
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                bucket = self._buckets.get((cy, cx))
+                if bucket:
+                    keys.extend(bucket)
+        return keys
+
+    def _with_positions(self, keys: list[int]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """keys as an array, with the arrays of their y and x positions."""
+        keys = np.array(keys, dtype=np.int64)
+        if not len(keys):
+            empty = np.zeros(0, dtype=np.int64)
+            return keys, empty, empty
+        positions = self._positions(keys)
+        return keys, positions[:, 0], positions[:, 1]
+
+    def query_rect(self, y0: int, x0: int, y1: int, x1: int) -> np.ndarray:
+        """Every key positioned inside the rectangle from (y0, x0) to (y1, x1), inclusive."""
+        keys, ys, xs = self._with_positions(self._keys_in_cells(*self._cell(y0, x0), *self._cell(y1, x1)))
+        return keys[(ys >= y0) & (ys <= y1) & (xs >= x0) & (xs <= x1)]
+
+    def query_radius(self, y: int, x: int, radius: float) -> np.ndarray:
+        """Every key within radius (euclidean) of (y, x)."""
+        reach = int(radius)
+        keys, ys, xs = self._with_positions(
+            self._keys_in_cells(*self._cell(y - reach, x - reach), *self._cell(y + reach, x + reach))
+        )
+        return keys[(ys - y) ** 2 + (xs - x) ** 2 <= radius * radius]
+
+    def nearest(self, y: int, x: int, max_radius: Optional[float] = None) -> Optional[int]:
+        """The key closest to (y, x), or None if there is none (within
+        max_radius, if given). Searches outward ring by ring of cells, up to
+        the extent of the occupied ones. Once a ring has more cells than are
+        occupied, the occupied buckets left beyond it are checked directly
+        instead."""
+        if self._extent is None:
+            return None
+        cy, cx = self._cell(y, x)
+        ey0, ex0, ey1, ex1 = self._extent
+        max_ring = max(cy - ey0, ey1 - cy, cx - ex0, ex1 - cx, 0)
+        best, best_d2 = None, float("inf") if max_radius is None else max_radius * max_radius
+        ring = 0
+        while True:
+            if 8 * ring > len(self._buckets):
+                keys = [
+                    key
+                    for (by, bx), bucket in self._buckets.items()
+                    if max(abs(by - cy), abs(bx - cx)) >= ring
+                    for key in bucket
+                ]
+                max_ring = ring
+            else:
+                keys = self._ring(cy, cx, ring)
+            if keys:
+                keys, ys, xs = self._with_positions(keys)
+                d2 = (ys - y) ** 2 + (xs - x) ** 2
+                closest = int(np.argmin(d2))
+                if d2[closest] <= best_d2:
+                    best, best_d2 = int(keys[closest]), d2[closest]
+            # Anything in the next ring is at least this far away
+            ring_distance = ring * self.cell_size
+            if ring_distance * ring_distance >= best_d2 or ring >= max_ring:
+                return best
+            ring += 1
+
+    def _ring(self, cy: int, cx: int, ring: int) -> list[int]:
+        """Every key in the square ring of cells at the given distance."""
+        buckets = self._buckets
+        if ring == 0:
+            return list(buckets.get((cy, cx), ()))
+        keys: list[int] = []
+        for dx in range(-ring, ring + 1):
+            keys.extend(buckets.get((cy - ring, cx + dx), ()))
+            keys.extend(buckets.get((cy + ring, cx + dx), ()))
+        for dy in range(-ring + 1, ring):
+            keys.extend(buckets.get((cy + dy, cx - ring), ()))
+            keys.extend(buckets.get((cy + dy, cx + ring), ()))
+        return keys
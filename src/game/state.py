@@ -0,0 +1,217 @@
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+from game.bignum import BigArray
+from game.config import UPDATE_PERIOD
+from game.content import default_content
+from game.dish import Dish, Food
+from game.economy import Economy
+from game.nutrients import NutrientField
+from game.organelle import Organelle
+from game.resource import Resource, ResourceView
+
+if TYPE_CHECKING:
+    from game.recording import Recorder
+
+
+class State:
+    """Tracks the mutable state of the World. Strictly graphical things,
+    non-persistant things (like displayed tab) should instead go on the
+    World.
+
+    Resource amounts and rates live in flat arrays, in economy.tickers order,
+    and resources maps each ticker onto a ResourceView of them. Amounts are a
+    BigArray, so they and organelle costs never overflow. Pydantic
+    models are only used for the organelle and resource definitions.
+
+    Every resource and organelle has a version counter, bumped whenever its
+    amount, rate, count or cost changes, so that widgets can redraw only what
+    changed since they last looked.
+
+    All game randomness is drawn from rng, which the Dish shares. Given the
+    same seed and the same inputs, a State plays out exactly the same; if a
+    recorder is attached, every tick and input is logged to it so that the
+    game can be replayed later (see game.recording).
+    """
+
+    def __init__(
+        self,
+        cytosol: float = 0,
+        organelles: Optional[dict[int, Organelle]] = None,
+        resources: Optional[dict[str, Resource]] = None,
+        dish: Optional[Dish] = None,
+        seed: Optional[int] = None,
+    ):
+        self.cytosol = cytosol
+        self.rng = np.random.default_rng(seed)
+        self.recorder: Optional[Recorder] = None
+        # The default content comes with its Economy already compiled
+        layout = None
+        if organelles is None and resources is None:
+            layout = default_content().layout
+        if organelles is None:
+            organelles = {k: v.model_copy() for k, v in default_content().organelles.items()}
+        if resources is None:
+            resources = default_content().resources
+        self.organelles: dict[int, Organelle] = organelles
+        self._dish = dish
+        if dish is not None:
+            dish.rng = self.rng
+        self._economy = Economy(organelles, resources, layout)
+        self._counts = self._economy.counts(organelles)
+        self._amounts = self._economy.amounts(resources)
+        self._rates = np.zeros(len(self._amounts))
+        self._resource_versions = np.zeros(len(self._amounts), dtype=np.int64)
+        self._organelle_versions = np.zeros(len(self._counts), dtype=np.int64)
+        self.resources: dict[str, ResourceView] = {
+            ticker: ResourceView(resources[ticker], self._amounts, self._rates, col)
+            for col, ticker in enumerate(self._economy.tickers)
+        }
+
+    def sync_counts(self):
+        """Rebuild the organelle count vector after counts were set directly
+        on the Organelle models, e.g. when loading a save."""
+        self._counts = self._economy.counts(self.organelles)
+        self._organelle_versions += 1
+
+    @property
+    def dish(self) -> Dish:
+        """The Dish. The default one is only built the first time it's
+        needed, so that headless runs never pay for it."""
+        if self._dish is None:
+            food = [Food(y, x, 0.1) for x in range(0, 50, 3) for y in range(0, 10, 2)]
+            self._dish = Dish(food=food, rng=self.rng)
+            self._dish.nutrients = NutrientField(self._dish.bounds, rng=self.rng)
+        return self._dish
+
+    def reseed(self, seed: int):
+        """Restart rng from a seed. Done in place, so the Dish keeps sharing it."""
+        self.rng.bit_generator.state = np.random.default_rng(seed).bit_generator.state
+
+    @property
+    def economy(self) -> Economy:
+        """The compiled form of our organelles and resources."""
+        return self._economy
+
+    @property
+    def amounts(self) -> BigArray:
+        """Resource amounts, in economy.tickers order."""
+        return self._amounts
+
+    @property
+    def rates(self) -> np.ndarray:
+        """Resource rates per second, in economy.tickers order."""
+        return self._rates
+
+    @property
+    def organelle_counts(self):
+        """Organelle counts as a vector, in economy.organelle_ids order."""
+        return self._counts
+
+    def resource_version(self, ticker_name) -> int:
+        """A counter that changes whenever the resource's amount or rate does."""
+        return int(self._resource_versions[self._economy.resource_index[ticker_name.upper()]])
+
+    def organelle_version(self, organelle_id) -> int:
+        """A counter that changes whenever the organelle's count or costs do."""
+        return int(self._organelle_versions[self._economy.organelle_index[organelle_id]])
+
+    def _touch_resource(self, ticker_name):
+        self._resource_versions[self._economy.resource_index[ticker_name.upper()]] += 1
+
+    def _touch_organelle(self, organelle_id):
+        self._organelle_versions[self._economy.organelle_index[organelle_id]] += 1
+
+    def step(self, dt: float = UPDATE_PERIOD):
+        """Advance the game logic by dt seconds. This is the whole tick: it
+        does no sleeping and no I/O, so it may be driven by the World's event
+        loop or as fast as the CPU allows by a headless runner."""
+        if self.recorder is not None:
+            self.recorder.tick(dt)
+        amounts, rates = self._economy.tick(self._amounts, self._counts, dt)
+        self._resource_versions += (amounts != self._amounts) | (rates != self._rates)
+        self._amounts[:], self._rates[:] = amounts, rates
+        # Until it is first looked at, the default Dish doesn't need stepping
+        if self._dish is not None:
+            self._dish.step(dt)
+
+    def catch_up(self, elapsed: float, dt: float = UPDATE_PERIOD):
+        """Advance the game logic by an arbitrary number of seconds, e.g. the
+        time a save has been sitting on disk, without replaying every tick."""
+        if self.recorder is not None:
+            self.recorder.catch_up(elapsed)
+        self._amounts[:], self._rates[:] = self._economy.advance(self._amounts, self._counts, elapsed, dt)
+        self._resource_versions += 1
+
+    # Helper functions to do common tasks
+    def ticker(self, ticker_name):
+        """Get a Resource by its ticker name."""
+        return self.resources[ticker_name.upper()]
+
+    def withdraw(self, ticker_name, amount):
+        """Attempt to withdraw (remove) a certain resource by its ticker name.
+        True if success. If there is less of the resource than the amount given,
+        no resource is removed and False is returned."""
+        resource = self.ticker(ticker_name)
+        if amount > resource.amount:
+            return False
+        else:
+            resource.amount -= amount
+            resource.rate -= amount / UPDATE_PERIOD
+            self._touch_resource(ticker_name)
+            return True
+
+    def deposit(self, ticker_name, amount):
+        """Attempt to deposit (add) to a certain resource by its ticker name."""
+        resource = self.ticker(ticker_name)
+        resource.amount += amount
+        resource.rate += amount / UPDATE_PERIOD
+        self._touch_resource(ticker_name)
+        return True
+
+    def buy(self, organelle_id, n: int = 1) -> bool:
+        """Attempt to buy n organelles at once. True if success. Either all n
+        are bought or none are."""
+        if self.recorder is not None:
+            self.recorder.buy(organelle_id, n)
+        organelle = self.organelles[organelle_id]
+        if n <= 0:
+            return False
+        costs = organelle.cost_of(organelle.count, n)
+        # 2 steps: we must check that we have all the resources to buy
+        # the organelles, then we must separately iterate and make the purchase
+        for ticker_name, cost in costs.items():
+            if self.ticker(ticker_name).amount <= cost:
+                return False
+        for ticker_name, cost in costs.items():
+            self.ticker(ticker_name).amount -= cost
+            self._touch_resource(ticker_name)
+        organelle.count += n
+        self._counts[self._economy.organelle_index[organelle_id]] = organelle.count
+        self._touch_organelle(organelle_id)
+        return True
+
+    def sell(self, organelle_id, n: int = 1) -> bool:
+        """Attempt to sell n organelles at once. True if success. Refunds the
+        same as selling them one at a time."""
+        if self.recorder is not None:
+            self.recorder.sell(organelle_id, n)
+        organelle = self.organelles[organelle_id]
+        if 0 < n <= organelle.count:
+            # Selling one refunds the cost at the current count, before it drops
+            for ticker_name, cost in organelle.cost_of(organelle.count - n + 1, n).items():
+                self.ticker(ticker_name).amount += cost
+                self._touch_resource(ticker_name)
+            organelle.count -= n
+            self._counts[self._economy.organelle_index[organelle_id]] = organelle.count
+            self._touch_organelle(organelle_id)
+            return True
+        else:
+            return False
+
+    def max_affordable(self, organelle_id) -> int:
+        """How many of an organelle can be bought right now, in one go."""
+        organelle = self.organelles[organelle_id]
+        amounts = {ticker_name: self.ticker(ticker_name).amount for ticker_name in organelle.base_cost}
+        return organelle.max_affordable(amounts)
@@ -1,10 +1,10 @@
-import asyncio
 import logging
-from random import choice, randint, random, randrange
 from textwrap import dedent, fill, wrap
+from typing import TYPE_CHECKING, Callable, Optional, Union
 
 import numpy as np
 from nurses_2.colors import BLACK, RED, WHITE, ColorPair
+from nurses_2.colors.color_data_structures import Color
 from nurses_2.io.input.events import MouseEventType
 from nurses_2.widgets.button import Button
 from nurses_2.widgets.grid_layout import GridLayout, Orientation
@@ -14,38 +14,59 @@ from nurses_2.widgets.widget import Widget
 from nurses_2.widgets.widget_data_structures import Anchor, Char, style_char
 
 from game.config import *
+from game.controls import DishControls
 from game.dish import Dish, Organism, Point
-from game.organelle import ORGANELLES, Organelle
+from game.organelle import Organelle
+from game.perf import PERF
+from game.scheduler import Scheduler
+
+if TYPE_CHECKING:
+    from game.worker import DishSnapshot, RemoteControls
 
 
 class ResourceWidget(TextWidget):
-    """This widget shows the user what resources they have available."""
+    """This widget shows the user what resources they have available. Lines
+    are only re-formatted for resources whose version changed."""
 
     def __init__(self, world: "World", **kwargs):
         super().__init__(**kwargs)
         self.world = world
-        self.update_loop = asyncio.create_task(self.update())
+        self._lines: dict[str, tuple[int, str]] = {}
+        self._text = None
+        self.subscription = world.scheduler.subscribe("resource_widget", self.update, RERENDER_PERIOD)
 
     def on_remove(self):
-        """Stop the render loop."""
-        self.update_loop.cancel()
+        """Stop refreshing."""
+        self.world.scheduler.unsubscribe(self.subscription)
 
-    async def update(self) -> None:
-        while True:
-            resource_text = []
-            for ticker, res in self.world.st.resources.items():
-                resource_text.append(f"{res.name} ({ticker}): {res.amount:.2f} @ {res.rate:.2f}/s")
-            self.set_text("\n".join(resource_text))
-            await asyncio.sleep(RERENDER_PERIOD)
+    def update(self) -> None:
+        st = self.world.view
+        resource_text = []
+        for ticker, res in st.resources.items():
+            version = st.resource_version(ticker)
+            cached = self._lines.get(ticker)
+            if cached is None or cached[0] != version:
+                cached = self._lines[ticker] = (version, f"{res.name} ({ticker}): {res.amount:.2f} @ {res.rate:.2f}/s")
+            resource_text.append(cached[1])
+        text = "\n".join(resource_text)
+        if text != self._text:
+            self._text = text
+            self.set_text(text)
 
 
 class OrganelleBuySellWidget(Widget):
+    """One row of the organelle list. The title and wrapped description are
+    only redrawn when the row is resized, and the stats only when the
+    organelle's version changes."""
+
     horiz_button_size_hint = 0.1
 
     def __init__(self, world: "World", organelle: Organelle, **kwargs):
         super().__init__(**kwargs)
         self.world = world
         self.organelle = organelle
+        self._drawn_width = None
+        self._drawn_version = None
         self.height = 5
         self.background_color_pair = ColorPair.from_colors(WHITE, RED)
         self.title_widget = TextWidget(pos=(0, 0), size_hint=(None, 1 - self.horiz_button_size_hint))
@@ -59,44 +80,88 @@ class OrganelleBuySellWidget(Widget):
             label="Buy",
             anchor=Anchor.TOP_RIGHT,
             size=(10, 10),
-            size_hint=(0.51, self.horiz_button_size_hint),
+            size_hint=(0.34, self.horiz_button_size_hint),
             pos_hint=(0, 1),
-            callback=lambda: self.world.st.buy(organelle.idx),
+            callback=lambda: self.world.buy(organelle.idx),
+        )
+        self.buy_max_button = Button(
+            label="Max",
+            anchor=Anchor.TOP_RIGHT,
+            size_hint=(0.34, self.horiz_button_size_hint),
+            pos_hint=(0.34, 1),
+            callback=lambda: self.world.buy_max(organelle.idx),
         )
         self.sell_button = Button(
             label="Sell",
             anchor=Anchor.BOTTOM_RIGHT,
-            size_hint=(0.5, self.horiz_button_size_hint),
+            size_hint=(0.33, self.horiz_button_size_hint),
             pos_hint=(1, 1),
-            callback=lambda: self.world.st.sell(organelle.idx),
+            callback=lambda: self.world.sell(organelle.idx),
         )
         self.add_widgets(
-            self.title_widget, self.description_widget, self.stat_widget, self.buy_button, self.sell_button
+            self.title_widget,
+            self.description_widget,
+            self.stat_widget,
+            self.buy_button,
+            self.buy_max_button,
+            self.sell_button,
         )
-        self.update_loop = asyncio.create_task(self.update())
+
+    def on_add(self):
+        """Start refreshing."""
+        self.subscription = self.world.scheduler.subscribe("organelle_widget", self.update, RERENDER_PERIOD)
 
     def on_remove(self):
-        """Stop the render loop."""
-        self.update_loop.cancel()
+        """Stop refreshing."""
+        self.world.scheduler.unsubscribe(self.subscription)
 
-    async def update(self):
-        while True:
+    def update(self):
+        view = self.world.view
+        # Under a worker, every snapshot holds its own copy of the organelle
+        self.organelle = view.organelles[self.organelle.idx]
+        self.description_widget.apply_hints()
+        width = self.description_widget.size[1]
+        if width != self._drawn_width:
+            self._drawn_width = width
+            self._drawn_version = None
             self.title_widget.set_text(self.organelle.name, underline=True)
-            self.description_widget.apply_hints()
-            self.description_widget.set_text(
-                fill(self.organelle.description, self.description_widget.size[1]), italic=True
-            )
+            self.description_widget.set_text(fill(self.organelle.description, width), italic=True)
+            self.title_widget.normalize_canvas()
+            self.description_widget.normalize_canvas()
+        version = view.organelle_version(self.organelle.idx)
+        if version != self._drawn_version:
+            self._drawn_version = version
+            costs = ", ".join(f"{cost:.2f} {ticker_name}" for ticker_name, cost in self.organelle.costs.items())
             stats_text = dedent(
                 f"""
-                Cost: {self.organelle.costs}
+                Cost: {costs}
                 Owned: {self.organelle.count}
             """
             ).strip()
             self.stat_widget.set_text(stats_text)
-            self.title_widget.normalize_canvas()
-            self.description_widget.normalize_canvas()
             self.stat_widget.normalize_canvas()
-            await asyncio.sleep(RERENDER_PERIOD)
+
+
+class PerfWidget(TextWidget):
+    """Shows what the game loops are spending their time on, including a
+    SimulationWorker's, as of its latest snapshot. Only redraws while
+    visible."""
+
+    def __init__(self, world: "World", **kwargs):
+        super().__init__(**kwargs)
+        self.world = world
+        self.subscription = world.scheduler.subscribe("perf_widget", self.update, RERENDER_PERIOD)
+
+    def on_remove(self):
+        """Stop refreshing."""
+        self.world.scheduler.unsubscribe(self.subscription)
+
+    def update(self) -> None:
+        if self.is_visible:
+            report = PERF.report()
+            if self.world.worker is not None:
+                report = f"{report}\nsimulation:\n{self.world.view.perf_report}"
+            self.set_text(report)
 
 
 class OrganelleListWidget(GridLayout):
@@ -104,8 +169,8 @@ class OrganelleListWidget(GridLayout):
         super().__init__(**kwargs)
         self.world = world
         self.vertical_spacing = 1
-        self.grid_rows = len(world.st.organelles)
-        for organelle in world.st.organelles.values():
+        self.grid_rows = len(world.view.organelles)
+        for organelle in world.view.organelles.values():
             self.add_widget(OrganelleBuySellWidget(world, organelle, size_hint=(None, 1)))
 
 
@@ -146,70 +211,218 @@ class MainViewTabWidget(GridLayout):
         self.make_tab_label("Petri Dish", "w", lambda: self.world.switch_to_tab(1))
         self.make_tab_label("Edit Organism", "e", lambda: self.world.switch_to_tab(2))
 
+    def on_key(self, key_event: "nurses_2.io.input.events.KeyEvent") -> bool:
+        # ` toggles the performance overlay from any tab
+        if key_event.key == "`" and not (key_event.mods.alt or key_event.mods.ctrl or key_event.mods.shift):
+            self.world.toggle_perf_window()
+            return True
+        return False
+
+
+class DishRenderer:
+    """Assembles the particles for one view of a Dish. Output buffers persist
+    between frames and only ever grow, and only entities inside the visible
+    rectangle are emitted, found through the Dish's spatial indexes. The cost
+    of a frame follows what is on screen rather than the size of the dish.
+    A frame is skipped if neither the view nor the Dish's version changed;
+    otherwise the whole view is rebuilt, as the Dish keeps no record of which
+    entities changed to patch the last frame with.
+
+    Zoomed out, every screen cell covers zoom x zoom dish positions: organisms
+    and food are binned into per-cell counts with one histogram each, and
+    every occupied cell is drawn as a single shade character by how crowded
+    it is. The same is done at full zoom for views holding more entities
+    than cells. Either way a frame never holds more particles than the view
+    has cells, plus nutrient shades.
+
+    If show_nutrients is set, the visible part of the Dish's nutrient field is
+    drawn underneath as shade characters, one per cell of the view.
+
+    dish may also be a DishSnapshot published by a SimulationWorker, which
+    offers the same arrays and queries.
+    """
+
+    food_char = "x"
+    organism_char = "@"
+    # Indexed by concentration as a fraction of capacity, in equal steps
+    nutrient_chars = np.array([" ", "\u2591", "\u2592", "\u2593", "\u2588"])
+    # Indexed by the fraction of a zoomed out cell's positions holding entities, in equal steps
+    density_chars = np.array(["\u2591", "\u2592", "\u2593", "\u2588"])
+
+    def __init__(self, dish: Dish, show_nutrients: bool = False):
+        self.dish = dish
+        self.show_nutrients = show_nutrients
+        self.color_pair = ColorPair.from_colors(WHITE, BLACK)
+        self.food_density_color_pair = ColorPair.from_colors(Color(200, 170, 80), BLACK)
+        self.nutrient_color_pair = ColorPair.from_colors(Color(60, 140, 60), BLACK)
+        self._positions = np.zeros((0, 2), dtype=np.int64)
+        self._chars = np.zeros(0, dtype=Char)
+        self._color_pairs = np.zeros((0, 6), dtype=np.uint8)
+        self._last_view = None
+
+    def _reserve(self, n: int):
+        """Make sure the output buffers hold at least n particles."""
+        if n <= len(self._chars):
+            return
+        capacity = max(n, 2 * len(self._chars), 64)
+        self._positions = np.zeros((capacity, 2), dtype=np.int64)
+        self._chars = np.zeros(capacity, dtype=Char)
+        self._color_pairs = np.full((capacity, 6), self.color_pair, dtype=np.uint8)
+
+    def render(self, origin_y: int, origin_x: int, height: int, width: int, zoom: int = 1):
+        """Particles for the height x width view whose top left corner is at
+        (origin_y, origin_x) in the dish, as (positions, chars, color_pairs)
+        relative to that corner. None if nothing changed since the last call.
+        :param zoom: Dish positions per screen cell along each axis.
+        """
+        field = self.dish.nutrients if self.show_nutrients else None
+        version = None if field is None else field.version
+        view = (self.dish.version, version, origin_y, origin_x, height, width, zoom)
+        if view == self._last_view:
+            return None
+        self._last_view = view
+        if zoom == 1:
+            y1, x1 = origin_y + height - 1, origin_x + width - 1
+            food_rows = self.dish.food_rows_in(origin_y, origin_x, y1, x1)
+            organism_rows = self.dish.organism_rows_in(origin_y, origin_x, y1, x1)
+            if len(food_rows) + len(organism_rows) <= height * width:
+                return self._entities(field, food_rows, organism_rows, origin_y, origin_x, height, width)
+        return self._density(field, origin_y, origin_x, height, width, zoom)
+
+    def _entities(self, field, food_rows, organism_rows, origin_y: int, origin_x: int, height: int, width: int):
+        """One particle per entity, over the nutrient shades."""
+        shade_pos, shades = self._nutrient_layer(field, origin_y, origin_x, height, width)
+        # Nutrients first, so that entities are drawn over them
+        n_shade = len(shades)
+        n_food = n_shade + len(food_rows)
+        n = n_food + len(organism_rows)
+        self._reserve(n)
+        self._positions[:n_shade] = shade_pos
+        self._positions[n_shade:n_food] = self.dish.food_positions[food_rows] - (origin_y, origin_x)
+        self._positions[n_food:n] = self.dish.organism_positions[organism_rows] - (origin_y, origin_x)
+        self._chars["char"][:n_shade] = shades
+        self._chars["char"][n_shade:n_food] = self.food_char
+        self._chars["char"][n_food:n] = self.organism_char
+        self._color_pairs[:n_shade] = self.nutrient_color_pair
+        self._color_pairs[n_shade:n] = self.color_pair
+        return self._positions[:n], self._chars[:n], self._color_pairs[:n]
+
+    @staticmethod
+    def _histogram(positions: np.ndarray, origin_y: int, origin_x: int, height: int, width: int, zoom: int):
+        """How many of positions fall in each screen cell, flattened row by row."""
+        ys = (positions[:, 0] - origin_y) // zoom
+        xs = (positions[:, 1] - origin_x) // zoom
+        inside = (ys >= 0) & (ys < height) & (xs >= 0) & (xs < width)
+        return np.bincount(ys[inside] * width + xs[inside], minlength=height * width)
+
+    def _density(self, field, origin_y: int, origin_x: int, height: int, width: int, zoom: int):
+        """One particle per occupied screen cell, shaded by how many entities
+        it holds, and nutrient shades in the rest. Cells holding organisms are
+        drawn in the organism color, the rest in the food color."""
+        organisms = self._histogram(self.dish.organism_positions, origin_y, origin_x, height, width, zoom)
+        food = self._histogram(self.dish.food_positions, origin_y, origin_x, height, width, zoom)
+        total = organisms + food
+        occupied = np.flatnonzero(total)
+        top = len(self.density_chars) - 1
+        levels = np.clip(np.ceil(total[occupied] / (zoom * zoom) * (top + 1)).astype(int) - 1, 0, top)
+        shade_pos, shades = self._nutrient_layer(field, origin_y, origin_x, height, width, zoom)
+        free = total[shade_pos[:, 0] * width + shade_pos[:, 1]] == 0
+        shade_pos, shades = shade_pos[free], shades[free]
+        n_shade = len(shades)
+        n = n_shade + len(occupied)
+        self._reserve(n)
+        self._positions[:n_shade] = shade_pos
+        self._positions[n_shade:n, 0], self._positions[n_shade:n, 1] = np.divmod(occupied, width)
+        self._chars["char"][:n_shade] = shades
+        self._chars["char"][n_shade:n] = self.density_chars[levels]
+        self._color_pairs[:n_shade] = self.nutrient_color_pair
+        self._color_pairs[n_shade:n] = np.where(
+            (organisms[occupied] > 0)[:, None], self.color_pair, self.food_density_color_pair
+        )
+        return self._positions[:n], self._chars[:n], self._color_pairs[:n]
+
+    def _nutrient_layer(self, field, origin_y: int, origin_x: int, height: int, width: int, zoom: int = 1):
+        """View-relative positions and shade characters of every screen cell
+        whose nutrient cell isn't empty, sampled at the middle of the cell."""
+        if field is None:
+            return np.zeros((0, 2), dtype=np.int64), self.nutrient_chars[:0]
+        ys = origin_y + np.arange(height) * zoom + zoom // 2
+        xs = origin_x + np.arange(width) * zoom + zoom // 2
+        screen_ys = np.flatnonzero((ys >= 0) & (ys < field.bounds[0]))
+        screen_xs = np.flatnonzero((xs >= 0) & (xs < field.bounds[1]))
+        cells = field.concentration[np.ix_(ys[screen_ys] // field.cell_size, xs[screen_xs] // field.cell_size)]
+        top = len(self.nutrient_chars) - 1
+        levels = np.clip((cells / field.capacity * (top + 1)).astype(int), 0, top)
+        rows, cols = np.nonzero(levels)
+        positions = np.stack((screen_ys[rows], screen_xs[cols]), axis=1)
+        return positions, self.nutrient_chars[levels[rows, cols]]
+
 
 class DishWidget(TextParticleField):
     """Renders the base visual layer representing the Dish. May be configured
-    with config.DISH_RERENDER_PERIOD."""
+    with config.DISH_RERENDER_PERIOD. The camera and what is shown are
+    kept on controls, which may be shared between widgets, or be the
+    RemoteControls of a SimulationWorker.
+
+    :param snapshots: If given, returns the latest DishSnapshot of a Dish
+        stepped by a SimulationWorker, which is drawn instead of dish, with
+        the camera and nutrients as the worker's controls left them.
+    """
 
-    def __init__(self, dish: Dish, **kwargs):
+    def __init__(
+        self,
+        dish: Optional[Dish],
+        scheduler: Scheduler,
+        show_nutrients: bool = False,
+        controls: Optional[Union[DishControls, "RemoteControls"]] = None,
+        snapshots: Optional[Callable[[], "DishSnapshot"]] = None,
+        **kwargs,
+    ):
         super().__init__(**kwargs)
         self.dish = dish
-        self.follow_organism: Organism | None = None
-        self.follow_organism_camera_offset: Point = Point(4, 9)
+        self.scheduler = scheduler
+        self.snapshots = snapshots
+        self.controls = DishControls(dish) if controls is None else controls
+        if show_nutrients:
+            self.controls.show_nutrients = True
+        self.renderer = DishRenderer(dish, show_nutrients)
+
+    @property
+    def follow_organism(self) -> Optional[Organism]:
+        return self.controls.follow_organism
+
+    @property
+    def follow_organism_camera_offset(self) -> Point:
+        return self.controls.camera_offset
 
     def on_add(self):
-        """Start the render loop."""
-        self.update_loop = asyncio.create_task(self.update())
+        """Start refreshing."""
+        self.subscription = self.scheduler.subscribe("render_dish", self.update, DISH_RERENDER_PERIOD)
 
     def on_remove(self):
-        """Stop the render loop."""
-        self.update_loop.cancel()
+        """Stop refreshing."""
+        self.scheduler.unsubscribe(self.subscription)
 
-    def render_dish(self, origin_y: int, origin_x: int):
+    def render_dish(self, origin_y: int, origin_x: int, zoom: int = 1):
         """Render our dish onto a nurses_2 TextParticleField. Apply a "camera
-        offset" according to the origin_y and origin_x parameters."""
-        # create empty render area
-        particle_positions_stack = []
-        particle_chars_stack = []
-        particle_color_pairs_stack = []
-        # render food
-        if len(self.dish.food) > 0:
-            particle_positions_stack.append(np.array([[f.y, f.x] for f in self.dish.food]) - (origin_y, origin_x))
-            ary = np.zeros(len(self.dish.food), dtype=Char)
-            ary["char"] = "x"
-            particle_chars_stack.append(ary)
-            particle_color_pairs_stack.append(
-                np.full((len(self.dish.food), 6), [list(ColorPair.from_colors(WHITE, BLACK))])
-            )
-        # render organisms
-        if len(self.dish.organisms) > 0:
-            particle_positions_stack.append(
-                np.array([[o.pos.y, o.pos.x] for o in self.dish.organisms.values()]) - (origin_y, origin_x)
-            )
-            ary = np.zeros(len(self.dish.organisms), dtype=Char)
-            ary["char"] = "@"
-            particle_chars_stack.append(ary)
-            particle_color_pairs_stack.append(
-                np.full((len(self.dish.organisms), 6), [list(ColorPair.from_colors(WHITE, BLACK))])
-            )
-        # blit to terminal
-        assert len(particle_positions_stack) == len(particle_chars_stack) and len(particle_chars_stack) == len(
-            particle_color_pairs_stack
-        )
-        if len(particle_positions_stack) > 0:
-            self.particle_positions = np.concatenate(particle_positions_stack)
-            self.particle_chars = np.concatenate(particle_chars_stack)
-            self.particle_color_pairs = np.concatenate(particle_color_pairs_stack)
+        offset" according to the origin_y and origin_x parameters. Only what
+        fits in the widget is drawn, with zoom x zoom dish positions per cell."""
+        height, width = self.size
+        particles = self.renderer.render(origin_y, origin_x, height, width, zoom)
+        if particles is not None:
+            self.particle_positions, self.particle_chars, self.particle_color_pairs = particles
 
-    async def update(self) -> None:
+    def update(self) -> None:
         """Pulls the latest information from the Dish."""
-        while True:
-            if self.follow_organism is None:
-                self.render_dish(0, 0)
-            else:
-                offset_pos = self.follow_organism.pos - self.follow_organism_camera_offset
-                self.render_dish(offset_pos.y, offset_pos.x)
-            await asyncio.sleep(DISH_RERENDER_PERIOD)
+        if self.snapshots is None:
+            self.renderer.show_nutrients = self.controls.show_nutrients
+            origin, zoom = self.controls.camera_origin(), self.controls.zoom
+        else:
+            snap = self.snapshots()
+            self.renderer.dish = snap
+            self.renderer.show_nutrients = snap.show_nutrients
+            origin, zoom = snap.camera_origin, snap.zoom
+        self.render_dish(origin.y, origin.x, zoom)
 
 
 class PlayableDishWidget(DishWidget):
@@ -218,20 +431,7 @@ class PlayableDishWidget(DishWidget):
             if key_event.mods.shift or key_event.mods.ctrl:
                 # Don't capture shift or control modified keys in da dish
                 return False
-            if key_event.mods.alt:
-                if key_event.keyin "hjkl":
-                    cam_keymap = {"h": Point(0,-1), "j": Point(-1,0), "k": Point(1,0), "l": Point(0,1)}
-                    self.follow_organism_camera_offset += cam_keymap[key_event.key]
-            else:
-                if key_event.key in "hjkl":
-                    if self.follow_organism is not None:
-                        self.follow_organism.move({"h": 4, "j": 2, "k": 8, "l": 6}[key_event.key])
-                elif key_event.key == "p":
-                    self.follow_organism = self.dish.add_organism(Organism(pos=Point(0, -5), bounds=Point(2, 2)))
-                elif key_event.key == "f":
-                    self.dish.add_food(randrange(50), randrange(150), random())
-                elif key_event.key == "n":
-                    self.follow_organism_camera_offset.y += 1
+            self.controls.press(key_event.key, key_event.mods.alt)
         except Exception as e:
             logging.critical(e, exc_info=True)
         return False
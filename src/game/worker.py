@@ -0,0 +1,441 @@
+import io
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from game.bignum import BigArray
+from game.config import AUTOSAVE_PERIOD, RERENDER_PERIOD, SAVE_FILE, UPDATE_PERIOD
+from game.controls import DishControls
+from game.dish import Dish, Organism, Point
+from game.organelle import Organelle
+from game.perf import PerfMonitor
+from game.resource import ResourceView
+from game.save import load_state, save_state, snapshot
+from game.scheduler import Scheduler
+from game.state import State
+
+WORKER_MODES = ("thread", "process")
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    """A read-only copy of an array."""
+    array = array.copy()
+    array.flags.writeable = False
+    return array
+
+
+def _unpickle_frozen(snap, state):
+    """Restore a pickled snapshot, making its arrays read-only again, as
+    pickling doesn't keep the flag."""
+    _, slots = state
+    for name, value in slots.items():
+        setattr(snap, name, value)
+        for array in (value.mantissa, value.exponent) if isinstance(value, BigArray) else (value,):
+            if isinstance(array, np.ndarray):
+                array.flags.writeable = False
+
+
+class FieldSnapshot:
+    """A read-only copy of what drawing a NutrientField needs."""
+
+    __slots__ = ("bounds", "cell_size", "capacity", "version", "concentration")
+
+    def __init__(self, field):
+        self.bounds = field.bounds
+        self.cell_size = field.cell_size
+        self.capacity = field.capacity
+        self.version = field.version
+        self.concentration = _frozen(field.concentration)
+
+    __setstate__ = _unpickle_frozen
+
+
+class DishSnapshot:
+    """A read-only copy of a Dish's entity arrays and of where its controls
+    point the camera. Offers the array properties and rectangle queries of a
+    Dish, so a DishRenderer can draw either. Rectangle queries scan the
+    arrays, as a snapshot has no spatial indexes.
+
+    :ivar nutrients: A FieldSnapshot, only taken while the field is shown.
+    :ivar follow_organism: A copy of the organism the camera follows, holding
+        its own position and bounds rather than viewing any Dish.
+    """
+
+    __slots__ = (
+        "bounds",
+        "version",
+        "organism_positions",
+        "organism_bounds",
+        "organism_ids",
+        "food_positions",
+        "food_calories",
+        "food_ids",
+        "nutrients",
+        "camera_origin",
+        "camera_offset",
+        "follow_organism",
+        "show_nutrients",
+        "zoom",
+    )
+
+    def __init__(self, dish: Dish, controls: DishControls):
+        self.bounds = dish.bounds
+        self.version = dish.version
+        self.organism_positions = _frozen(dish.organism_positions)
+        self.organism_bounds = _frozen(dish.organism_bounds)
+        self.organism_ids = _frozen(dish.organism_ids)
+        self.food_positions = _frozen(dish.food_positions)
+        self.food_calories = _frozen(dish.food_calories)
+        self.food_ids = _frozen(dish.food_ids)
+        self.show_nutrients = controls.show_nutrients
+        self.nutrients = FieldSnapshot(dish.nutrients) if controls.show_nutrients and dish.nutrients else None
+        self.camera_origin: Point = controls.camera_origin()
+        self.camera_offset = Point(controls.camera_offset.y, controls.camera_offset.x)
+        followed = controls.follow_organism
+        self.follow_organism = None if followed is None else Organism(followed.pos, followed.bounds, followed.idx)
+        self.zoom = controls.zoom
+
+    __setstate__ = _unpickle_frozen
+
+    @staticmethod
+    def _rows_in(positions: np.ndarray, y0: int, x0: int, y1: int, x1: int) -> np.ndarray:
+        ys, xs = positions[:, 0], positions[:, 1]
+        return np.flatnonzero((ys >= y0) & (ys <= y1) & (xs >= x0) & (xs <= x1))
+
+    def food_rows_in(self, y0: int, x0: int, y1: int, x1: int) -> np.ndarray:
+        """Rows of the food inside the rectangle from (y0, x0) to (y1, x1), inclusive."""
+        return self._rows_in(self.food_positions, y0, x0, y1, x1)
+
+    def organism_rows_in(self, y0: int, x0: int, y1: int, x1: int) -> np.ndarray:
+        """Rows of the organisms positioned inside the rectangle from (y0, x0) to (y1, x1), inclusive."""
+        return self._rows_in(self.organism_positions, y0, x0, y1, x1)
+
+
+class StateSnapshot:
+    """A read-only copy of a State as of one tick, offering the parts of the
+    State API that widgets read: resources, organelles, their versions, and
+    the dish.
+
+    Organelles are copies of the models, made again only when their
+    version changes.
+
+    :ivar perf_report: The worker's PerfMonitor report, as the UI can't read
+        the monitor while the worker writes to it.
+    """
+
+    __slots__ = (
+        "tick",
+        "amounts",
+        "rates",
+        "resources",
+        "organelles",
+        "dish",
+        "perf_report",
+        "_resource_versions",
+        "_organelle_versions",
+    )
+
+    def __init__(
+        self,
+        st: State,
+        controls: DishControls,
+        tick: int = 0,
+        previous: Optional["StateSnapshot"] = None,
+        perf_report: str = "",
+    ):
+        self.tick = tick
+        self.amounts, self.rates = st.amounts.copy(), _frozen(st.rates)
+        self.amounts.mantissa.flags.writeable = self.amounts.exponent.flags.writeable = False
+        self.resources: dict[str, ResourceView] = {
+            ticker: ResourceView(view.definition, self.amounts, self.rates, col)
+            for col, (ticker, view) in enumerate(st.resources.items())
+        }
+        self._resource_versions = {ticker: st.resource_version(ticker) for ticker in st.resources}
+        self._organelle_versions = {organelle_id: st.organelle_version(organelle_id) for organelle_id in st.organelles}
+        self.organelles: dict[int, Organelle] = {}
+        for organelle_id, organelle in st.organelles.items():
+            version = self._organelle_versions[organelle_id]
+            if previous is not None and previous.organelle_version(organelle_id) == version:
+                self.organelles[organelle_id] = previous.organelles[organelle_id]
+            else:
+                self.organelles[organelle_id] = organelle.model_copy()
+        self.dish = DishSnapshot(st.dish, controls)
+        self.perf_report = perf_report
+
+    __setstate__ = _unpickle_frozen
+
+    def resource_version(self, ticker_name) -> int:
+        return self._resource_versions[ticker_name.upper()]
+
+    def organelle_version(self, organelle_id) -> int:
+        return self._organelle_versions[organelle_id]
+
+
+def apply_command(st: State, controls: DishControls, command: tuple):
+    """Carry out a command sent to a SimulationWorker. Everything that can
+    change the simulation goes through DishControls or the State, which
+    record it if the session is being recorded. The camera_offset,
+    show_nutrients and zoom commands only change what is drawn, so they
+    aren't recorded."""
+    kind, *args = command
+    if kind == "buy":
+        st.buy(*args)
+    elif kind == "buy_max":
+        st.buy(args[0], st.max_affordable(args[0]))
+    elif kind == "sell":
+        st.sell(*args)
+    elif kind == "key":
+        controls.press(*args)
+    elif kind == "follow":
+        controls.follow(args[0])
+    elif kind == "camera_offset":
+        controls.camera_offset = Point(*args)
+    elif kind in ("show_nutrients", "zoom"):
+        setattr(controls, kind, args[0])
+    else:
+        logging.warning("Ignoring unknown worker command %r", command)
+
+
+def simulate_until_stopped(
+    st: State,
+    commands,
+    publish,
+    dt: float = UPDATE_PERIOD,
+    save_path: Optional[str] = SAVE_FILE,
+    record: Optional[str] = None,
+    export: Optional[str] = None,
+):
+    """Step a State in real time until a None command arrives, carrying out
+    commands as soon as they arrive and publishing a StateSnapshot after
+    every tick and command. The State is saved every AUTOSAVE_PERIOD and
+    once more when stopping, unless save_path is None.
+    :param commands: A queue.Queue or multiprocessing.Queue of commands.
+    :param publish: Called with every new StateSnapshot.
+    :param record: If given, the session is recorded to this file.
+    :param export: If given, frames of the game are streamed to this file.
+    """
+    recorder = exporter = None
+    if record is not None:
+        from game.recording import Recorder
+
+        recorder = Recorder(record, st, dt)
+    if export is not None:
+        from game.export import FrameExporter
+
+        exporter = FrameExporter(export, st, dt=dt)
+    controls = DishControls(st.dish, recorder)
+    ticks = 0
+
+    def step(dt: float):
+        nonlocal ticks
+        st.step(dt)
+        ticks += 1
+        if exporter is not None:
+            exporter.tick(st)
+
+    # The worker's own, as the UI thread reads PERF
+    perf = PerfMonitor()
+    scheduler = Scheduler(step, dt, catch_up=st.catch_up, perf=perf)
+    snap = StateSnapshot(st, controls, ticks)
+    publish(snap)
+    last = last_save = last_report = time.perf_counter()
+    perf_report = ""
+    try:
+        while True:
+            try:
+                command = commands.get(timeout=scheduler.next_wakeup(time.perf_counter(), last))
+            except queue.Empty:
+                command = ()
+            if command is None:
+                break
+            if command:
+                apply_command(st, controls, command)
+            now = time.perf_counter()
+            published_tick = ticks
+            scheduler.advance(now - last)
+            last = now
+            if now - last_report >= RERENDER_PERIOD:
+                last_report = now
+                perf_report = perf.report()
+            if command or ticks != published_tick:
+                snap = StateSnapshot(st, controls, ticks, snap, perf_report)
+                publish(snap)
+            if save_path is not None and now - last_save >= AUTOSAVE_PERIOD:
+                last_save = now
+                save_state(st, save_path)
+    finally:
+        if recorder is not None:
+            recorder.close()
+        if exporter is not None:
+            exporter.close()
+        if save_path is not None:
+            save_state(st, save_path)
+
+
+def _process_main(save: bytes, packs: list[str], commands, connection, dt, save_path, record, export):
+    """Body of the worker process. The State arrives as a save, and
+    snapshots leave through a pipe."""
+    from game.content import PACKS, add_pack
+
+    for pack in packs[len(PACKS) :]:
+        add_pack(pack)
+    try:
+        simulate_until_stopped(load_state(io.BytesIO(save)), commands, connection.send, dt, save_path, record, export)
+    finally:
+        connection.close()
+
+
+class RemoteControls:
+    """Stands in for DishControls in the UI, with the same interface, for the
+    worker whose State they act on. Everything read comes from the worker's
+    latest snapshot, while key presses and writes are forwarded to it as
+    commands, so they only show in the snapshots that follow."""
+
+    def __init__(self, worker: "SimulationWorker"):
+        self.worker = worker
+
+    @property
+    def _dish(self) -> DishSnapshot:
+        return self.worker.snapshot.dish
+
+    @property
+    def follow_organism(self) -> Optional[Organism]:
+        """A copy of the followed organism, as of the latest snapshot."""
+        return self._dish.follow_organism
+
+    @follow_organism.setter
+    def follow_organism(self, organism: Optional[Organism]):
+        self.worker.submit("follow", None if organism is None else organism.idx)
+
+    @property
+    def camera_offset(self) -> Point:
+        offset = self._dish.camera_offset
+        return Point(offset.y, offset.x)
+
+    @camera_offset.setter
+    def camera_offset(self, offset: Point):
+        self.worker.submit("camera_offset", offset.y, offset.x)
+
+    @property
+    def show_nutrients(self) -> bool:
+        return self._dish.show_nutrients
+
+    @show_nutrients.setter
+    def show_nutrients(self, show: bool):
+        self.worker.submit("show_nutrients", show)
+
+    @property
+    def zoom(self) -> int:
+        return self._dish.zoom
+
+    @zoom.setter
+    def zoom(self, zoom: int):
+        self.worker.submit("zoom", zoom)
+
+    def camera_origin(self) -> Point:
+        return self._dish.camera_origin
+
+    def press(self, key: str, alt: bool = False) -> bool:
+        self.worker.submit("key", key, alt)
+        return True
+
+
+class SimulationWorker:
+    """Steps a State away from the UI's event loop, so that a slow tick never
+    delays input handling or drawing.
+
+    The worker publishes a StateSnapshot after every tick and command. Each
+    one is built in full behind the one currently published, then swapped in
+    with a single reference assignment, so the UI reads snapshot without
+    locks and never sees one half-built. Snapshots are never written after
+    they are published, so a reader may hold on to one as long as it likes.
+    Inputs go the other way as commands on a queue; see apply_command.
+
+    :param mode: "thread" steps the State in a thread of this process, and
+        "process" in a process of its own, sending snapshots back through a
+        pipe. In process mode the State given is only read once, to start
+        the worker's copy from.
+    :param save_path: Where the worker saves, periodically and when stopped.
+    :param record: If given, the session is recorded to this file.
+    :param export: If given, the worker streams frames of the game to this
+        file. See game.export.
+    """
+
+    def __init__(
+        self,
+        st: State,
+        mode: str = "thread",
+        dt: float = UPDATE_PERIOD,
+        save_path: Optional[str] = SAVE_FILE,
+        record: Optional[str] = None,
+        export: Optional[str] = None,
+    ):
+        if mode not in WORKER_MODES:
+            msg = f"Unknown worker mode {mode!r}, expected one of {WORKER_MODES}"
+            raise ValueError(msg)
+        self.mode = mode
+        self.controls = RemoteControls(self)
+        self._snapshot = StateSnapshot(st, DishControls(st.dish))
+        if mode == "thread":
+            self._commands = queue.Queue()
+            self._runner = threading.Thread(
+                target=simulate_until_stopped,
+                args=(st, self._commands, self._publish, dt, save_path, record, export),
+                name="simulation",
+                daemon=True,
+            )
+            self._receiver = None
+            self._sending = None
+        else:
+            from game.content import PACKS
+
+            save = io.BytesIO()
+            np.savez(save, **snapshot(st))
+            self._commands = multiprocessing.Queue()
+            receiving, self._sending = multiprocessing.Pipe(duplex=False)
+            self._runner = multiprocessing.Process(
+                target=_process_main,
+                args=(save.getvalue(), list(PACKS), self._commands, self._sending, dt, save_path, record, export),
+                name="simulation",
+                daemon=True,
+            )
+            self._receiver = threading.Thread(target=self._receive, args=(receiving,), name="snapshots", daemon=True)
+
+    @property
+    def snapshot(self) -> StateSnapshot:
+        """The latest StateSnapshot published."""
+        return self._snapshot
+
+    def _publish(self, snap: StateSnapshot):
+        self._snapshot = snap
+
+    def _receive(self, connection):
+        """Swap in snapshots arriving from the worker process until it exits."""
+        try:
+            while True:
+                self._snapshot = connection.recv()
+        except EOFError:
+            pass
+
+    def start(self):
+        self._runner.start()
+        if self._receiver is not None:
+            # Only the worker process writes to the pipe, so it closes once that exits
+            self._sending.close()
+            self._receiver.start()
+
+    def submit(self, *command):
+        """Queue a command, e.g. ("buy", organelle id, n), for the worker."""
+        self._commands.put(command)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the worker, waiting for it to save and exit."""
+        self._commands.put(None)
+        self._runner.join(timeout)
+        if self._receiver is not None:
+            self._receiver.join(timeout)
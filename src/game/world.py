@@ -1,4 +1,5 @@
 import asyncio
+from typing import TYPE_CHECKING, Optional, Union
 
 from nurses_2.app import App
 from nurses_2.colors import RED, WHITE, ColorPair
@@ -10,105 +11,109 @@ from nurses_2.widgets.text_field import TextParticleField
 from nurses_2.widgets.text_widget import TextWidget
 from nurses_2.widgets.widget import Widget
 from nurses_2.widgets.window import Window
-from pydantic import BaseModel
 
 from game.config import *
-from game.dish import Dish, Food, Organism
-from game.organelle import ORGANELLES, Organelle
-from game.resource import RESOURCES, Resource
-from game.widgets import DishWidget, MainViewTabWidget, OrganelleListWidget, PlayableDishWidget, ResourceWidget
-
-
-class State(BaseModel):
-    """Tracks the mutable state of the World. Strictly graphical things,
-    non-persistant things (like displayed tab) should instead go on the
-    World."""
-
-    cytosol: float = 0
-    organelles: dict[int, Organelle] = {k: v.copy() for k, v in ORGANELLES.items()}
-    resources: dict[str, Resource] = {k: v.copy() for k, v in RESOURCES.items()}
-    dish: Dish = Dish(food=[Food(y, x, 0.1) for x in range(0, 50, 3) for y in range(0, 10, 2)])
-
-    # Helper functions to do common tasks
-    def ticker(self, ticker_name):
-        """Get a Resource by its ticker name."""
-        return self.resources[ticker_name.upper()]
-
-    def withdraw(self, ticker_name, amount):
-        """Attempt to withdraw (remove) a certain resource by its ticker name.
-        True if success. If there is less of the resource than the amount given,
-        no resource is removed and False is returned."""
-        resource = self.ticker(ticker_name)
-        if amount > resource.amount:
-            return False
-        else:
-            resource.amount -= amount
-            resource.rate -= amount / UPDATE_PERIOD
-            return True
-
-    def deposit(self, ticker_name, amount):
-        """Attempt to deposit (add) to a certain resource by its ticker name."""
-        resource = self.ticker(ticker_name)
-        resource.amount += amount
-        resource.rate += amount / UPDATE_PERIOD
-        return True
-
-    def buy(self, organelle_id) -> bool:
-        """Attempt to buy an organelle. True if success."""
-        organelle = self.organelles[organelle_id]
-        costs = organelle.costs
-        # 2 steps: we must check that we have all the resources to buy
-        # the organelle, then we must separately iterate and make the purchase
-        for ticker_name, cost in costs.items():
-            if self.ticker(ticker_name).amount <= cost:
-                return False
-        for ticker_name, cost in costs.items():
-            self.ticker(ticker_name).amount -= cost
-        organelle.count += 1
-        return True
-
-    def sell(self, organelle_id) -> bool:
-        """Attempt to sell an organelle. True if success."""
-        organelle = self.organelles[organelle_id]
-        if organelle.count > 0:
-            for ticker_name, cost in organelle.costs.items():
-                self.ticker(ticker_name).amount += cost
-            organelle.count -= 1
-            return True
-        else:
-            return False
+from game.controls import DishControls
+from game.perf import PERF
+from game.save import Autosaver, load_or_new_state, save_state
+from game.scheduler import Scheduler
+from game.state import State
+from game.widgets import (
+    DishWidget,
+    MainViewTabWidget,
+    OrganelleListWidget,
+    PerfWidget,
+    PlayableDishWidget,
+    ResourceWidget,
+)
+
+if TYPE_CHECKING:
+    from game.worker import RemoteControls, StateSnapshot
 
 
 class World(App):
-    def __init__(self, **kwargs):
+    """:param record: If given, the session is recorded to this file. See
+    game.recording.
+    :param worker: If given, "thread" or "process": the State is stepped by a
+        SimulationWorker in that mode, and widgets read its snapshots (see
+        view) while inputs are sent to it as commands.
+    :param export: If given, frames of the game are streamed to this file.
+        See game.export."""
+
+    def __init__(
+        self, record: Optional[str] = None, worker: Optional[str] = None, export: Optional[str] = None, **kwargs
+    ):
         super().__init__(**kwargs)
-        self.st: State = State()
+        self.st: State = load_or_new_state(SAVE_FILE, catch_up=True)
+        self.recorder = None
+        self.worker = None
+        self.exporter = None
+        # Shared by every view of the Dish, so key presses replay the same whichever tab they were made in.
+        # Built with the first one, as building it builds the Dish. A worker has RemoteControls instead.
+        self.dish_controls: Optional[Union[DishControls, RemoteControls]] = None
+        if worker is not None:
+            from game.worker import SimulationWorker
+
+            self.worker = SimulationWorker(self.st, worker, record=record, export=export)
+            self.dish_controls = self.worker.controls
+            self.scheduler = Scheduler(None, UPDATE_PERIOD)
+        else:
+            if record is not None:
+                from game.recording import Recorder
+
+                self.recorder = Recorder(record, self.st)
+            if export is not None:
+                from game.export import FrameExporter
+
+                self.exporter = FrameExporter(export, self.st)
+            self.autosaver = Autosaver(self.st)
+            self.scheduler = Scheduler(self.step, UPDATE_PERIOD, catch_up=self.st.catch_up)
         self.tab_content_split = HSplitLayout(4, size_hint=(1, 1), split_resizable=False)
+        # Keyed on tab index, with the tab's content, built the first time it's shown
+        self.tab_contents: dict[int, Widget] = {}
         self.log_file = "stderr.log"
 
-    async def tick_update_loop(self):
-        while True:
-            # Reset all the rates as they'll be recalculated shortly
-            for resource in self.st.resources.values():
-                resource.rate = 0
-            for organelle in self.st.organelles.values():
-                # Apply conditional rates on organelles
-                for cond_rate in organelle.rates:
-                    # Check if all the conditions are met for the conditional rate
-                    ok = True
-                    for ticker_name, rate in cond_rate.consumption.items():
-                        if self.st.ticker(ticker_name).amount < rate * UPDATE_PERIOD:
-                            ok = False
-                            break
-                    # If all the conditions are met to apply this rate, do two things:
-                    # 1. Withdraw the required resources, updating the rates
-                    if ok:
-                        for ticker_name, rate in cond_rate.consumption.items():
-                            self.st.withdraw(ticker_name, rate * UPDATE_PERIOD * organelle.count)
-                        # 2. Deposit the required resources, updating the rates
-                        for ticker_name, rate in cond_rate.production.items():
-                            self.st.deposit(ticker_name, rate * UPDATE_PERIOD * organelle.count)
-            await asyncio.sleep(UPDATE_PERIOD)
+    @property
+    def view(self) -> Union[State, "StateSnapshot"]:
+        """What widgets should read the game from: the State itself, or the
+        latest snapshot of it if a worker is stepping it."""
+        return self.st if self.worker is None else self.worker.snapshot
+
+    def step(self, dt: float):
+        self.st.step(dt)
+        if self.exporter is not None:
+            self.exporter.tick(self.st)
+
+    def buy(self, organelle_id: int, n: int = 1):
+        if self.worker is None:
+            self.st.buy(organelle_id, n)
+        else:
+            self.worker.submit("buy", organelle_id, n)
+
+    def buy_max(self, organelle_id: int):
+        if self.worker is None:
+            self.st.buy(organelle_id, self.st.max_affordable(organelle_id))
+        else:
+            self.worker.submit("buy_max", organelle_id)
+
+    def sell(self, organelle_id: int, n: int = 1):
+        if self.worker is None:
+            self.st.sell(organelle_id, n)
+        else:
+            self.worker.submit("sell", organelle_id, n)
+
+    def shutdown(self):
+        """Save and stop everything still running once the App has exited."""
+        if self.worker is not None:
+            # The worker saves as it stops
+            self.worker.stop()
+            return
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.exporter is not None:
+            self.exporter.close()
+        self.autosaver.close()
+        save_state(self.st)
 
     def organelle_upgrade_content(self) -> Widget:
         content_scroll = ScrollView(
@@ -125,24 +130,49 @@ class World(App):
         content_layout = Widget(
             size=(100, 100), size_hint=(None, 1), background_color_pair=ColorPair.from_colors(WHITE, Color(30, 30, 30))
         )
-        content = PlayableDishWidget(self.st.dish, size_hint=(1, 1))
+        if self.worker is not None:
+            content = PlayableDishWidget(
+                None,
+                self.scheduler,
+                controls=self.dish_controls,
+                snapshots=lambda: self.worker.snapshot.dish,
+                size_hint=(1, 1),
+            )
+        else:
+            if self.dish_controls is None:
+                self.dish_controls = DishControls(self.st.dish, self.recorder)
+            content = PlayableDishWidget(self.st.dish, self.scheduler, controls=self.dish_controls, size_hint=(1, 1))
         content_layout.add_widget(content)
         return content_layout
 
     def switch_to_tab(self, tab_idx):
         """Unmounts the current tab content and mounts the content corresponding to tab_idx.
+        Content is only built the first time its tab is shown, and kept while hidden.
         :param tab_idx:"""
-        self.tab_content_split.bottom_pane.prolicide()
-        if tab_idx == 0:
-            self.tab_content_split.bottom_pane.add_widget(self.organelle_upgrade_content())
-        elif tab_idx == 1:
-            self.tab_content_split.bottom_pane.add_widget(self.petri_dish_content())
-        elif tab_idx == 2:
-            self.tab_content_split.bottom_pane.add_widget(self.petri_dish_content())
+        pane = self.tab_content_split.bottom_pane
+        for child in list(pane.children):
+            pane.remove_widget(child)
+        if tab_idx not in self.tab_contents:
+            if tab_idx == 0:
+                self.tab_contents[tab_idx] = self.organelle_upgrade_content()
+            elif tab_idx in (1, 2):
+                self.tab_contents[tab_idx] = self.petri_dish_content()
+            else:
+                return
+        pane.add_widget(self.tab_contents[tab_idx])
+
+    def toggle_perf_window(self):
+        """Show or hide the performance overlay."""
+        self.perf_window.is_visible = not self.perf_window.is_visible
 
     async def on_start(self):
-        # Start the async jobb running the main game logic
-        self.update_loop = asyncio.create_task(self.tick_update_loop())
+        # Start the async job running the main game logic and every widget refresh
+        self.update_loop = asyncio.create_task(self.scheduler.run())
+        if self.worker is None:
+            self.autosave_loop = asyncio.create_task(self.autosaver.run())
+        else:
+            self.worker.start()
+        self.perf_log_loop = asyncio.create_task(PERF.log_loop())
 
         # Create the tabs at the top of the game
         tab_widget = MainViewTabWidget(self, size_hint=(None, 1), size=(4, 1))
@@ -154,5 +184,11 @@ class World(App):
         self.resource_window.view = ResourceWidget(self)
         self.add_widget(self.resource_window)
 
+        # Create a floating performance overlay, hidden until toggled with `
+        self.perf_window = Window("Performance", size=(12, 60), pos_hint=(0.1, 0.55))
+        self.perf_window.view = PerfWidget(self)
+        self.perf_window.is_visible = False
+        self.add_widget(self.perf_window)
+
         # Create the current tab's content
         self.switch_to_tab(0)
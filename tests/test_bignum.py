@@ -0,0 +1,104 @@
+import math
+
+import numpy as np
+import pytest
+
+from game.bignum import BigArray
+
+
+def test_round_trips_floats():
+    values = np.array([0.0, 1.0, -2.5, 1e-300, 1e300])
+    np.testing.assert_array_equal(BigArray(values).to_float(), values)
+
+
+def test_add_and_sub():
+    a = BigArray([1.0, 2.5, -4.0, 0.0])
+    b = BigArray([2.0, -2.5, 1.0, 0.0])
+    np.testing.assert_array_equal((a + b).to_float(), [3.0, 0.0, -3.0, 0.0])
+    np.testing.assert_array_equal((a - b).to_float(), [-1.0, 5.0, -5.0, 0.0])
+    np.testing.assert_array_equal((1 + a).to_float(), [2.0, 3.5, -3.0, 1.0])
+    np.testing.assert_array_equal((1 - a).to_float(), [0.0, -1.5, 5.0, 1.0])
+
+
+def test_sub_to_negative():
+    difference = BigArray(2.0) - 5
+    assert float(difference) == -3.0
+    assert bool(difference < 0)
+
+
+def test_add_zero_is_identity():
+    huge = BigArray.from_log10(1e6)
+    assert bool(huge + 0 == huge)
+    assert bool(0 + huge == huge)
+    assert float(BigArray(0.0) + 7) == 7.0
+
+
+def test_add_huge():
+    huge = BigArray.from_log10(1e6)
+    assert (huge + huge).log10() == pytest.approx(1e6 + math.log10(2))
+    # A float-sized addend vanishes next to it, as it would in float64
+    assert bool(huge + 1e300 == huge)
+    assert bool(huge - huge == 0)
+
+
+def test_mul():
+    a = BigArray([3.0, -2.0, 0.0])
+    np.testing.assert_array_equal((a * 4).to_float(), [12.0, -8.0, 0.0])
+    np.testing.assert_array_equal((a * a).to_float(), [9.0, 4.0, 0.0])
+    huge = BigArray.from_log10(400)
+    assert (huge * huge).log10() == pytest.approx(800)
+    assert float(huge * 0) == 0.0
+
+
+def test_div():
+    huge = BigArray.from_log10(1000)
+    assert (huge / BigArray.from_log10(998)).to_float() == pytest.approx(100)
+    np.testing.assert_array_equal((BigArray([6.0, -6.0]) / 3).to_float(), [2.0, -2.0])
+
+
+def test_compare():
+    a = BigArray([1.0, 5.0, -3.0, 0.0])
+    b = BigArray([2.0, 5.0, -4.0, 0.0])
+    np.testing.assert_array_equal(a < b, [True, False, False, False])
+    np.testing.assert_array_equal(a <= b, [True, True, False, True])
+    np.testing.assert_array_equal(a > b, [False, False, True, False])
+    np.testing.assert_array_equal(a >= b, [False, True, True, True])
+    np.testing.assert_array_equal(a == b, [False, True, False, True])
+    np.testing.assert_array_equal(a != b, [True, False, True, False])
+
+
+def test_compare_huge():
+    small, large = BigArray.from_log10(1e6), BigArray.from_log10(1e6 + 1)
+    assert bool(small < large)
+    assert bool(-large < -small)
+    assert bool(large > 1e308)
+    assert bool(-large < 0)
+    # Against plain arrays, through the reflected operators
+    np.testing.assert_array_equal(np.array([1.0, 1e308]) <= BigArray.from_log10([0, 1e6]), [True, True])
+
+
+def test_from_log10():
+    np.testing.assert_allclose(BigArray.from_log10([0, 1, 2, -1]).to_float(), [1, 10, 100, 0.1])
+    assert float(BigArray.from_log10(-np.inf)) == 0.0
+    assert float(BigArray.from_log10(np.inf)) == np.inf
+    assert BigArray.from_log10(1e100).log10() == pytest.approx(1e100)
+    # Past float range, where 10 ** logs itself would overflow
+    assert BigArray.from_log10(5000).log10() == pytest.approx(5000)
+    assert BigArray.from_log10(1e6).to_float() == np.inf
+
+
+def test_format_float_sized():
+    assert format(BigArray(1234.5), ".1f") == "1234.5"
+    assert format(BigArray(-2.0), ".2f") == "-2.00"
+    assert format(BigArray(0.0), ".2f") == "0.00"
+    assert str(BigArray(1e20)) == format(1e20, ".2f")
+
+
+def test_format_huge():
+    assert format(BigArray.from_log10(4567 + math.log10(1.23)), ".2f") == "1.23e4567"
+    assert format(-BigArray.from_log10(4567 + math.log10(1.23)), ".2f") == "-1.23e4567"
+    assert format(BigArray.from_log10(1e20), ".2f") == "1.00e1.00e+20"
+
+
+def test_format_tiny():
+    assert format(BigArray.from_log10(-4000), ".2f") == "1.00e-4000"
@@ -0,0 +1,111 @@
+import json
+import os
+
+import pytest
+
+from game import content
+from game.config import CONTENT_CACHE_DIR
+from game.content import BASE_PACK, add_pack, compile_content, default_content, load_content
+
+MOD_PACK = """
+[resources.ATP]
+name = "Modded ATP"
+description = ""
+amount = 99
+
+[resources.NADH]
+name = "NADH"
+description = ""
+
+[organelles.0]
+name = "Modded Chloroplast"
+description = ""
+
+[[organelles.0.rates]]
+production = { NADH = 2 }
+
+[organelles.7]
+name = "Flagellum"
+description = ""
+"""
+
+
+@pytest.fixture()
+def mod_pack(tmp_path) -> str:
+    path = tmp_path / "mod.toml"
+    path.write_text(MOD_PACK)
+    return str(path)
+
+
+def test_later_packs_replace_and_add(mod_pack):
+    base = compile_content([BASE_PACK])
+    modded = compile_content([BASE_PACK, mod_pack])
+    assert modded.resources["ATP"].name == "Modded ATP"
+    assert float(modded.resources["ATP"].amount) == 99
+    assert modded.organelles[0].name == "Modded Chloroplast"
+    # Entries the mod leaves alone are kept, and new ones are added after them
+    assert modded.organelles[1] == base.organelles[1]
+    assert list(modded.resources) == [*base.resources, "NADH"]
+    assert list(modded.organelles) == [*base.organelles, 7]
+    # The layout is compiled from the merged definitions
+    nadh = list(modded.resources).index("NADH")
+    assert modded.layout["production"][:, nadh].tolist().count(2.0) == 1
+
+
+def test_json_packs(tmp_path):
+    path = tmp_path / "mod.json"
+    path.write_text(json.dumps({"resources": {"NADH": {"name": "NADH", "description": ""}}}))
+    assert compile_content([BASE_PACK, str(path)]).resources["NADH"].ticker == "NADH"
+
+
+def test_cache_hit_skips_compiling(tmp_path, mod_pack, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    compiled = load_content([BASE_PACK, mod_pack], cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+
+    def compile_again(paths):
+        raise AssertionError(paths)
+
+    monkeypatch.setattr(content, "compile_content", compile_again)
+    cached = load_content([BASE_PACK, mod_pack], cache_dir)
+    assert cached.organelles == compiled.organelles
+    assert cached.resources == compiled.resources
+    for name, array in compiled.layout.items():
+        assert (cached.layout[name] == array).all()
+
+
+def test_changed_pack_invalidates_cache(tmp_path, mod_pack):
+    cache_dir = str(tmp_path / "cache")
+    assert float(load_content([BASE_PACK, mod_pack], cache_dir).resources["ATP"].amount) == 99
+    with open(mod_pack, "w") as f:
+        f.write(MOD_PACK.replace("amount = 99", "amount = 42"))
+    assert float(load_content([BASE_PACK, mod_pack], cache_dir).resources["ATP"].amount) == 42
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_unreadable_cache_is_rebuilt(tmp_path, mod_pack):
+    cache_dir = str(tmp_path / "cache")
+    load_content([BASE_PACK, mod_pack], cache_dir)
+    (cache_file,) = os.listdir(cache_dir)
+    with open(os.path.join(cache_dir, cache_file), "wb") as f:
+        f.write(b"garbage")
+    assert load_content([BASE_PACK, mod_pack], cache_dir).organelles[0].name == "Modded Chloroplast"
+
+
+def test_default_cache_dir_is_per_user():
+    assert os.path.isabs(CONTENT_CACHE_DIR)
+
+
+def test_default_content_is_loaded_once_until_a_pack_is_added(tmp_path, mod_pack, monkeypatch):
+    monkeypatch.setattr(content, "CONTENT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(content, "PACKS", [BASE_PACK])
+    monkeypatch.setattr(content, "_default", None)
+    base = default_content()
+    assert default_content() is base
+    assert "NADH" not in base.resources
+    add_pack(mod_pack)
+    assert content.PACKS == [BASE_PACK, mod_pack]
+    modded = default_content()
+    assert modded is not base
+    assert "NADH" in modded.resources
+    assert default_content() is modded
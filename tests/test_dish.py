@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from game.dish import Dish, Organism, Point
+from game.nutrients import NutrientField
+
+
+def make_dish(seed: int = 0) -> Dish:
+    rng = np.random.default_rng(seed)
+    return Dish(bounds=(100, 600), nutrients=NutrientField((100, 600), rng=rng), rng=rng)
+
+
+def assert_indexed(dish: Dish):
+    """The spatial indexes hold exactly what the dish's arrays do."""
+    everything = (-1, -1, dish.bounds[0] + 1, dish.bounds[1] + 1)
+    assert sorted(dish.organism_index.query_rect(*everything).tolist()) == sorted(dish.organism_ids.tolist())
+    assert sorted(dish.food_index.query_rect(*everything).tolist()) == sorted(dish.food_ids.tolist())
+    for idx, (y, x) in zip(dish.organism_ids.tolist(), dish.organism_positions.tolist()):
+        assert idx in dish.organism_index.query_rect(y, x, y, x)
+
+
+def test_removed_organism_view_goes_stale():
+    dish = make_dish()
+    gone = dish.add_organism(Organism(Point(3, 3), Point(1, 1)))
+    kept = dish.add_organism(Organism(Point(5, 5), Point(1, 1)))
+    dish.remove_organism(gone.idx)
+    with pytest.raises(KeyError):
+        _ = gone.pos
+    with pytest.raises(KeyError):
+        dish.organism(gone.idx)
+    with pytest.raises(KeyError):
+        dish.remove_organism(gone.idx)
+    assert kept.pos == Point(5, 5)
+    assert list(dish.organisms) == [kept.idx]
+
+
+def test_reused_organism_slot_leaves_old_views_stale():
+    dish = make_dish()
+    gone = dish.add_organism(Organism(Point(3, 3), Point(1, 1)))
+    dish.remove_organism(gone.idx)
+    new = dish.add_organism(Organism(Point(7, 7), Point(1, 1)))
+    assert new.idx != gone.idx
+    assert new.pos == Point(7, 7)
+    with pytest.raises(KeyError):
+        _ = gone.pos
+
+
+def test_removed_food_goes_stale():
+    dish = make_dish()
+    gone = dish.add_food(10, 20, 5.0)
+    kept = dish.add_food(30, 40, 6.0)
+    assert tuple(dish.remove_food(gone)) == (10, 20, 5.0)
+    with pytest.raises(KeyError):
+        dish.remove_food(gone)
+    assert dish.food_ids.tolist() == [kept]
+    assert dish.food == [(30, 40, 6.0)]
+    assert dish.food_index.nearest(10, 20) == kept
+
+
+def test_remove_between_steps():
+    dish = make_dish()
+    organisms = [dish.add_organism(Organism(Point(y, 3 * y), Point(1, 1))) for y in range(50)]
+    for i in range(200):
+        dish.step()
+        if i % 5 == 0:
+            # Survivors keep their views while rows are swapped around them
+            positions = {o.idx: o.pos for o in organisms[1:]}
+            dish.remove_organism(organisms.pop(0).idx)
+            assert {o.idx: o.pos for o in organisms} == positions
+        if i % 7 == 0 and len(dish.food_ids):
+            dish.remove_food(int(dish.food_ids[i % len(dish.food_ids)]))
+        assert_indexed(dish)
+    assert sorted(dish.organism_ids.tolist()) == sorted(o.idx for o in organisms)
+    assert ((dish.organism_positions >= 0) & (dish.organism_positions <= np.subtract(dish.bounds, 1))).all()
+
+
+def test_restore_matches_adding_one_at_a_time():
+    rng = np.random.default_rng(1)
+    organism_positions = rng.integers(0, 99, (40, 2))
+    food_positions = rng.integers(0, 99, (30, 2))
+    calories = rng.random(30)
+    added, restored = make_dish(), make_dish()
+    for y, x in organism_positions.tolist():
+        added.add_organism(Organism(Point(y, x), Point(1, 1)))
+    for (y, x), c in zip(food_positions.tolist(), calories.tolist()):
+        added.add_food(y, x, c)
+    restored.restore_organisms(organism_positions, np.ones_like(organism_positions))
+    restored.restore_food(food_positions, calories)
+    for _ in range(50):
+        added.step()
+        restored.step()
+    np.testing.assert_array_equal(restored.organism_ids, added.organism_ids)
+    np.testing.assert_array_equal(restored.organism_positions, added.organism_positions)
+    np.testing.assert_array_equal(restored.organism_bounds, added.organism_bounds)
+    np.testing.assert_array_equal(restored.food_ids, added.food_ids)
+    np.testing.assert_array_equal(restored.food_positions, added.food_positions)
+    np.testing.assert_array_equal(restored.food_calories, added.food_calories)
+    assert_indexed(restored)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from game.organelle import ConditionalRate, Organelle
+from game.resource import Resource
+from game.state import State
+
+
+def make_state(glucose: float = 50.0, consumers: int = 2) -> State:
+    """A glycolysis-like economy: a passive glucose source, and an organelle
+    turning glucose into ATP faster than it's replenished, so that glucose
+    runs out partway and its consumer is throttled from then on."""
+    resources = {
+        "GLUC": Resource(ticker="GLUC", name="", description="", amount=glucose),
+        "ATP": Resource(ticker="ATP", name="", description=""),
+    }
+    organelles = {
+        0: Organelle(idx=0, name="", description="", count=3, rates=[ConditionalRate(production={"GLUC": 0.5})]),
+        1: Organelle(
+            idx=1,
+            name="",
+            description="",
+            count=consumers,
+            rates=[ConditionalRate(consumption={"GLUC": 1.0}, production={"ATP": 2.0})],
+        ),
+    }
+    return State(organelles=organelles, resources=resources)
+
+
+def make_oscillating_state() -> State:
+    """Rates with several inputs, where the first rate's scarcest input
+    alternates between B and D from one tick to the next while both run
+    out, before settling on B."""
+    resources = {t: Resource(ticker=t, name="", description="", amount=a) for t, a in zip("ABCD", (34, 99, 82, 85))}
+    rates = [
+        ConditionalRate(consumption={"B": 0.3, "D": 0.3}),
+        ConditionalRate(consumption={"B": 5.0, "C": 3.0}, production={"A": 0.8}),
+        ConditionalRate(consumption={"B": 4.5}, production={"D": 3.8}),
+        ConditionalRate(consumption={"D": 8.2}, production={"A": 7.1, "B": 4.7}),
+    ]
+    organelles = {i: Organelle(idx=i, name="", description="", count=1, rates=[rate]) for i, rate in enumerate(rates)}
+    return State(organelles=organelles, resources=resources)
+
+
+@pytest.mark.parametrize("ticks", [1, 7, 100, 1000, 20000])
+def test_catch_up_matches_stepping(ticks):
+    dt = 0.2
+    stepped, caught_up = make_state(), make_state()
+    for _ in range(ticks):
+        stepped.step(dt)
+    caught_up.catch_up(ticks * dt, dt)
+    np.testing.assert_allclose(caught_up.amounts.to_float(), stepped.amounts.to_float(), rtol=1e-9, atol=1e-9)
+    # A settled throttled rate nets out to rounding error, either way
+    np.testing.assert_allclose(caught_up.rates, stepped.rates, rtol=1e-9, atol=1e-6)
+
+
+def test_catch_up_without_consumption_is_linear():
+    st = make_state(consumers=0)
+    st.catch_up(3600.0)
+    assert float(st.ticker("GLUC").amount) == pytest.approx(50 + 3 * 0.5 * 3600)
+
+
+def test_oscillating_throttling_does_oscillate():
+    st = make_oscillating_state()
+    economy = st.economy
+    demand = (economy.counts(st.organelles)[economy.rate_owner] * 0.2) @ economy.consumption
+    limiting = []
+    for _ in range(120):
+        limiting.append(int(economy.regime(st.amounts.to_float(), demand)[0]))
+        st.step(0.2)
+    assert limiting[94:104] == [3, 1] * 5
+
+
+@pytest.mark.parametrize("ticks", [90, 97, 100, 120, 1000, 20000])
+def test_catch_up_matches_stepping_through_oscillating_throttling(ticks):
+    dt = 0.2
+    stepped, caught_up = make_oscillating_state(), make_oscillating_state()
+    for _ in range(ticks):
+        stepped.step(dt)
+    caught_up.catch_up(ticks * dt, dt)
+    np.testing.assert_allclose(caught_up.amounts.to_float(), stepped.amounts.to_float(), rtol=1e-9, atol=1e-9)
+    assert (caught_up.amounts.to_float() >= 0).all()
+
+
+def test_catch_up_never_goes_negative():
+    """Whole runs of ticks applied at once end before a short resource would
+    run out, and are clamped against rounding below 0."""
+    st = make_oscillating_state()
+    for elapsed in (10.0, 17.3, 60.0, 3600.0, 86400.0):
+        st.catch_up(elapsed)
+        assert (st.amounts.to_float() >= 0).all()
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from game.export import FrameExporter, FrameReader
+from game.state import State
+
+
+def test_reader_follows_the_ring(tmp_path):
+    path = str(tmp_path / "ring.bin")
+    st = State(seed=0)
+    exporter = FrameExporter(path, st, period=1, frame_count=8)
+    reader = FrameReader(path)
+    assert reader.latest() is None
+    for _ in range(20):
+        st.step()
+        exporter.tick(st)
+    frame = reader.latest()
+    assert frame["index"] == reader.latest_index == 19
+    assert frame["organism_count"] == len(st.dish.organism_ids)
+    assert frame["food_count"] == len(st.dish.food_ids)
+    np.testing.assert_allclose(frame["rates"], st.rates)
+    # Only the last frame_count frames are kept
+    assert reader.read(12) is not None
+    assert reader.read(11) is None
+    assert reader.read(20) is None
+    exporter.close()
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / "ring.bin"
+    path.write_bytes(bytes(4096))
+    with pytest.raises(ValueError, match="not a frame ring"):
+        FrameReader(str(path))
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from game.config import FOOD_SPAWN_CALORIES, NUTRIENT_DECAY, NUTRIENT_REGROWTH
+from game.dish import Dish
+from game.nutrients import MAX_DIFFUSION_STEP, NutrientField
+
+
+def make_field(seed: int = 0, bounds: tuple[int, int] = (60, 150)) -> NutrientField:
+    return NutrientField(bounds, rng=np.random.default_rng(seed))
+
+
+def expected_total(field: NutrientField, total: float, dt: float) -> float:
+    """The total after a step of dt that spawns nothing, as diffusion only
+    moves nutrients around."""
+    return total + dt * (NUTRIENT_REGROWTH * field.fertility.sum() - NUTRIENT_DECAY * total)
+
+
+@pytest.mark.parametrize("rate", [0.01, 0.1, MAX_DIFFUSION_STEP])
+@pytest.mark.parametrize("bounds", [(60, 150), (7, 3), (1, 40)])
+def test_diffusion_conserves_nutrients(rate, bounds):
+    field = make_field(bounds=bounds)
+    field.concentration = np.random.default_rng(1).random(field.shape) * 10
+    total = field.concentration.sum()
+    for _ in range(100):
+        field.diffuse(rate)
+        assert field.concentration.min() >= 0
+    np.testing.assert_allclose(field.concentration.sum(), total, rtol=1e-12)
+
+
+def test_diffusion_spreads_toward_uniform():
+    field = make_field()
+    field.concentration[:] = 0
+    field.concentration[0, 0] = 100
+    for _ in range(20000):
+        field.diffuse(MAX_DIFFUSION_STEP)
+    np.testing.assert_allclose(field.concentration, 100 / field.concentration.size, rtol=1e-3)
+
+
+def test_step_without_spawning_only_regrows_and_decays():
+    field = make_field()
+    for _ in range(50):
+        total = field.concentration.sum()
+        assert len(field.step(0.2, max_spawn=0)) == 0
+        np.testing.assert_allclose(field.concentration.sum(), expected_total(field, total, 0.2), rtol=1e-12)
+
+
+def test_spawned_food_takes_its_calories_from_the_field():
+    field = make_field()
+    spawned = 0
+    for _ in range(200):
+        total = field.concentration.sum()
+        positions = field.step(5.0)
+        spawned += len(positions)
+        assert ((positions >= 0) & (positions < field.bounds)).all()
+        expected = expected_total(field, total, 5.0) - len(positions) * FOOD_SPAWN_CALORIES
+        np.testing.assert_allclose(field.concentration.sum(), expected, rtol=1e-12)
+    assert spawned > 0
+
+
+def test_spawning_is_deterministic():
+    a, b = make_field(3), make_field(3)
+    for _ in range(200):
+        np.testing.assert_array_equal(a.step(5.0), b.step(5.0))
+    np.testing.assert_array_equal(a.concentration, b.concentration)
+
+
+def test_max_spawn_is_respected(monkeypatch):
+    monkeypatch.setattr("game.nutrients.FOOD_SPAWN_RATE", 1.0)
+    field = make_field()
+    total = field.concentration.sum()
+    assert len(field.step(1.0, max_spawn=3)) == 3
+    expected = expected_total(field, total, 1.0) - 3 * FOOD_SPAWN_CALORIES
+    np.testing.assert_allclose(field.concentration.sum(), expected, rtol=1e-12)
+
+
+def test_dish_stops_spawning_at_max_food(monkeypatch):
+    monkeypatch.setattr("game.nutrients.FOOD_SPAWN_RATE", 0.05)
+    monkeypatch.setattr("game.dish.MAX_FOOD", 40)
+    rng = np.random.default_rng(0)
+    dish = Dish(bounds=(60, 150), nutrients=NutrientField((60, 150), rng=rng), rng=rng)
+    for _ in range(100):
+        total, food = dish.nutrients.concentration.sum(), len(dish.food_ids)
+        dish.step(1.0)
+        assert len(dish.food_ids) <= 40
+        # Food that had no room to spawn left its nutrients in the field
+        spawned = len(dish.food_ids) - food
+        expected = expected_total(dish.nutrients, total, 1.0) - spawned * FOOD_SPAWN_CALORIES
+        np.testing.assert_allclose(dish.nutrients.concentration.sum(), expected, rtol=1e-12)
+    assert len(dish.food_ids) == 40
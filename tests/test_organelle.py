@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from game.bignum import BigArray
+from game.organelle import Organelle
+from game.resource import Resource
+from game.state import State
+
+
+def make_organelle(base_cost: float, cost_exponent: float, count: int = 0) -> Organelle:
+    return Organelle(
+        idx=0,
+        name="",
+        description="",
+        base_cost={"ATP": base_cost},
+        cost_exponent={"ATP": cost_exponent},
+        count=count,
+    )
+
+
+def make_state(organelle: Organelle, amount: BigArray) -> State:
+    st = State(organelles={0: organelle}, resources={"ATP": Resource(ticker="ATP", name="", description="")})
+    st.resources["ATP"].amount = amount
+    return st
+
+
+def test_cost_of_matches_one_at_a_time():
+    organelle = make_organelle(10, 1.1, count=3)
+    total = organelle.cost_of(3, 5)["ATP"]
+    one_at_a_time = sum(float(organelle.cost_of(k, 1)["ATP"]) for k in range(3, 8))
+    assert float(total) == pytest.approx(one_at_a_time)
+
+
+@pytest.mark.parametrize(
+    ("base_cost", "cost_exponent", "count", "n"),
+    [(5, 1.0, 1, 1), (5, 1.0, 3, 2), (10, 1.1, 0, 7), (1, 1.5, 29, 1), (1e6, 1.1, 25, 11), (3.7, 1.01, 40, 150)],
+)
+def test_max_affordable_agrees_with_buy_at_exact_boundary(base_cost, cost_exponent, count, n):
+    """A budget of exactly the cost of n can't buy n, as buying needs more
+    than the cost, but a budget one ulp over can. Either way, buying what
+    max_affordable says succeeds, and buying one more fails."""
+    cost = make_organelle(base_cost, cost_exponent, count).cost_of(count, n)["ATP"]
+    just_over = BigArray(np.nextafter(cost.mantissa, np.inf), cost.exponent)
+    for budget, expected in ((cost, n - 1), (just_over, n)):
+        st = make_state(make_organelle(base_cost, cost_exponent, count), budget.copy())
+        affordable = st.max_affordable(0)
+        assert affordable == expected
+        assert not st.buy(0, affordable + 1)
+        assert st.buy(0, affordable) == (affordable > 0)
+        assert st.organelles[0].count == count + affordable
+
+
+def test_max_affordable_past_float_range():
+    organelle = make_organelle(10, 2.0)
+    # Cost k is 10 ** (2 ** k), so 12 cost about 10 ** 4095 in total
+    budget = BigArray.from_log10(4096)
+    assert organelle.max_affordable({"ATP": budget}) == 12
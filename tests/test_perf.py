@@ -0,0 +1,26 @@
+from game.perf import PerfMonitor, RingBuffer
+from game.scheduler import Scheduler
+
+
+def test_ring_buffer_keeps_the_last_samples():
+    buf = RingBuffer(4)
+    for value in range(10):
+        buf.append(value)
+    assert buf.values.tolist() == [6, 7, 8, 9]
+    assert buf.summary()["count"] == 10
+    assert buf.summary()["last"] == 9
+
+
+def test_capped_catch_up_is_reported_as_missed():
+    steps, perf = [], PerfMonitor()
+    scheduler = Scheduler(steps.append, dt=0.1, max_catch_up_steps=3, perf=perf)
+    scheduler.advance(1.05)
+    assert steps == [0.1] * 3
+    assert perf.missed == {"scheduler": 7}
+    assert "scheduler: 7 missed" in perf.report()
+    # Once wakeups are timed, the missed count goes on the same line as their lateness
+    perf.record_lateness("scheduler", 0.002)
+    report = perf.report()
+    assert "scheduler late: 2.00 avg / 2.00 max ms, 7 missed" in report
+    assert "scheduler: 7 missed" not in report
+    assert perf.summary()["durations"]["tick"]["count"] == 3
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from game.controls import DishControls
+from game.recording import Recorder, Recording, replay
+from game.state import State
+
+
+def record_session(path: str) -> State:
+    """Drive a State with every kind of record: ticks of the recording's dt
+    and of others, a catch up, key presses, trades and changes of the
+    followed organism."""
+    st = State()
+    recorder = Recorder(path, st, dt=0.2, seed=7)
+    controls = DishControls(st.dish, recorder)
+    rng = np.random.default_rng(1)
+    for t in range(1000):
+        st.step(0.1 if t % 250 == 0 else 0.2)
+        if t % 7 == 0:
+            controls.press(str(rng.choice(list("hjklpfnv"))), alt=bool(rng.random() < 0.1))
+        if t % 97 == 0 and len(st.dish.organism_ids):
+            controls.follow(int(rng.choice(st.dish.organism_ids)))
+        if t % 50 == 0:
+            st.buy(0, st.max_affordable(0))
+        if t % 333 == 0:
+            st.sell(0)
+        if t == 500:
+            st.catch_up(1000.0)
+    recorder.close()
+    return st
+
+
+def assert_same(a: State, b: State):
+    np.testing.assert_array_equal(a.dish.organism_ids, b.dish.organism_ids)
+    np.testing.assert_array_equal(a.dish.organism_positions, b.dish.organism_positions)
+    np.testing.assert_array_equal(a.dish.food_positions, b.dish.food_positions)
+    np.testing.assert_array_equal(a.dish.food_calories, b.dish.food_calories)
+    np.testing.assert_array_equal(a.dish.nutrients.concentration, b.dish.nutrients.concentration)
+    assert {k: o.count for k, o in a.organelles.items()} == {k: o.count for k, o in b.organelles.items()}
+    for ticker, resource in a.resources.items():
+        assert bool(b.resources[ticker].amount == resource.amount)
+
+
+def test_replay_matches_recorded_session(tmp_path):
+    path = str(tmp_path / "session.rec")
+    recorded = record_session(path)
+    assert_same(recorded, replay(Recording(path)))
+
+
+def test_replay_is_deterministic(tmp_path):
+    path = str(tmp_path / "session.rec")
+    record_session(path)
+    assert_same(replay(Recording(path)), replay(Recording(path)))
+
+
+def test_truncated_recording_replays_up_to_the_cut(tmp_path):
+    path = str(tmp_path / "session.rec")
+    record_session(path)
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 3)
+    replay(Recording(path))
+
+
+def test_not_a_recording(tmp_path):
+    path = tmp_path / "session.rec"
+    path.write_bytes(b"not a recording")
+    with pytest.raises(ValueError, match="not a recording"):
+        Recording(str(path))
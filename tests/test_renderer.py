@@ -0,0 +1,105 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks"))
+import nurses_2_stubs
+
+nurses_2_stubs.install()
+
+from game.config import DISH_ZOOM_LEVELS  # noqa: E402
+from game.dish import Dish, Organism, Point  # noqa: E402
+from game.nutrients import NutrientField  # noqa: E402
+from game.widgets import DishRenderer  # noqa: E402
+
+
+def make_dish(bounds: tuple[int, int] = (200, 600)) -> Dish:
+    return Dish(bounds=bounds, rng=np.random.default_rng(0))
+
+
+def drawn(renderer: DishRenderer, *view) -> dict[tuple[int, int], str]:
+    """The character drawn at every view position."""
+    positions, chars, _ = renderer.render(*view)
+    return dict(zip(map(tuple, positions.tolist()), chars["char"].tolist()))
+
+
+@pytest.mark.parametrize("zoom", DISH_ZOOM_LEVELS[1:])
+def test_density_glyph_follows_how_full_a_cell_is(zoom):
+    dish = make_dish()
+    cell_positions = zoom * zoom
+    # Screen cell (0, c) holds c + 1 quarters of its positions, rounded up
+    for c in range(4):
+        for i in range(max(1, cell_positions * (c + 1) // 4)):
+            dish.add_food(i // zoom, c * zoom + i % zoom, 1.0)
+    renderer = DishRenderer(dish)
+    assert drawn(renderer, 0, 0, 5, 10, zoom) == {(0, c): DishRenderer.density_chars[c] for c in range(4)}
+
+
+@pytest.mark.parametrize("zoom", DISH_ZOOM_LEVELS[1:])
+def test_density_cells_with_organisms_take_their_color(zoom):
+    dish = make_dish()
+    dish.add_food(0, 0, 1.0)
+    dish.add_food(0, zoom, 1.0)
+    dish.add_organism(Organism(Point(0, zoom), Point(1, 1)))
+    renderer = DishRenderer(dish)
+    positions, _, color_pairs = renderer.render(0, 0, 5, 10, zoom)
+    colors = dict(zip(map(tuple, positions.tolist()), map(tuple, color_pairs.tolist())))
+    assert colors == {(0, 0): renderer.food_density_color_pair, (0, 1): renderer.color_pair}
+
+
+def test_crowded_full_zoom_view_is_drawn_as_density():
+    dish = make_dish()
+    for x in range(10):
+        dish.add_food(0, x, 1.0)
+        dish.add_organism(Organism(Point(0, x), Point(1, 1)))
+    renderer = DishRenderer(dish)
+    # Room for every entity: one particle each
+    _, chars, _ = renderer.render(0, 0, 2, 10)
+    assert sorted(chars["char"].tolist()) == ["@"] * 10 + ["x"] * 10
+    # More entities than cells: one shade per occupied cell, full as they each hold two
+    assert drawn(renderer, 0, 0, 1, 10) == {(0, x): DishRenderer.density_chars[-1] for x in range(10)}
+
+
+@pytest.mark.parametrize("zoom", DISH_ZOOM_LEVELS)
+@pytest.mark.parametrize("origin", [(0, 0), (37, 101), (-13, -50)])
+def test_only_entities_in_view_are_drawn(zoom, origin):
+    dish = make_dish()
+    rng = np.random.default_rng(zoom)
+    for y, x in rng.integers(0, dish.bounds, size=(300, 2)).tolist():
+        dish.add_food(y, x, 1.0)
+    height, width = 6, 15
+    oy, ox = origin
+    ys, xs = (dish.food_positions[:, 0] - oy) // zoom, (dish.food_positions[:, 1] - ox) // zoom
+    inside = (ys >= 0) & (ys < height) & (xs >= 0) & (xs < width)
+    cells = set(zip(ys[inside].tolist(), xs[inside].tolist()))
+    drawn_cells = drawn(DishRenderer(dish), oy, ox, height, width, zoom)
+    assert set(drawn_cells) == cells
+    if zoom == 1:
+        assert set(drawn_cells.values()) <= {"x"}
+
+
+def test_nutrients_are_sampled_per_zoomed_cell():
+    dish = make_dish((40, 80))
+    dish.nutrients = NutrientField(dish.bounds, cell_size=2, rng=np.random.default_rng(0))
+    field = dish.nutrients
+    field.concentration[:] = 0
+    field.concentration[5, 10] = field.capacity
+    renderer = DishRenderer(dish, show_nutrients=True)
+    # At zoom 4 the screen cell (2, 5) is sampled at dish position (10, 22), in nutrient cell (5, 11)
+    assert drawn(renderer, 0, 0, 10, 20, 4) == {}
+    field.concentration[5, 11] = field.capacity
+    field.step(0.0, max_spawn=0)
+    assert drawn(renderer, 0, 0, 10, 20, 4) == {(2, 5): DishRenderer.nutrient_chars[-1]}
+
+
+def test_unchanged_view_is_not_redrawn():
+    dish = make_dish()
+    dish.add_food(3, 3, 1.0)
+    renderer = DishRenderer(dish)
+    assert renderer.render(0, 0, 10, 10, 2) is not None
+    assert renderer.render(0, 0, 10, 10, 2) is None
+    assert renderer.render(0, 0, 10, 10, 4) is not None
+    dish.add_food(4, 4, 1.0)
+    assert renderer.render(0, 0, 10, 10, 4) is not None
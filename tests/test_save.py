@@ -0,0 +1,103 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from game.bignum import BigArray
+from game.save import Autosaver, load_or_new_state, load_state, save_state, snapshot, write_snapshot
+from game.state import State
+
+
+def make_state() -> State:
+    st = State(cytosol=3.5, seed=0)
+    st.organelles[1].count = 4
+    st.sync_counts()
+    st.resources["ATP"].amount = BigArray.from_log10(5000)
+    st.resources["GLUC"].amount = BigArray(12.25)
+    for _ in range(100):
+        st.dish.step()
+    return st
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "save.npz")
+    st = make_state()
+    save_state(st, path)
+    loaded = load_state(path)
+    assert loaded.cytosol == st.cytosol
+    assert {k: o.count for k, o in loaded.organelles.items()} == {k: o.count for k, o in st.organelles.items()}
+    for ticker, resource in st.resources.items():
+        assert bool(loaded.resources[ticker].amount == resource.amount)
+    assert loaded.dish.bounds == st.dish.bounds
+    np.testing.assert_array_equal(loaded.dish.organism_positions, st.dish.organism_positions)
+    np.testing.assert_array_equal(loaded.dish.organism_bounds, st.dish.organism_bounds)
+    np.testing.assert_array_equal(loaded.dish.food_positions, st.dish.food_positions)
+    np.testing.assert_array_equal(loaded.dish.food_calories, st.dish.food_calories)
+    np.testing.assert_array_equal(loaded.dish.nutrients.fertility, st.dish.nutrients.fertility)
+    np.testing.assert_array_equal(loaded.dish.nutrients.concentration, st.dish.nutrients.concentration)
+    assert len(loaded.dish.food_index) == len(st.dish.food_ids)
+
+
+def test_round_trip_is_stable(tmp_path):
+    """Saving a loaded save writes the same arrays back out."""
+    first, second = str(tmp_path / "first.npz"), str(tmp_path / "second.npz")
+    save_state(make_state(), first)
+    save_state(load_state(first), second)
+    with np.load(first) as a, np.load(second) as b:
+        assert sorted(a.files) == sorted(b.files)
+        for name in a.files:
+            if name != "header":
+                np.testing.assert_array_equal(a[name], b[name])
+
+
+def test_newer_format_is_rejected(tmp_path, monkeypatch):
+    path = str(tmp_path / "save.npz")
+    monkeypatch.setattr("game.save.SAVE_FORMAT_VERSION", 99)
+    save_state(make_state(), path)
+    monkeypatch.undo()
+    with pytest.raises(ValueError, match="newer"):
+        load_state(path)
+
+
+def test_missing_save_starts_fresh(tmp_path):
+    path = str(tmp_path / "save.npz")
+    st = load_or_new_state(path)
+    assert st.cytosol == 0
+    assert not os.path.exists(path)
+
+
+def test_broken_save_is_moved_aside(tmp_path):
+    path = str(tmp_path / "save.npz")
+    save_state(make_state(), path)
+    with open(path, "r+b") as f:
+        f.truncate(100)
+    st = load_or_new_state(path)
+    assert st.cytosol == 0
+    assert not os.path.exists(path)
+    assert os.path.exists(f"{path}.bad")
+
+
+def test_concurrent_saves_never_tear(tmp_path):
+    path = str(tmp_path / "save.npz")
+    snap = snapshot(make_state())
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for future in [executor.submit(write_snapshot, snap, path) for _ in range(32)]:
+            future.result()
+    assert load_state(path).cytosol == 3.5
+    assert os.listdir(tmp_path) == ["save.npz"]
+
+
+def test_autosaver_close_waits_for_the_save_in_flight(tmp_path):
+    path = str(tmp_path / "save.npz")
+    autosaver = Autosaver(make_state(), path)
+
+    async def save_and_close():
+        saving = asyncio.ensure_future(autosaver.save())
+        await asyncio.sleep(0)
+        autosaver.close()
+        await saving
+
+    asyncio.run(save_and_close())
+    assert load_state(path).cytosol == 3.5
@@ -0,0 +1,104 @@
+import pytest
+
+from game import scheduler as scheduler_module
+from game.perf import PerfMonitor
+from game.scheduler import Scheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler_module, "time", clock)
+    return clock
+
+
+def make_scheduler(**kwargs) -> tuple[Scheduler, list]:
+    steps = []
+    return Scheduler(steps.append, dt=0.125, perf=PerfMonitor(), **kwargs), steps
+
+
+def test_accumulator_carries_the_remainder():
+    scheduler, steps = make_scheduler()
+    scheduler.advance(0.3)
+    assert steps == [0.125] * 2
+    scheduler.advance(0.1)
+    assert steps == [0.125] * 3
+    scheduler.advance(0.0)
+    assert len(steps) == 3
+    scheduler.advance(0.1)
+    assert len(steps) == 4
+
+
+def test_game_time_keeps_pace_with_wall_time():
+    scheduler, steps = make_scheduler()
+    for _ in range(1000):
+        scheduler.advance(1 / 64)
+    assert sum(steps) == 1000 / 64
+
+
+@pytest.mark.parametrize("catch_up", [False, True])
+def test_falling_far_behind_is_capped(catch_up):
+    caught_up = []
+    scheduler, steps = make_scheduler(max_catch_up_steps=3, catch_up=caught_up.append if catch_up else None)
+    scheduler.advance(10 * 0.125 + 0.1)
+    assert steps == [0.125] * 3
+    if catch_up:
+        assert caught_up == [7 * 0.125]
+        assert scheduler.perf.missed == {}
+    else:
+        assert scheduler.perf.missed == {"scheduler": 7}
+    # Only the remainder is carried
+    scheduler.advance(0.0)
+    assert len(steps) == 3
+    scheduler.advance(0.025)
+    assert len(steps) == 4
+
+
+def test_no_step_only_runs_subscriptions():
+    scheduler = Scheduler(None, dt=0.125, perf=PerfMonitor())
+    scheduler.advance(100)
+    assert scheduler.next_wakeup(5.0, 0.0) == 0.125
+
+
+def test_subscriptions_run_once_per_period(clock):
+    scheduler, _ = make_scheduler()
+    runs = []
+    subscription = scheduler.subscribe("widget", lambda: runs.append(clock.now), 0.5)
+    for clock.now in (0.0, 0.3, 0.5, 0.9, 1.0):
+        scheduler.run_due(clock.now)
+    assert runs == [0.0, 0.5, 1.0]
+    # A subscriber that fell behind runs once, then when its next period is due
+    for clock.now in (3.7, 3.8, 4.0, 4.2):
+        scheduler.run_due(clock.now)
+    assert runs == [0.0, 0.5, 1.0, 3.7, 4.0]
+    assert scheduler.perf.durations["widget"].total == 5
+    scheduler.unsubscribe(subscription)
+    scheduler.run_due(10.0)
+    assert len(runs) == 5
+
+
+def test_next_wakeup(clock):
+    scheduler, _ = make_scheduler()
+    # The next timestep, less what is accumulated and what passed since the last advance
+    scheduler.advance(0.05)
+    assert scheduler.next_wakeup(0.0, 0.0) == pytest.approx(0.075)
+    assert scheduler.next_wakeup(0.05, 0.0) == pytest.approx(0.025)
+    assert scheduler.next_wakeup(1.0, 0.0) == 0.0
+    # Or a subscription, if one is due sooner
+    clock.now = 0.0
+    subscription = scheduler.subscribe("widget", lambda: None, 1.0)
+    assert scheduler.next_wakeup(0.0, 0.0) == 0.0
+    scheduler.run_due(0.0)
+    assert subscription.next_due == 1.0
+    assert scheduler.next_wakeup(0.0, 0.0) == pytest.approx(0.075)
+    scheduler.advance(0.05)
+    assert scheduler.next_wakeup(0.98, 0.98) == pytest.approx(0.02)
+    assert scheduler.next_wakeup(0.985, 0.98) == pytest.approx(0.015)
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from game.slots import SLOT_MASK, SlotAllocator
+
+
+def test_rows_stay_dense_through_frees():
+    slots = SlotAllocator()
+    handles = [slots.allocate()[0] for _ in range(5)]
+    assert slots.free(handles[1]) == (1, 4)
+    # The last row took over the freed one
+    assert slots.row(handles[4]) == 1
+    assert slots.handles.tolist() == [handles[0], handles[4], handles[2], handles[3]]
+    assert slots.free(handles[3]) == (3, 3)
+    assert len(slots) == 3
+
+
+def test_stale_handle_raises_key_error():
+    slots = SlotAllocator()
+    handle, _ = slots.allocate()
+    slots.free(handle)
+    assert handle not in slots
+    with pytest.raises(KeyError):
+        slots.row(handle)
+    with pytest.raises(KeyError):
+        slots.rows([handle])
+    with pytest.raises(KeyError):
+        slots.free(handle)
+
+
+def test_unknown_handle_raises_key_error():
+    slots = SlotAllocator()
+    slots.allocate()
+    assert 12345 not in slots
+    with pytest.raises(KeyError):
+        slots.row(12345)
+    with pytest.raises(KeyError):
+        slots.rows(np.array([12345]))
+
+
+def test_reused_slot_gets_a_new_generation():
+    slots = SlotAllocator()
+    old, _ = slots.allocate()
+    slots.free(old)
+    new, row = slots.allocate()
+    assert new & SLOT_MASK == old & SLOT_MASK
+    assert new != old
+    assert new in slots and old not in slots
+    assert slots.row(new) == row == 0
+    with pytest.raises(KeyError):
+        slots.row(old)
+
+
+def test_allocate_many_reuses_freed_slots():
+    slots = SlotAllocator()
+    first = slots.allocate_many(4)
+    slots.free(int(first[2]))
+    slots.free(int(first[0]))
+    more = slots.allocate_many(3)
+    assert sorted((more & SLOT_MASK).tolist()) == [0, 2, 4]
+    assert not np.isin(more, first).any()
+    np.testing.assert_array_equal(slots.rows(more), [2, 3, 4])
+    assert len(slots) == 5
+
+
+def test_matches_a_list_through_random_churn():
+    rng = np.random.default_rng(0)
+    slots = SlotAllocator()
+    data, live = [], {}
+    for i in range(5000):
+        if live and rng.random() < 0.45:
+            handle = list(live)[rng.integers(len(live))]
+            row, last = slots.free(handle)
+            data[row] = data[last]
+            data.pop()
+            del live[handle]
+        elif rng.random() < 0.1:
+            for handle in slots.allocate_many(int(rng.integers(5))).tolist():
+                live[handle] = i
+                data.append(i)
+        else:
+            handle, row = slots.allocate()
+            assert row == len(data)
+            live[handle] = i
+            data.append(i)
+    assert len(slots) == len(live)
+    assert sorted(slots.handles.tolist()) == sorted(live)
+    for handle, value in live.items():
+        assert data[slots.row(handle)] == value
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from game.spatial import SpatialHash
+
+
+def make_index(seed: int, cell_size: int, n: int = 300) -> tuple[SpatialHash, np.ndarray, np.ndarray]:
+    """An index of n points spread over and around a 200 x 600 dish, built up
+    through every kind of update. Returns it with the positions of every key
+    ever used and the keys still indexed."""
+    rng = np.random.default_rng(seed)
+    positions = rng.integers(-40, [240, 640], size=(n, 2))
+    index = SpatialHash(lambda keys: positions[keys], cell_size)
+    for key in range(n // 3):
+        index.insert(key, *positions[key].tolist())
+    keys = np.arange(n // 3, n)
+    index.insert_many(keys, positions[keys])
+    # Most move a step or two, and a few jump across the dish
+    moving = rng.choice(n, n // 2, replace=False)
+    old = positions[moving].copy()
+    positions[moving] += rng.integers(-3, 4, size=old.shape)
+    positions[moving[:10]] = rng.integers(-40, [240, 640], size=(10, 2))
+    index.move_many(moving, old, positions[moving])
+    removed = rng.choice(n, n // 5, replace=False)
+    for key in removed.tolist():
+        index.remove(key, *positions[key].tolist())
+    return index, positions, np.setdiff1d(np.arange(n), removed)
+
+
+def make_queries(seed: int, count: int = 200) -> np.ndarray:
+    """Query points inside, around and far outside the dish."""
+    rng = np.random.default_rng(seed + 1000)
+    return np.concatenate([rng.integers(-60, [260, 660], size=(count, 2)), [[-500, -500], [900, 2000]]])
+
+
+@pytest.mark.parametrize("cell_size", [1, 4, 16, 64])
+@pytest.mark.parametrize("seed", range(4))
+def test_query_rect_matches_brute_force(seed, cell_size):
+    index, positions, keys = make_index(seed, cell_size)
+    rng = np.random.default_rng(seed)
+    ys, xs = positions[keys, 0], positions[keys, 1]
+    assert len(index) == len(keys)
+    for y0, x0 in make_queries(seed).tolist():
+        y1, x1 = y0 + int(rng.integers(0, 80)), x0 + int(rng.integers(0, 200))
+        expected = keys[(ys >= y0) & (ys <= y1) & (xs >= x0) & (xs <= x1)]
+        assert sorted(index.query_rect(y0, x0, y1, x1).tolist()) == expected.tolist()
+
+
+@pytest.mark.parametrize("cell_size", [1, 4, 16, 64])
+@pytest.mark.parametrize("seed", range(4))
+def test_query_radius_matches_brute_force(seed, cell_size):
+    index, positions, keys = make_index(seed, cell_size)
+    rng = np.random.default_rng(seed)
+    for y, x in make_queries(seed).tolist():
+        radius = float(rng.choice([0, 1, 2.5, 10, 33.3, 120]))
+        d2 = (positions[keys, 0] - y) ** 2 + (positions[keys, 1] - x) ** 2
+        expected = keys[d2 <= radius * radius]
+        assert sorted(index.query_radius(y, x, radius).tolist()) == expected.tolist()
+
+
+@pytest.mark.parametrize("cell_size", [1, 4, 16, 64])
+@pytest.mark.parametrize("seed", range(4))
+def test_nearest_matches_brute_force(seed, cell_size):
+    index, positions, keys = make_index(seed, cell_size)
+    rng = np.random.default_rng(seed)
+    for y, x in make_queries(seed).tolist():
+        d2 = (positions[keys, 0] - y) ** 2 + (positions[keys, 1] - x) ** 2
+        for max_radius in (None, float(rng.choice([0, 1.5, 5, 20, 75]))):
+            nearest = index.nearest(y, x, max_radius)
+            if max_radius is not None and d2.min() > max_radius * max_radius:
+                assert nearest is None
+            else:
+                # Ties may go to any of the closest
+                assert nearest in keys.tolist()
+                ny, nx = positions[nearest].tolist()
+                assert (ny - y) ** 2 + (nx - x) ** 2 == d2.min()
+
+
+def test_empty_index():
+    index = SpatialHash(lambda keys: np.zeros((len(keys), 2), dtype=np.int64))
+    assert index.nearest(0, 0) is None
+    assert index.query_rect(0, 0, 100, 100).tolist() == []
+    assert index.query_radius(0, 0, 100).tolist() == []
+    index.insert(1, 5, 5)
+    index.remove(1, 5, 5)
+    assert index.nearest(0, 0) is None
+    assert len(index) == 0
@@ -0,0 +1,64 @@
+from game.state import State
+
+
+def versions(st: State) -> dict:
+    return {
+        **{ticker: st.resource_version(ticker) for ticker in st.resources},
+        **{organelle_id: st.organelle_version(organelle_id) for organelle_id in st.organelles},
+    }
+
+
+def changed(before: dict, after: dict) -> set:
+    return {key for key in before if after[key] != before[key]}
+
+
+def test_idle_step_changes_no_versions():
+    st = State(seed=0)
+    before = versions(st)
+    for _ in range(10):
+        st.step()
+    assert changed(before, versions(st)) == set()
+
+
+def test_buy_and_sell_bump_the_organelle_and_its_costs():
+    st = State(seed=0)
+    before = versions(st)
+    assert st.buy(0)
+    assert changed(before, versions(st)) == {0, "ATP"}
+    before = versions(st)
+    assert st.sell(0)
+    assert changed(before, versions(st)) == {0, *st.organelles[0].costs}
+
+
+def test_failed_buy_changes_no_versions():
+    st = State(seed=0)
+    before = versions(st)
+    assert not st.buy(0, 100)
+    assert changed(before, versions(st)) == set()
+
+
+def test_step_bumps_only_what_it_changes():
+    st = State(seed=0)
+    st.buy(0)
+    before = versions(st)
+    st.step()
+    # The chloroplast only makes ATP
+    assert changed(before, versions(st)) == {"ATP"}
+    before = versions(st)
+    st.step()
+    assert changed(before, versions(st)) == {"ATP"}
+
+
+def test_catch_up_bumps_every_resource():
+    st = State(seed=0)
+    before = versions(st)
+    st.catch_up(60.0)
+    assert changed(before, versions(st)) == set(st.resources)
+
+
+def test_sync_counts_bumps_every_organelle():
+    st = State(seed=0)
+    before = versions(st)
+    st.organelles[1].count = 3
+    st.sync_counts()
+    assert changed(before, versions(st)) == set(st.organelles)
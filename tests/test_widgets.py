@@ -0,0 +1,99 @@
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks"))
+import nurses_2_stubs
+
+nurses_2_stubs.install()
+
+from game.bignum import BigArray  # noqa: E402
+from game.scheduler import Scheduler  # noqa: E402
+from game.state import State  # noqa: E402
+from game.widgets import OrganelleBuySellWidget, ResourceWidget  # noqa: E402
+
+
+class FakeTextWidget:
+    """Counts what is drawn, in place of the nurses_2 TextWidget."""
+
+    def __init__(self):
+        self.texts = []
+        self.size = (4, 60)
+
+    def set_text(self, text, **_):
+        self.texts.append(text)
+
+    def apply_hints(self):
+        pass
+
+    def normalize_canvas(self):
+        pass
+
+
+def make_world(st: State) -> SimpleNamespace:
+    return SimpleNamespace(view=st, scheduler=Scheduler(None))
+
+
+def make_resource_widget(world) -> ResourceWidget:
+    widget = ResourceWidget(world)
+    text = FakeTextWidget()
+    widget.set_text = text.set_text
+    widget.texts = text.texts
+    return widget
+
+
+def make_organelle_widget(world, organelle_id: int) -> OrganelleBuySellWidget:
+    # Without the child widgets and buttons its __init__ builds
+    widget = OrganelleBuySellWidget.__new__(OrganelleBuySellWidget)
+    widget.world = world
+    widget.organelle = world.view.organelles[organelle_id]
+    widget._drawn_width = widget._drawn_version = None
+    widget.title_widget, widget.description_widget, widget.stat_widget = (FakeTextWidget() for _ in range(3))
+    return widget
+
+
+def test_resource_widget_only_reformats_changed_versions():
+    st = State(seed=0)
+    widget = make_resource_widget(make_world(st))
+    widget.update()
+    assert len(widget.texts) == 1
+    widget.update()
+    st.step()
+    widget.update()
+    assert len(widget.texts) == 1
+    # A change the version doesn't show is not drawn
+    st.resources["GLUC"].amount = BigArray(99)
+    widget.update()
+    assert len(widget.texts) == 1
+    st.buy(0)
+    widget.update()
+    assert len(widget.texts) == 2
+    assert "ATP): 5.00" in widget.texts[-1]
+    assert "(GLUC): 99.00" not in widget.texts[-1]
+
+
+def test_organelle_widget_only_redraws_stats_when_its_version_changes():
+    st = State(seed=0)
+    world = make_world(st)
+    widget = make_organelle_widget(world, 0)
+    widget.update()
+    assert widget.stat_widget.texts[-1].endswith("Owned: 0")
+    for _ in range(3):
+        st.step()
+        widget.update()
+    assert len(widget.stat_widget.texts) == 1
+    st.buy(0)
+    widget.update()
+    assert len(widget.stat_widget.texts) == 2
+    assert widget.stat_widget.texts[-1].endswith("Owned: 1")
+    # Another organelle's purchase leaves this one alone
+    st.deposit("ATP", 1000)
+    st.deposit("GLUC", 1000)
+    assert st.buy(1)
+    widget.update()
+    assert len(widget.stat_widget.texts) == 2
+    # Resizing redraws everything
+    widget.description_widget.size = (4, 30)
+    widget.update()
+    assert len(widget.stat_widget.texts) == 3
+    assert len(widget.title_widget.texts) == 2
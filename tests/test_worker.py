@@ -0,0 +1,87 @@
+import pickle
+import time
+
+import pytest
+
+from game.config import DISH_ZOOM_LEVELS
+from game.dish import Point
+from game.state import State
+from game.worker import SimulationWorker
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture()
+def worker():
+    worker = SimulationWorker(State(seed=0), save_path=None)
+    worker.start()
+    yield worker
+    worker.stop(5)
+
+
+def test_remote_controls_read_from_snapshots(worker):
+    controls = worker.controls
+    assert controls.follow_organism is None
+    assert controls.zoom == DISH_ZOOM_LEVELS[0]
+    assert not controls.show_nutrients
+    assert controls.camera_origin() == Point(0, 0)
+    controls.press("p")
+    wait_for(lambda: controls.follow_organism is not None)
+    followed = controls.follow_organism
+    assert followed.idx in worker.snapshot.dish.organism_ids.tolist()
+    offset = controls.camera_offset
+    expected = Point(followed.pos.y - offset.y * controls.zoom, followed.pos.x - offset.x * controls.zoom)
+    assert worker.snapshot.dish.camera_origin == expected
+
+
+def test_remote_controls_forward_writes(worker):
+    controls = worker.controls
+    controls.show_nutrients = True
+    controls.zoom = DISH_ZOOM_LEVELS[-1]
+    controls.camera_offset = Point(1, 2)
+    wait_for(lambda: controls.show_nutrients and controls.zoom == DISH_ZOOM_LEVELS[-1])
+    wait_for(lambda: controls.camera_offset == Point(1, 2))
+    assert worker.snapshot.dish.nutrients is not None
+    controls.press("p")
+    wait_for(lambda: controls.follow_organism is not None)
+    controls.follow_organism = None
+    wait_for(lambda: controls.follow_organism is None)
+
+
+def test_snapshots_follow_commands(worker):
+    controls = worker.controls
+    organisms = len(worker.snapshot.dish.organism_ids)
+    controls.press("p")
+    wait_for(lambda: len(worker.snapshot.dish.organism_ids) == organisms + 1)
+    assert worker.snapshot.dish.follow_organism.idx == worker.snapshot.dish.organism_ids[-1]
+    controls.press("v")
+    wait_for(lambda: worker.snapshot.dish.nutrients is not None)
+
+    version = worker.snapshot.organelle_version(0)
+    worker.submit("buy", 0, 1)
+    wait_for(lambda: worker.snapshot.organelles[0].count == 1)
+    assert worker.snapshot.organelle_version(0) > version
+    worker.submit("sell", 0, 1)
+    wait_for(lambda: worker.snapshot.organelles[0].count == 0)
+    # Snapshots published before the commands are left as they were
+    snap = worker.snapshot
+    worker.submit("buy", 0, 1)
+    wait_for(lambda: worker.snapshot.organelles[0].count == 1)
+    assert snap.organelles[0].count == 0
+
+
+def test_worker_times_itself(worker):
+    wait_for(lambda: "tick" in worker.snapshot.perf_report, timeout=10)
+
+
+def test_snapshot_pickles_with_followed_organism(worker):
+    worker.controls.press("p")
+    wait_for(lambda: worker.controls.follow_organism is not None)
+    snap = pickle.loads(pickle.dumps(worker.snapshot))  # noqa: S301
+    assert snap.dish.follow_organism.idx == worker.controls.follow_organism.idx
+    assert not snap.dish.organism_positions.flags.writeable